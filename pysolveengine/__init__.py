@@ -13,7 +13,8 @@ def _create_logger():
     logger.addHandler(handler)
 _create_logger()
 
-from .mipmodel import MIPModel, INF, Direction
+from .mipmodel import MIPModel, INF, Direction, VarType, quicksum, dot
+from .matrixmodel import MatrixMIPModel
 from .satmodel import SATModel
 from .config import SEStatusCode, SolverStatusCode, help_sat, help_mip
 
@@ -7,8 +7,9 @@ import logging
 from sys import stdout
 
 from .client import GrpcClient, HttpClient
-from .helper import _get_logger, check_instance
-from .config import SolverStatusCode, SEStatusCode
+from .helper import _get_logger, check_instance, iter_chunks
+from .config import SolverStatusCode, SEStatusCode, Compression
+from .snapshot import close_mapping
 
 LOGGER = _get_logger()
 
@@ -23,7 +24,7 @@ class BaseModel(object):
     this is necessary to connect to the solver
 
     file_name: the file_name that the uploaded file should have,
-    default is model.lp, must end with .lp
+    default is model.lp, must end with .lp, .mps or .cnf
 
     id: job id provided by Solve Engine when sending a new problem
     
@@ -32,21 +33,27 @@ class BaseModel(object):
                     is finished solving the problem
         debug(boolean): active the debug output
 
+    compression: None, or gzip/zstd to compress the problem sent to SE
+
+    __mapping: None, or the mmap of the snapshot the model has been loaded
+        from, see close
+
     __solver_status: status of the solution returned by SE
     __se_status: current status of the solving processus
     """
     OPTIONS = namedtuple("Options", 'sleep_time debug')
 
     def __init__(self, token, file_name, sleep_time=2, debug=False,
-                 file_ending=".lp", interactive_mode=False, http_mode=False):
+                 file_ending=".lp", interactive_mode=False, http_mode=False,
+                 compression=None):
         if debug:
             LOGGER.setLevel(logging.DEBUG)
-        if file_ending not in [".lp", ".cnf"]:
+        if file_ending not in [".lp", ".mps", ".cnf"]:
             raise ValueError("File type {} not supported".format(file_ending))
 
         _check_init(token, sleep_time,
                     debug, interactive_mode,
-                    http_mode)
+                    http_mode, compression)
 
         self.__file_name = file_name
         self.__token = token
@@ -54,19 +61,27 @@ class BaseModel(object):
         self.__options = BaseModel.OPTIONS(sleep_time, debug)
         self.__solver_status = str(SolverStatusCode.NOTSTARTED)
         self.__se_status = str(SEStatusCode.NOTSTARTED)
+        self.__mapping = None
 
         self.interactive = interactive_mode
         self.use_http = http_mode
+        self.compression = None if compression is None else str(compression)
         
-        if self.use_http:
-            self.client = HttpClient(self, self.__token,
-                                             self.__options.sleep_time)
-        else:
-            self.client = GrpcClient(self, self.__token,
-                                             self.__options.sleep_time)
+        self.client = self._new_client(self)
 
         LOGGER.debug("creating model with file_name= " + self.__file_name)
 
+    def _new_client(self, model):
+        """
+        create a client of the kind (http or grpc) and with the token of this model
+
+        :param model: the object whose problem the client sends, this model
+            or any object with its file_name, compression, interactive
+            and print_if_interactive attributes and its _iter_model_chunks method
+        """
+        client_class = HttpClient if self.use_http else GrpcClient
+        return client_class(model, self.__token, self.__options.sleep_time)
+
     def reinit(self):
         """
         Reinitialise the model/job characteristics that are not init parameters
@@ -76,9 +91,61 @@ class BaseModel(object):
         self.__solver_status = str(SolverStatusCode.NOTSTARTED)
         self.__se_status = str(SEStatusCode.NOTSTARTED)
 
-    def build_str_model(self):
+    def _keep_mapping(self, mapping):
+        """keep the mmap of the snapshot the model is loaded from, to be closed by close"""
+        self.__mapping = mapping
+
+    def _own_snapshot(self):
+        """copy the sections of the snapshot loaded the model still uses, before closing it"""
+        pass
+
+    def close(self):
+        """
+        close the file of the snapshot the model has been loaded from, if any,
+        the model copying the part of it it still uses:
+        the model can still be modified and solved, and the file replaced.
+        The model can be used as a context manager closing it as well:
+
+            with MIPModel.load(path, token) as model:
+                model.solve()
+        """
+        if self.__mapping is not None:
+            self._own_snapshot()
+            close_mapping(self.__mapping)
+            self.__mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _iter_model_lines(self):
+        """yield the lines of the problem file, without their '\\n'"""
         raise NotImplementedError()
 
+    def _iter_model_chunks(self):
+        """yield the problem file as ascii bytes, in chunks of about 64KB"""
+        return iter_chunks(self._iter_model_lines())
+
+    def build_str_model(self):
+        """
+        Builds the str file of the problem
+        :return: returns the str value of the text
+        """
+        return "\n".join(self._iter_model_lines())
+
+    def write_model(self, sink):
+        """
+        write the problem file to a binary sink, chunk by chunk,
+        without building the whole str value
+
+        :param sink: any object with a write(bytes) method,
+                like a file opened in 'wb' mode, a BytesIO or a socket file
+        """
+        for chunk in self._iter_model_chunks():
+            sink.write(chunk)
+
     def _process_solution(self, result):
         raise NotImplementedError()
 
@@ -131,7 +198,7 @@ class BaseModel(object):
 
 def _check_init(token, sleep_time,
                 debug, interactive_mode,
-                http_mode):
+                http_mode, compression=None):
     """
     Check that all the initialising input suit the model
 
@@ -147,6 +214,8 @@ def _check_init(token, sleep_time,
     :param http_mode: boolean, True if the user
             wants the requests to follow http methods,
             instead it will use GRPC
+    :param compression: None, or the str value of the algorithm
+            compressing the problem, gzip or zstd (http only)
     :return:
     """
     check_instance(fct_name="init model", value=token,
@@ -159,3 +228,12 @@ def _check_init(token, sleep_time,
                    name="interactive_mode", type_=bool)
     check_instance(fct_name="init model", value=http_mode,
                    name="http_mode", type_=bool)
+    if compression is not None:
+        if str(compression) not in Compression.get_values():
+            raise ValueError("".join(["Could not init model, compression must be None or one of ",
+                                      ", ".join(Compression.get_values()),
+                                      ", not ", str(compression)]))
+        if compression == Compression.ZSTD and not http_mode:
+            raise ValueError("".join(["Could not init model, gRPC only compresses with ",
+                                      str(Compression.GZIP), ", use http_mode to compress with ",
+                                      str(Compression.ZSTD)]))
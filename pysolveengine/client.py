@@ -1,14 +1,17 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 import grpc
+import io
 import time
+import json
 import base64 as b64
 import requests
 
 from .config import SE_URL_HTTP, SE_URL_GRPC, SEStatusCode, SEUrls
 from .svc_jobs_pb2_grpc import JobStub
 from .svc_jobs_pb2 import Problem, JobRequest, CreateJobRequest
-from .helper import _get_logger, unusual_answer, SERequests, build_err_msg, ObjResponse
+from .helper import (_get_logger, unusual_answer, SERequests, build_err_msg, ObjResponse,
+                     iter_compressed)
 
 LOGGER = _get_logger()
 
@@ -23,6 +26,7 @@ class BaseClient(object):
         model(BaseModel): the model where all the problem attributes are
         sleep_time: he time we should sleep between checks if the SolveEngine
                     is finished solving the problem
+        _se_status: None, or the status of the last job SE finished
     """
     def __init__(self, model, sleep_time):
         """
@@ -37,6 +41,7 @@ class BaseClient(object):
         self._job_created = False
         self._job_scheduled = False
         self._job_done = False
+        self._se_status = None
 
     def manage_solving(self):
         """
@@ -57,12 +62,17 @@ class BaseClient(object):
             self._job_scheduled = True
 
         if not self._job_done:
-            se_status = self._wait_results()
+            self._se_status = self._wait_results()
             self._job_done = True
 
         result = self._get_solution()
 
-        return self._id, se_status, result
+        # the job is over, solving the model again creates a new one
+        self._job_created = False
+        self._job_scheduled = False
+        self._job_done = False
+
+        return self._id, self._se_status, result
 
 
 class GrpcClient(BaseClient):
@@ -97,13 +107,19 @@ class GrpcClient(BaseClient):
             updates client._id
         """
         LOGGER.debug("Creating Solve Engine job...")
-        pb_data = self.model.build_str_model().encode('ascii')
-            
+        # the message of gRPC holds the whole payload, as bytes
+        pb_data = _join_chunks(self.model._iter_model_chunks())
         pb = Problem(name=self.model.file_name, data=pb_data)
+        del pb_data
 
         req = CreateJobRequest(problems=[pb], options={})
+        kwargs = dict()
+        if self.model.compression is not None:
+            # per-message compression, the only algorithm of gRPC is gzip
+            kwargs["compression"] = grpc.Compression.Gzip
         try:
-            resp_obj = self._solve_engine.Create(req, metadata=self.__grpc_metadata)
+            resp_obj = self._solve_engine.Create(req, metadata=self.__grpc_metadata,
+                                                 **kwargs)
         except grpc.RpcError as err:
             raise grpc.RpcError(err.details())
 
@@ -226,12 +242,20 @@ class HttpClient(BaseClient):
             updates client._id
         """
         LOGGER.debug("Creating Solve Engine job...")
-        pb_data = self.model.build_str_model().encode('ascii')
-
-        pb_data = b64.b64encode(pb_data).decode('utf-8')
-
-        dict_data = dict(problems=[dict(name=self.model.file_name, data=pb_data)])
-        resp = self._send("post", with_job_id=False, json=dict_data)
+        body = _iter_json_body(self.model)
+        headers = {"Content-Type": "application/json"}
+        if self.model.compression is None:
+            # the plain json body, sent with its Content-Length
+            body = _join_chunks(body)
+        else:
+            # the compressed body is a generator, requests sends each chunk as soon
+            # as it is encoded (chunked transfer encoding): the payload is never held
+            # in memory, neither compressed nor uncompressed
+            headers["Content-Encoding"] = self.model.compression
+            # an empty chunk would end a chunked body
+            body = (chunk for chunk in iter_compressed(body, self.model.compression)
+                    if chunk)
+        resp = self._send("post", with_job_id=False, data=body, headers=headers)
 
         solution = ObjResponse(resp, SERequests.CREATE_JOB)
         if solution.unusual_answer:
@@ -318,13 +342,14 @@ class HttpClient(BaseClient):
 
         return result
     
-    def _send(self, msgtype="post", path=None, with_job_id=True, **kwargs):
+    def _send(self, msgtype="post", path=None, with_job_id=True, headers=None, **kwargs):
         """
         send an http request to solveengine
 
         :param msgtype: string type, post/get/etc.
         :param path: what must complete the base url
         :param with_job_id: true if we should add the job_id in the url
+        :param headers: dictionary of headers added to the authorization one
         :param kwargs: args for the requests function.
             Here must a json additional string file
         :return:
@@ -334,11 +359,50 @@ class HttpClient(BaseClient):
         url = "".join([SE_URL_HTTP,
                        "".join([self._id, "/"]) if with_job_id else "",
                        str(path) if path else ""])
+        all_headers = dict(self.__headers)
+        all_headers.update(headers or dict())
         try:
-            result = getattr(requests, msgtype)(url, headers=self.__headers, **kwargs)
+            result = getattr(requests, msgtype)(url, headers=all_headers, **kwargs)
         except requests.RequestException as err:
             raise requests.RequestException(err.response)
 
         LOGGER.debug("request result: " + result.text)
         result.raise_for_status()
         return result.json()
+
+
+def _join_chunks(chunks):
+    """
+    return the bytes of a stream of chunks, written into a buffer whose
+    bytes are returned without being copied: the memory used stays close
+    to the size of the data, and not twice as with b"".join, which keeps
+    all the chunks until the result is built
+
+    :param chunks: iterable of bytes
+    """
+    buffer = io.BytesIO()
+    for chunk in chunks:
+        buffer.write(chunk)
+    return buffer.getvalue()
+
+
+def _iter_json_body(model):
+    """
+    yield the json body of the request creating a job,
+    the problem being encoded in base64 chunk by chunk
+
+    :param model: the model to send
+    :return: generator of bytes
+    """
+    head = json.dumps(dict(problems=[dict(name=model.file_name, data="")]))
+    prefix, suffix = head.rsplit('""', 1)
+    yield "".join([prefix, '"']).encode('ascii')
+    rest = b""
+    for chunk in model._iter_model_chunks():
+        chunk = rest + chunk
+        # base64 encodes groups of 3 bytes, the rest waits for the next chunk
+        cut = len(chunk) - len(chunk) % 3
+        yield b64.b64encode(chunk[:cut])
+        rest = chunk[cut:]
+    yield b64.b64encode(rest)
+    yield "".join(['"', suffix]).encode('ascii')
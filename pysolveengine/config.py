@@ -37,6 +37,12 @@ class SEUrls(StrEnum):
     SCHEDULE_URL = "schedule"
 
 
+class Compression(StrEnum):
+    """Algorithms available to compress the problem sent to SE"""
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+
 class SolverStatusCode(StrEnum):
     """Enum for the status codes returned by the solvers"""
     INTERRUPTED = "interrupted"
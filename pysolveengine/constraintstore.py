@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""Module for the store of the constraints of the models
+
+The MIP and SAT models keep their constraints in a _ConstraintStore,
+which addresses them by a handle that never changes, and by their name,
+and removes them in O(1).
+"""
+
+from array import array
+from itertools import chain
+
+
+class _ConstraintStore(object):
+    """
+    store of the constraints of a model, addressed by their handle,
+    the named ones by their name as well, a name given to several
+    constraints being the one of the last constraint added not removed
+
+    The handle of a constraint is the number of constraints added
+    before it, it never changes. A constraint removed is replaced by a
+    tombstone (None) in O(1), the tombstones are only dropped when the
+    constraints are iterated, which happens when the model is written.
+
+    The first constraints can be kept by a lazy source, see attach: each
+    one is only built when it is read with get, the iterations building
+    the ones not read yet without keeping them.
+
+    Attributes:
+    items: list of the constraints, None for the removed ones
+    handles: array of the handles of the items
+    positions: dictionary handle : position in items of the constraints
+    names: dictionary name : handle of the last constraint named name
+    shadowed: dictionary name : list of the handles of the other
+        constraints named name, for the names given several times
+    nb_removed: the number of tombstones in items
+    next_handle: the handle of the next constraint added
+    lazy: None, or the source of the constraints of the first handles
+    built: dictionary handle : constraint of the lazy source read
+    dropped: set of the handles of the lazy source removed
+    """
+    __slots__ = ('items', 'handles', 'positions', 'names', 'shadowed', 'nb_removed',
+                 'next_handle', 'lazy', 'built', 'dropped')
+
+    def __init__(self):
+        self.items = list()
+        self.handles = array('l')
+        self.positions = dict()
+        self.names = dict()
+        self.shadowed = dict()
+        self.nb_removed = 0
+        self.next_handle = 0
+        self.lazy = None
+        self.built = dict()
+        self.dropped = set()
+
+    def __len__(self):
+        if self.lazy is None:
+            return len(self.positions)
+        return len(self.positions) + len(self.lazy) - len(self.dropped)
+
+    def __iter__(self):
+        """iterate over the constraints, in the order they have been added"""
+        self.compact()
+        if self.lazy is None:
+            return iter(self.items)
+        return chain(map(self.__peek, self.__iter_lazy_handles()), self.items)
+
+    def iter_handles(self):
+        """iterate over the tuples (handle, constraint)"""
+        self.compact()
+        if self.lazy is None:
+            return zip(self.handles, self.items)
+        return chain(((handle, self.__peek(handle)) for handle in self.__iter_lazy_handles()),
+                     zip(self.handles, self.items))
+
+    def attach(self, lazy):
+        """
+        keep the constraints of the first handles in a lazy source,
+        to be called before any constraint is added
+
+        :param lazy: object with the methods __len__, build(handle)
+            returning the constraint of a handle, and find(name) returning
+            the handles of the constraints named name, the last one first
+        """
+        assert not self.next_handle
+        self.lazy = lazy
+        self.next_handle = len(lazy)
+
+    def __is_lazy(self, handle):
+        """return True if the constraint of handle is kept by the lazy source"""
+        return self.lazy is not None and 0 <= handle < len(self.lazy)
+
+    def __iter_lazy_handles(self):
+        """iterate over the handles of the lazy source not removed"""
+        if not self.dropped:
+            return iter(range(len(self.lazy)))
+        return (handle for handle in range(len(self.lazy)) if handle not in self.dropped)
+
+    def __peek(self, handle):
+        """get a constraint of the lazy source, without keeping it if not built yet"""
+        item = self.built.get(handle)
+        return self.lazy.build(handle) if item is None else item
+
+    def __find_lazy(self, name):
+        """get the handle of a named constraint of the lazy source, None if there is none"""
+        if self.lazy is None:
+            return None
+        return next((handle for handle in self.lazy.find(name)
+                     if handle not in self.dropped), None)
+
+    def append(self, item, name=None):
+        """
+        add a constraint after the others
+
+        :param item: the constraint
+        :param name: its name, None if it is not named,
+            the constraints already named name are shadowed
+        :return: its handle
+        """
+        handle = self.next_handle
+        if name is not None:
+            previous = self.names.get(name)
+            if previous is not None:
+                self.shadowed.setdefault(name, list()).append(previous)
+            self.names[name] = handle
+        self.next_handle += 1
+        self.positions[handle] = len(self.items)
+        self.items.append(item)
+        self.handles.append(handle)
+        return handle
+
+    def reserve(self, nb_items):
+        """reserve the first handles, for the constraints inserted by prepend"""
+        assert not self.next_handle
+        self.next_handle = nb_items
+
+    def prepend(self, items):
+        """add the constraints of the handles reserved before all the others"""
+        self.compact()
+        self.items[:0] = items
+        self.handles[:0] = array('l', range(len(items)))
+        self.positions = dict(zip(self.handles, range(len(self.items))))
+
+    def get(self, handle):
+        """
+        get a constraint by its handle
+
+        Raises:
+        KeyError: if there is no such constraint
+        """
+        if self.__is_lazy(handle):
+            if handle in self.dropped:
+                raise KeyError(handle)
+            item = self.built.get(handle)
+            if item is None:
+                item = self.built[handle] = self.lazy.build(handle)
+            return item
+        return self.items[self.positions[handle]]
+
+    def get_handle(self, key):
+        """
+        get the handle of a constraint by its name, or by its handle,
+        a negative handle -k being the handle of the k-th last constraint
+
+        Raises:
+        KeyError: if there is no such constraint
+        """
+        if isinstance(key, str):
+            handle = self.names.get(key)
+            if handle is None:
+                handle = self.__find_lazy(key)
+            if handle is None:
+                raise KeyError(key)
+            return handle
+        if key < 0:
+            self.compact()
+            if key >= -len(self.handles):
+                return self.handles[key]
+            if self.lazy is None:
+                raise KeyError(key)
+            # the k-th last constraint is one of the lazy source
+            handle = len(self.lazy)
+            for _ in range(len(self.handles), -key):
+                handle -= 1
+                while handle in self.dropped:
+                    handle -= 1
+            if handle < 0:
+                raise KeyError(key)
+            return handle
+        if self.__is_lazy(key):
+            if key in self.dropped:
+                raise KeyError(key)
+            return key
+        if key not in self.positions:
+            raise KeyError(key)
+        return key
+
+    def remove(self, handle, name=None):
+        """
+        remove a constraint, replaced by a tombstone
+
+        :param handle: its handle
+        :param name: its name, None if it is not named
+        :return: the constraint removed
+
+        Raises:
+        KeyError: if there is no such constraint
+        """
+        if self.__is_lazy(handle):
+            if handle in self.dropped:
+                raise KeyError(handle)
+            item = self.__peek(handle)
+            self.built.pop(handle, None)
+            self.dropped.add(handle)
+            return item
+        position = self.positions.pop(handle)
+        item = self.items[position]
+        self.items[position] = None
+        self.nb_removed += 1
+        if name is not None:
+            self.__forget_name(name, handle)
+        return item
+
+    def __forget_name(self, name, handle):
+        """remove the handle of a constraint removed from the ones of its name"""
+        shadowed = self.shadowed.get(name)
+        if self.names[name] != handle:
+            shadowed.remove(handle)
+        elif shadowed:
+            # the name is the one of the last constraint named name left
+            self.names[name] = shadowed.pop()
+        else:
+            del self.names[name]
+        if shadowed is not None and not shadowed:
+            del self.shadowed[name]
+
+    def compact(self):
+        """drop the tombstones, the positions are computed again"""
+        if not self.nb_removed:
+            return
+        kept = [pos for pos, item in enumerate(self.items) if item is not None]
+        self.items = [self.items[pos] for pos in kept]
+        self.handles = array('l', [self.handles[pos] for pos in kept])
+        self.positions = dict(zip(self.handles, range(len(kept))))
+        self.nb_removed = 0
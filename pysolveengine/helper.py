@@ -1,10 +1,16 @@
 # -*- coding: utf-8 -*-
 """Solve Engine Helpers
 """
+from array import array
 from enum import Enum
 import logging
+import zlib
 
 LOGGER_NAME = "satalia_solve_engine_logger"
+CHUNK_SIZE = 1 << 16
+# the level of zlib by default: the higher ones cost much more CPU
+# on large problems for a few percents of size
+GZIP_LEVEL = 6
 
 
 class SERequests(Enum):
@@ -22,6 +28,126 @@ def _get_logger():
     return logging.getLogger(LOGGER_NAME)
 
 
+def _get_numpy():
+    """returns the numpy module, None if it is not installed"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _get_scipy_sparse():
+    """returns the scipy.sparse module, None if scipy is not installed"""
+    try:
+        import scipy.sparse
+    except ImportError:
+        return None
+    return scipy.sparse
+
+
+def iter_chunks(lines, chunk_size=CHUNK_SIZE):
+    """
+    group lines in chunks of about chunk_size characters, encoded in ascii
+    joining the chunks gives the lines separated by '\\n',
+    without '\\n' at the end
+
+    :param lines: iterable of str values, without their '\\n'
+    :param chunk_size: minimal number of characters of a chunk,
+            except for the last one
+    :return: generator of bytes
+    """
+    buf = list()
+    size = 0
+    for line in lines:
+        buf.append(line)
+        size += len(line) + 1
+        if size >= chunk_size:
+            yield "\n".join(buf).encode('ascii')
+            # the next chunk starts with the line break ending this one
+            buf = [""]
+            size = 0
+    if buf and buf != [""]:
+        yield "\n".join(buf).encode('ascii')
+
+
+def decode_variables(result_obj):
+    """
+    decode the names and the values of the variables of a result in bulk,
+    without creating an object per variable
+
+    :param result_obj: the result returned by SE, an ObjResponse
+            or the result message of grpc
+    :return: tuple (names, values), list of str and array of floats
+    """
+    names = getattr(result_obj, 'variable_names', None)
+    if names is not None:
+        return names, result_obj.variable_values
+    variables = result_obj.variables
+    return ([var.name for var in variables],
+            array('d', [var.value for var in variables]))
+
+
+def align_values(values, positions, nb_values):
+    """
+    return the vector of the values placed at their positions,
+    the other ones being NaN, with numpy if it is installed
+
+    :param values: array of floats
+    :param positions: list of the positions of the values,
+            None if they are already in order
+    :param nb_values: the size of the vector
+    :return: array of nb_values floats
+    """
+    if positions is None and len(values) == nb_values:
+        return array('d', values)
+    if positions is None:
+        positions = range(len(values))
+    res = array('d', [float('nan')]) * nb_values
+    np = _get_numpy()
+    if np is not None and len(values):
+        np.frombuffer(res)[np.fromiter(positions, dtype=np.intp,
+                                       count=len(values))] = np.frombuffer(values)
+    else:
+        for pos, value in zip(positions, values):
+            res[pos] = value
+    return res
+
+
+def iter_compressed(chunks, compression):
+    """
+    compress a stream of bytes chunk by chunk,
+    so that the whole data is never in memory at once
+
+    :param chunks: iterable of bytes
+    :param compression: the str value of the algorithm, gzip or zstd
+    :return: generator of the compressed bytes
+    """
+    compressor = _get_compressor(compression)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _get_compressor(compression):
+    """
+    return a new compressor object, with the methods compress and flush
+
+    Raises:
+    ValueError: if zstd is asked and the zstandard package is not installed
+    """
+    if compression == "gzip":
+        # 16 + MAX_WBITS for the gzip header and trailer
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("The zstandard package must be installed to use the zstd compression")
+    return zstandard.ZstdCompressor().compressobj()
+
+
 class StrEnum(Enum):
     """An enum which allows for comparison with a string"""
     def __eq__(self, other):
@@ -92,17 +218,15 @@ class ObjResponse():
                 self.job_status = str(json_obj['status'])
 
             elif resp_type == SERequests.GET_RESULT:
-                self.variables = []
                 self.job_id = str(json_obj['job_id'])
                 dct_result = json_obj['result']
 
                 self.status = str(dct_result['status'])
                 self.objective_value = str(dct_result.get('objective_value', 'no objective value'))
-                lst_dct_vars = dct_result.get('variables', [])
+                # decoded in bulk when they are read, see decode_variables
+                self.__lst_dct_vars = dct_result.get('variables', [])
+                self.__variables = None
 
-                for dct_var in lst_dct_vars:
-                    self.variables.append(Variable(str(dct_var['name']), float(dct_var['value'])))
-                    
             self.unusual_answer = False
             
         except:
@@ -110,6 +234,24 @@ class ObjResponse():
             self.code = str(json_obj['code'])
             self.message = str(json_obj['message'])
 
+    @property
+    def variables(self):
+        """get the list of the Variable (name, value) of the result, built when first read"""
+        if self.__variables is None:
+            self.__variables = [Variable(name, value) for name, value
+                                in zip(self.variable_names, self.variable_values)]
+        return self.__variables
+
+    @property
+    def variable_names(self):
+        """get the list of the names of the variables of the result"""
+        return [str(dct_var['name']) for dct_var in self.__lst_dct_vars]
+
+    @property
+    def variable_values(self):
+        """get the array of the values of the variables of the result"""
+        return array('d', map(float, (dct_var['value'] for dct_var in self.__lst_dct_vars)))
+
     def build_err_msg(self):
         return "Error type : " + str(self.code) + "\nMessage returned by the server : " + self.message
 
@@ -0,0 +1,537 @@
+# -*- coding: utf-8 -*-
+"""Module for reading the LP format
+
+This module reads linear problems written in the (CPLEX) LP format,
+line by line, into a MPS_PROBLEM namedtuple (see mpsformat): the terms
+of the objective and of the constraints are stored in their compact
+form as soon as they are read, and the file is never loaded in memory
+as one string.
+
+The sections read are the objective (Minimize/Maximize), the constraints
+(Subject To), Bounds, General and Binary, until End. A constraint or the
+objective can be written on several lines. The ranged constraints, the
+quadratic terms, the semi-continuous variables and the SOS are not supported.
+
+The lines whose tokens are separated by spaces are split and converted
+slice by slice, about 0.6M nonzeros per second with CPython 3.11, most of
+it spent converting the numbers and looking up the names; the other lines
+are tokenized with a regular expression, more slowly.
+"""
+
+import re
+from array import array
+from math import isfinite
+
+from .mpsformat import MPS_PROBLEM
+
+INF = float('inf')
+
+# operators, signs, numbers, names (a label when followed by ':') and ':'
+_TOKEN = re.compile(r"[<>=]+|[+-]|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|[^\s+\-<>=:]+:?|:")
+_NAME = re.compile(r"[^\s\d.+\-<>=:\[^*/][^\s+\-<>=:]*")
+_DIGITS = "0123456789."
+_SIGNS = frozenset(["+", "-"])
+SENSES = {"<=": "<=", "=<": "<=", "<": "<=", ">=": ">=", "=>": ">=", ">": ">=", "=": "="}
+_REVERSED = {"<=": ">=", ">=": "<=", "=": "="}
+SECTIONS = {"minimize": "min", "minimise": "min", "minimum": "min", "min": "min",
+            "maximize": "max", "maximise": "max", "maximum": "max", "max": "max",
+            "subject to": "st", "such that": "st", "st": "st", "s.t.": "st", "st.": "st",
+            "bounds": "bounds", "bound": "bounds",
+            "general": "general", "generals": "general", "gen": "general",
+            "integer": "general", "integers": "general",
+            "binary": "binary", "binaries": "binary", "bin": "binary",
+            "end": "end"}
+NOT_SUPPORTED = ["semi-continuous", "semi", "semis", "sos"]
+# the first words of the headers, the other lines are not checked by _get_section
+_HEADER_WORDS = frozenset([word.split()[0] for word in SECTIONS] + NOT_SUPPORTED)
+
+
+def read_lp(file_path):
+    """
+    read a problem written in the LP format
+
+    The variables without bounds are between 0 and infinity,
+    they are numbered in the order they first appear in the file.
+
+    :param file_path: string value of the path to the file
+    :return: MPS_PROBLEM namedtuple
+    """
+    reader = _LpReader()
+    with open(file_path, 'r') as f:
+        for line_nb, line in enumerate(f, start=1):
+            try:
+                if not reader.read_line(line):
+                    break
+            except (KeyError, IndexError, ValueError) as err:
+                raise ValueError("".join(["Could not read the LP file ", file_path,
+                                          ", line ", str(line_nb), " : ",
+                                          line.strip(), "\n", str(err)]))
+    try:
+        return reader.get_problem()
+    except ValueError as err:
+        raise ValueError("".join(["Could not read the LP file ", file_path,
+                                  "\n", str(err)]))
+
+
+class _LpReader(object):
+    """
+    state of the reading of a LP file, filled line by line
+
+    The objective or the constraint being read is kept from a line
+    to the next one, its terms being appended to the arrays of its row.
+    """
+
+    def __init__(self):
+        self.maximize = False
+        self.section = None
+        self.obj_constant = 0
+        self.obj = array('d')
+        self.col_indices = dict()
+        self.lbs = array('d')
+        self.ubs = array('d')
+        self.integers = array('b')
+        self.row_names = list()
+        self.senses = list()
+        self.rhs = array('d')
+        self.rows = list()
+        self.col_names = list()
+        self.__new_row()
+
+    def __new_row(self):
+        """start reading a new constraint, or the objective"""
+        self.row_name = None
+        self.nb_cols = len(self.col_names)
+        self.cols = array('l')
+        self.coefs = array('d')
+        self.constant = 0
+        self.sign = 1
+        self.coef = None
+        self.sense = None
+
+    def get_problem(self):
+        """
+        return the MPS_PROBLEM namedtuple read
+
+        Raises:
+        ValueError: if the last constraint is not complete
+        """
+        self.__end_section()
+        return MPS_PROBLEM("", self.maximize, self.obj_constant, self.obj,
+                           self.col_names, self.lbs, self.ubs, self.integers,
+                           self.row_names, self.senses, self.rhs, self.rows)
+
+    def read_line(self, line):
+        """
+        read one line of the file
+
+        :return: False once the end of the file (End) is reached
+        """
+        if "\\" in line:
+            line = line[:line.index("\\")]
+        tokens = line.split()
+        if not tokens:
+            return True
+        section = None
+        if tokens[0].lower() in _HEADER_WORDS:
+            section, tokens = _get_section(tokens)
+        if section is not None:
+            self.__end_section()
+            self.section = section
+            if section == "end":
+                return False
+            if section in ("min", "max"):
+                self.maximize = section == "max"
+            if not tokens:
+                return True
+        if self.section in ("min", "max", "st"):
+            if section is not None:
+                line = " ".join(tokens)
+            if not self.__read_split_line(tokens):
+                self.__read_terms(_TOKEN.findall(line))
+        elif self.section == "bounds":
+            # the tokens of the bounds are mostly separated by spaces
+            if not (self.__read_bound(tokens)
+                    or self.__read_bound(_merge_signs(_TOKEN.findall(line)))):
+                raise ValueError("a bound must be: x free, x <= value, value <= x "
+                                 "or value <= x <= value")
+        elif self.section in ("general", "binary"):
+            self.__read_integers(tokens)
+        else:
+            raise ValueError("the file must start with the objective, Minimize or Maximize")
+        return True
+
+    def __end_section(self):
+        """
+        end the section being read, the objective is stored
+
+        Raises:
+        ValueError: if a constraint is not complete
+        """
+        self.__grow_columns()
+        if self.section in ("min", "max"):
+            if self.coef is not None:
+                self.constant += self.sign * self.coef
+            for col, coef in zip(self.cols, self.coefs):
+                self.obj[col] += coef
+            self.obj_constant += self.constant
+        elif self.section == "st" and (self.cols or self.sense is not None
+                                       or self.coef is not None):
+            raise ValueError("the constraint {} is not complete".format(self.row_name or ""))
+        self.__new_row()
+
+    def __read_split_line(self, tokens):
+        """
+        read a line of the objective or of the constraints whose tokens
+        are separated by spaces, as the lines written by most tools:
+        an optional label, terms, then an optional operator and right hand side
+
+        :return: False if the line must be read token by token
+        """
+        if self.sign != 1 or self.coef is not None or self.sense is not None:
+            return False
+        label, start, end, sense, rhs = None, 0, len(tokens), None, None
+        if tokens[0][-1] == ":" and len(tokens[0]) > 1:
+            label, start = tokens[0][:-1], 1
+        elif len(tokens) > 1 and tokens[1] == ":":
+            label, start = tokens[0], 2
+        if len(tokens) > start + 1 and tokens[-2] in SENSES:
+            sense, rhs, end = tokens[-2], tokens[-1], end - 2
+        elif len(tokens) > start + 2 and tokens[-3] in SENSES and tokens[-2] in ("+", "-"):
+            sense, rhs, end = tokens[-3], "".join(tokens[-2:]), end - 3
+        if (label is not None and self.cols) or (sense is not None and self.section != "st"):
+            return False
+
+        body = tokens[start:end]
+        if sense is not None:
+            try:
+                rhs = _to_value(rhs)
+            except ValueError:
+                return False
+        terms = self.__read_strided_terms(body)
+        if terms is None:
+            if not self.__read_each_term(body):
+                return False
+        elif sense is not None and not self.cols and not self.constant:
+            # a whole constraint on the line, stored without filling the arrays of the row
+            self.row_names.append(self.row_name if label is None else label)
+            self.senses.append(SENSES[sense])
+            self.rhs.append(rhs)
+            self.rows.append((array('l', terms[0]), array('d', terms[1])))
+            self.row_name = None
+            self.nb_cols = len(self.col_names)
+            return True
+        else:
+            self.cols.extend(terms[0])
+            self.coefs.extend(terms[1])
+        if label is not None:
+            self.row_name = label
+        if sense is not None:
+            self.__end_row(SENSES[sense], rhs)
+        return True
+
+    def __read_strided_terms(self, body):
+        """
+        read the terms of a line written with the same layout for all the
+        terms, sign coefficient name or sign name, the functions being
+        applied to the slices of the tokens instead of token by token
+
+        :return: the tuple of the lists (cols, coefs) of the terms, None if
+            they are not written with one of these layouts
+        """
+        first_sign = "+"
+        if body and body[0] in _SIGNS:
+            first_sign, body = body[0], body[1:]
+        values = None
+        if len(body) % 3 == 2:
+            try:
+                values = list(map(float, body[0::3]))
+            except ValueError:
+                pass
+        # a sum of numbers is not finite if one of them is inf or nan
+        if values is not None and isfinite(sum(values)):
+            signs, names = body[2::3], body[1::3]
+        elif len(body) % 2 == 1:
+            signs, names = body[1::2], body[0::2]
+            values = [1.] * len(names)
+        else:
+            return None
+        if not _SIGNS.issuperset(signs):
+            return None
+        cols = list(map(self.col_indices.get, names))
+        if None in cols and not self.__add_columns(names, cols):
+            return None
+        if "-" in signs:
+            for pos, sign in enumerate(signs, start=1):
+                if sign == "-":
+                    values[pos] = -values[pos]
+        if first_sign == "-":
+            values[0] = -values[0]
+        return cols, values
+
+    def __add_columns(self, names, cols):
+        """
+        add the new columns of a line, whose cols are None,
+        a name being possibly repeated in the line
+
+        :return: False if one of the names is not a name of a variable
+        """
+        col_indices, col_names = self.col_indices, self.col_names
+        for pos, col in enumerate(cols):
+            if col is None:
+                name = names[pos]
+                col = col_indices.get(name)
+                if col is None:
+                    if _NAME.fullmatch(name) is None:
+                        return False
+                    col = col_indices[name] = len(col_names)
+                    col_names.append(name)
+                cols[pos] = col
+        return True
+
+    def __read_each_term(self, body):
+        """
+        read the terms of a line token by token, the coefficients
+        being written for some terms only
+
+        :return: False if the line must be read by __read_terms
+        """
+        get_column = self.col_indices.get
+        cols, coefs = self.cols, self.coefs
+        nb_terms = len(cols)
+        sign = coef = None
+        try:
+            for tok in body:
+                col = get_column(tok)
+                if col is None:
+                    if tok == "+" or tok == "-":
+                        if sign is not None or coef is not None:
+                            raise ValueError(tok)
+                        sign = tok
+                        continue
+                    if coef is None and tok[0] in _DIGITS:
+                        coef = float(tok)
+                        continue
+                    if _NAME.fullmatch(tok) is None:
+                        raise ValueError(tok)
+                    col = self.__add_column(tok)
+                value = 1. if coef is None else coef
+                cols.append(col)
+                coefs.append(-value if sign == "-" else value)
+                sign = coef = None
+            if sign is not None or coef is not None:
+                raise ValueError(sign)
+        except ValueError:
+            # read again by __read_terms, to read or report the unusual terms
+            del cols[nb_terms:]
+            del coefs[nb_terms:]
+            return False
+        return True
+
+    def __read_terms(self, tokens):
+        """
+        read the terms of the objective or of the constraints,
+        the state of the row being read is kept in local variables
+        """
+        col_indices = self.col_indices
+        cols, coefs = self.cols, self.coefs
+        sign, coef, sense = self.sign, self.coef, self.sense
+        for tok in tokens:
+            first = tok[0]
+            if sense is not None:
+                # the right hand side ends the constraint
+                if tok == "-":
+                    sign = -sign
+                elif tok != "+":
+                    self.__end_row(sense, sign * _to_value(tok))
+                    cols, coefs = self.cols, self.coefs
+                    sign, coef, sense = 1, None, None
+            elif tok == "+" or tok == "-":
+                if coef is not None:
+                    self.constant += sign * coef
+                    coef, sign = None, 1
+                if tok == "-":
+                    sign = -sign
+            elif first.isdigit() or first == ".":
+                if coef is not None:
+                    raise ValueError("two numbers follow each other")
+                coef = float(tok)
+            elif first in "<>=":
+                if self.section != "st":
+                    raise ValueError("the objective cannot contain the operator {}".format(tok))
+                if coef is not None:
+                    if not cols:
+                        raise ValueError("the ranged constraints are not supported")
+                    self.constant += sign * coef
+                sense, sign, coef = SENSES[tok], 1, None
+            elif tok[-1] == ":" or tok == ":":
+                self.__read_label(tok)
+                cols, coefs = self.cols, self.coefs
+            elif first in "[^*/":
+                raise ValueError("the quadratic terms are not supported")
+            else:
+                col = col_indices.get(tok)
+                if col is None:
+                    col = self.__add_column(tok)
+                cols.append(col)
+                coefs.append(sign if coef is None else sign * coef)
+                sign, coef = 1, None
+        self.sign, self.coef, self.sense = sign, coef, sense
+
+    def __read_label(self, tok):
+        """read the name of a row, 'name:', or ':' after the name"""
+        if tok == ":":
+            # the name has been read as the single variable of the row
+            if len(self.cols) != 1 or self.coefs[0] != 1:
+                raise ValueError("unexpected ':'")
+            name = self.col_names[self.cols[0]]
+            if self.cols[0] >= self.nb_cols:
+                self.__remove_last_column()
+            self.cols, self.coefs = array('l'), array('d')
+        elif self.cols or self.coef is not None:
+            raise ValueError("the name {} must be at the start of the row".format(tok))
+        else:
+            name = tok[:-1]
+        self.row_name = name
+
+    def __end_row(self, sense, rhs):
+        """store the constraint read"""
+        self.row_names.append(self.row_name)
+        self.senses.append(sense)
+        self.rhs.append(rhs - self.constant)
+        self.rows.append((self.cols, self.coefs))
+        self.__new_row()
+
+    def __add_column(self, name):
+        """
+        add a column, its objective coefficient and its bounds are only
+        stored by __grow_columns, before being read or modified
+        """
+        col = len(self.col_names)
+        self.col_indices[name] = col
+        self.col_names.append(name)
+        return col
+
+    def __grow_columns(self):
+        """store the columns added, with the default bounds 0 and infinity"""
+        nb_new = len(self.col_names) - len(self.lbs)
+        if nb_new:
+            self.obj.extend(array('d', [0]) * nb_new)
+            self.lbs.extend(array('d', [0]) * nb_new)
+            self.ubs.extend(array('d', [INF]) * nb_new)
+            self.integers.extend(array('b', [False]) * nb_new)
+
+    def __remove_last_column(self):
+        """remove the last column added, read as a variable but being a name"""
+        del self.col_indices[self.col_names.pop()]
+        for column in (self.obj, self.lbs, self.ubs, self.integers):
+            del column[len(self.col_names):]
+
+    def __get_column(self, name):
+        """get the index of a column of a bound, stored if it is new"""
+        col = self.col_indices.get(name)
+        if col is None:
+            col = self.__add_column(name)
+            self.__grow_columns()
+        return col
+
+    def __read_bound(self, tokens):
+        """
+        read a bound, x free, x op value, value op x
+        or value op x op value
+
+        :return: False if the tokens are not a bound
+        """
+        nb_tokens = len(tokens)
+        if nb_tokens == 2 and tokens[1].lower() == "free":
+            name, bounds = tokens[0], [(">=", -INF), ("<=", INF)]
+        elif nb_tokens == 3 and tokens[1] in SENSES and _is_value(tokens[2]):
+            name, bounds = tokens[0], [(SENSES[tokens[1]], _to_value(tokens[2]))]
+        elif nb_tokens == 3 and tokens[1] in SENSES and _is_value(tokens[0]):
+            name, bounds = tokens[2], [(_REVERSED[SENSES[tokens[1]]], _to_value(tokens[0]))]
+        elif (nb_tokens == 5 and tokens[1] in SENSES and tokens[3] in SENSES
+              and _is_value(tokens[0]) and _is_value(tokens[4])):
+            name, bounds = tokens[2], [(_REVERSED[SENSES[tokens[1]]], _to_value(tokens[0])),
+                                       (SENSES[tokens[3]], _to_value(tokens[4]))]
+        else:
+            return False
+        if _NAME.fullmatch(name) is None:
+            # an operator written without spaces around it
+            return False
+        col = self.__get_column(name)
+        for sense, value in bounds:
+            self.__set_bound(col, sense, value)
+        return True
+
+    def __set_bound(self, col, sense, value):
+        """set the bound given by col (sense) value"""
+        if sense != ">=":
+            self.ubs[col] = value
+        if sense != "<=":
+            self.lbs[col] = value
+
+    def __read_integers(self, names):
+        """read the names of the integer, or binary, columns"""
+        binary = self.section == "binary"
+        for name in names:
+            col = self.__get_column(name)
+            self.integers[col] = True
+            if binary:
+                self.lbs[col] = 0
+                self.ubs[col] = 1
+
+
+def _get_section(tokens):
+    """
+    return the section starting at this line, None if it is not the header
+    of a section, and the tokens following the header on the line
+
+    Raises:
+    ValueError: if the section is not supported
+    """
+    word = tokens[0].lower()
+    if len(tokens) > 1 and tokens[1].lower() in ("to", "that"):
+        word = " ".join([word, tokens[1].lower()])
+    section = SECTIONS.get(word)
+    if section is None:
+        if word.rstrip(":") in NOT_SUPPORTED:
+            raise ValueError("the section {} is not supported".format(tokens[0]))
+        return None, tokens
+    if section in ("min", "max", "st", "end") or len(tokens) == 1:
+        return section, tokens[len(word.split()):]
+    # a variable named as a section, like bin or gen
+    return None, tokens
+
+
+def _merge_signs(tokens):
+    """return the tokens, the signs being merged with the values following them"""
+    res = list()
+    sign = ""
+    for tok in tokens:
+        if tok == "-" or tok == "+":
+            sign = tok
+        else:
+            res.append("".join([sign, tok]))
+            sign = ""
+    return res
+
+
+def _is_value(tok):
+    """return True if the token is a number, or +/- infinity"""
+    try:
+        _to_value(tok)
+    except ValueError:
+        return False
+    return True
+
+
+def _to_value(tok):
+    """
+    return the float value of a number, inf and infinity being infinite
+
+    Raises:
+    ValueError: if the token is not a number
+    """
+    value = float(tok)
+    if value != value:
+        raise ValueError("{} is not a number".format(tok))
+    return value
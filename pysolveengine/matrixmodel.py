@@ -0,0 +1,509 @@
+# -*- coding: utf-8 -*-
+"""Module for the Solver-Engine
+
+This module contains code to build and solve MIP models
+given as matrices, like in Matlab, via the Solve-Engine.
+
+The matrices are kept as they are given, the problem file
+is written directly from them without creating any variable,
+expression or constraint instance.
+"""
+
+from array import array
+from collections import namedtuple
+from itertools import chain, islice, repeat
+from os.path import splitext
+
+from .basemodel import BaseModel, SolverStatusCode
+from .helper import (_get_logger, _get_numpy, check_instance, iter_chunks,
+                     decode_variables, align_values)
+from .mipmodel import (MIPModel, Direction, Operator,
+                       _check_matrices, _lpstr_terms, _iter_compact_bounds,
+                       _get_lp_number_format, _is_sparse, _get_nb_rows,
+                       _get_file_name, _bound_to_float)
+from .mpsformat import MPS_PROBLEM, iter_mps_lines
+
+LOGGER = _get_logger()
+
+
+class MatrixMIPModel(BaseModel):
+    """
+    MatrixMIPModel class
+
+    Creates a MIP model from matrices, following the syntax
+    of MIPModel.build_with_matrices, such that it matches with this model
+
+                         {   A * x <= b
+        min fx such that { Aeq * x  = beq
+         x               {    lb <= x <= ub
+                         { x[i] integer if int_list[i] = 1
+                         { x[i] binary if bin_list[i] = 1
+
+    The inputs (lists, numpy arrays or scipy sparse matrices) are
+    stored as they are, so the memory used is about the size of the
+    matrices, and the variables are only known by their column index.
+    After solving, var_results is the vector of the variable values
+    in the order of the columns.
+
+    Attributes:
+    token: the SolveEngine token provided by the website,
+    this is necessary to connect to the solver
+
+    model_name: the name that the uploaded file should have,
+    without extension, default is model, the problem is written in the
+    lp format unless the name ends with .mps
+
+    sleep_time: the time we should sleep between checks if the SolveEngine
+    is finished solving the problem
+
+    debug(boolean): active the debug output
+
+    interactive_mode(boolean): active information printing while solving
+
+    http_mode(boolean): active http requests instead of grpc
+
+    compression: None (default), gzip or zstd, to compress the problem
+    while sending it, zstd needs http_mode and the zstandard package
+
+    compact_lp(boolean), precision: the lp format options, see MIPModel
+
+    __matrices : namedtuple of the inputs given to build_with_matrices
+    __obj_value : the objective value returned by the solver
+    __values : vector of the variable values returned by the solver
+    __solution : the result of the solver, until its values are decoded
+    """
+    MATRICES = namedtuple('Matrices', 'f A b Aeq beq lb ub int_list bin_list')
+
+    def __init__(self, token, model_name="model", sleep_time=2,
+                 debug=False,
+                 interactive_mode=False, http_mode=False, compression=None,
+                 compact_lp=False, precision=None):
+        """
+        initialise the model
+
+        INPUTS :
+            token : api-key to solve with solve engine
+            model_name : problem name that will figure on SolveEngine
+            sleep_time : amount of seconds waited between two status requests
+            debug : to initiate, or not, Logger()
+            interactive_mode : to print the advances of the solving while solving
+            http_mode : use http requests if True, GRPC if False
+            compression : None, gzip or zstd to compress the problem sent
+            compact_lp : write the lp file without the default bounds
+            precision : None, or the number of significant digits of the numbers
+        """
+        check_instance(fct_name='init MatrixMIPModel', value=model_name,
+                       name='model_name', type_=str)
+        self._compact_lp = compact_lp
+        self._format_number = _get_lp_number_format('init MatrixMIPModel',
+                                                    compact_lp, precision)
+        file_name, file_ending = _get_file_name(model_name)
+        super(MatrixMIPModel, self).__init__(token=token,
+                                             file_name=file_name,
+                                             sleep_time=sleep_time,
+                                             debug=debug,
+                                             file_ending=file_ending,
+                                             interactive_mode=interactive_mode,
+                                             http_mode=http_mode,
+                                             compression=compression)
+        self.__matrices = MatrixMIPModel.MATRICES([], [], [], None, None,
+                                                  [], [], [], [])
+        self.__obj_value = None
+        self.__values = None
+        self.__solution = None
+
+    def reinit(self):
+        """
+        Reinitialise the model characteristics that are not init parameters
+        :return: Nothing
+        """
+        self.__matrices = MatrixMIPModel.MATRICES([], [], [], None, None,
+                                                  [], [], [], [])
+        self.__obj_value = None
+        self.__values = None
+        self.__solution = None
+        super(MatrixMIPModel, self).reinit()
+
+    def build_with_matrices(self, f, A, b,
+                            Aeq=None, beq=None,
+                            lb=None, ub=None,
+                            int_list=None, bin_list=None):
+        """
+        Set the model with the matrices, the objective is minimized
+
+        Args:
+            f, b, beq, lb, ub : lists or numpy arrays of real numbers
+            A, Aeq: matrices of real numbers, lists of lists,
+                numpy arrays or scipy sparse matrices
+            int_list, bin_list: lists of binary numbers
+
+        Raises:
+            ValueError if the Args are not coherent
+        """
+        lb = list() if lb is None else lb
+        ub = list() if ub is None else ub
+        int_list = list() if int_list is None else int_list
+        bin_list = list() if bin_list is None else bin_list
+
+        lb, ub, int_list, bin_list = _check_matrices(f, A, b, Aeq, beq, lb, ub,
+                                                     int_list, bin_list,
+                                                     keep_arrays=True)
+        if _is_sparse(A):
+            A = A.tocsr()
+        if _is_sparse(Aeq):
+            Aeq = Aeq.tocsr()
+
+        self.reinit()
+        self.__matrices = MatrixMIPModel.MATRICES(f, A, b, Aeq, beq,
+                                                  lb, ub, int_list, bin_list)
+        LOGGER.debug("".join(["model built with ", str(self.nb_vars),
+                              " variables and ", str(self.nb_constraints),
+                              " constraints"]))
+
+    @property
+    def nb_vars(self):
+        """get the number of variables, the number of columns of the matrices"""
+        return _get_nb_rows(self.__matrices.f)
+
+    @property
+    def nb_constraints(self):
+        """get the number of constraints, the rows of A and Aeq"""
+        mat = self.__matrices
+        nb_rows = _get_nb_constraints(mat.A, mat.b)
+        if mat.Aeq is not None:
+            nb_rows += _get_nb_constraints(mat.Aeq, mat.beq)
+        return nb_rows
+
+    @property
+    def matrices(self):
+        """get the namedtuple of the matrices the model has been built with"""
+        return self.__matrices
+
+    @property
+    def obj(self):
+        """get objective value"""
+        if self.__obj_value is None:
+            return "not computed"
+        return self.__obj_value
+
+    @property
+    def var_results(self):
+        """
+        get the values of the variables, in the order of the columns,
+        as a numpy array (array.array('d') if numpy is not installed)
+        the variables without value returned by the solver are NaN
+
+        :return: the vector of the values
+        """
+        if self.__solution is not None:
+            self.__decode_solution()
+        if self.__values is None:
+            return "not computed"
+        return self.__values
+
+    def __decode_solution(self):
+        """decode the values of the result of the solver, kept until now"""
+        names, values = decode_variables(self.__solution)
+        self.__solution = None
+        positions = [_var_col(name, self.nb_vars) for name in names]
+        if None in positions:
+            # the names not written by the model are skipped
+            kept = [k for k, col in enumerate(positions) if col is not None]
+            positions = [positions[k] for k in kept]
+            values = array('d', [values[k] for k in kept])
+        values = align_values(values, positions, self.nb_vars)
+        np = _get_numpy()
+        self.__values = np.frombuffer(values) if np is not None else values
+
+    def _process_solution(self, result_obj):
+        """
+        process the results of the solver,
+        the values of the variables are only decoded when they are read
+
+        :param result_obj: the object given as a response
+            from Solveengine after solving the problem
+        :return: s_status: the status of the job of solving
+        """
+        self.__obj_value = str(result_obj.objective_value)
+        s_status = str(result_obj.status)
+        if s_status not in SolverStatusCode.get_values():
+            raise ValueError("solver status unknown:", self.solver_status)
+
+        self.__values = None
+        self.__solution = result_obj
+        return s_status
+
+    def print_results(self):
+        """
+        prints a sum up of the results returned from solve engine
+        """
+        lst_lines = list()
+        lst_lines.append("".join(["Status : ", self.solver_status]))
+        lst_lines.append("".join(["Objective value : ", str(self.obj)]))
+        lst_lines.append("Variables :")
+        values = self.var_results
+        if not isinstance(values, str):
+            lst_lines.extend("".join([_var_name(col), " : ", str(value)])
+                             for col, value in enumerate(values))
+        print("\n".join(lst_lines))
+
+    def _iter_model_lines(self):
+        """
+        yield the lines of the problem written in the lp format,
+        or in the free MPS format if the file name ends with .mps,
+        row by row from the matrices
+        """
+        if self.file_name.endswith(".mps"):
+            return iter_mps_lines(self.__get_mps_problem())
+        return self.__iter_lp_lines()
+
+    def __iter_lp_lines(self):
+        """yield the lines of the problem written in the lp format"""
+        mat = self.__matrices
+        format_number = self._format_number
+        yield str(Direction.MINIMIZE.value)
+        cols, coeffs = _get_nonzero_cells(mat.f)
+        yield _lpstr_terms(map(_var_name, cols), coeffs, format_number) if cols else "0"
+
+        yield "Subject To"
+        for line in _iter_lp_constraints(mat.A, mat.b, Operator.LEQ,
+                                         MIPModel.DEFAULT_INEQ_NAME, format_number):
+            yield line
+        if mat.Aeq is not None:
+            for line in _iter_lp_constraints(mat.Aeq, mat.beq, Operator.EEQ,
+                                             MIPModel.DEFAULT_EQ_NAME, format_number):
+                yield line
+
+        if self._compact_lp:
+            names, lbs, ubs, integers = self.__get_columns()
+            for line in _iter_compact_bounds(names, lbs, ubs, integers, format_number):
+                yield line
+            yield "End"
+            return
+        yield "Bounds"
+        lst_integers = list()
+        for col in range(self.nb_vars):
+            if mat.bin_list[col]:
+                lb, ub = 0, 1
+            else:
+                lb, ub = mat.lb[col], mat.ub[col]
+            if mat.bin_list[col] or mat.int_list[col]:
+                lst_integers.append(col)
+            yield "{} <= {} <= {}".format(format_number(lb), _var_name(col),
+                                          format_number(ub))
+
+        yield "General"
+        for col in lst_integers:
+            yield _var_name(col)
+        yield "End"
+
+    def write_lp(self, path):
+        """
+        write the problem in the lp format into a file,
+        chunk by chunk, without building the whole str value
+
+        :param path: string value of the path of the file
+        """
+        check_instance(fct_name="write_lp", value=path,
+                       name="path", type_=str)
+        # the lp format, whatever the file ending of the model
+        with open(path, 'wb') as f:
+            for chunk in iter_chunks(self.__iter_lp_lines()):
+                f.write(chunk)
+
+    def write_mps(self, path, fixed=False):
+        """
+        write the problem in the MPS format into a file, line by line
+
+        :param path: string value of the path of the file
+        :param fixed: boolean, True for the fixed MPS format,
+            False for the free MPS format
+        """
+        check_instance(fct_name="write_mps", value=path,
+                       name="path", type_=str)
+        check_instance(fct_name="write_mps", value=fixed,
+                       name="fixed", type_=bool)
+        lines = iter_mps_lines(self.__get_mps_problem(), fixed=fixed)
+        with open(path, 'wb') as f:
+            for chunk in iter_chunks(lines):
+                f.write(chunk)
+
+    def __get_mps_problem(self):
+        """
+        return the MPS_PROBLEM namedtuple describing the model,
+        its rows being generators reading the non zero cells of the
+        matrices row by row, and its columns _ColumnView instances
+        """
+        mat = self.__matrices
+        obj = array('d', [0]) * self.nb_vars
+        cols, coeffs = _get_nonzero_cells(mat.f)
+        for col, coeff in zip(cols, coeffs):
+            obj[col] = coeff
+        names, lbs, ubs, integers = self.__get_columns()
+
+        matrices = [(A, _get_nb_constraints(A, b), b, operator, default_name)
+                    for A, b, operator, default_name in [(mat.A, mat.b, Operator.LEQ,
+                                                          MIPModel.DEFAULT_INEQ_NAME),
+                                                         (mat.Aeq, mat.beq, Operator.EEQ,
+                                                          MIPModel.DEFAULT_EQ_NAME)]
+                    if A is not None]
+        row_names = _RowNames([(nb_rows, default_name)
+                               for _, nb_rows, _, _, default_name in matrices])
+        senses = chain.from_iterable(repeat(operator, nb_rows)
+                                     for _, nb_rows, _, operator, _ in matrices)
+        rhs = chain.from_iterable((b[row] for row in range(nb_rows))
+                                  for _, nb_rows, b, _, _ in matrices)
+        rows = chain.from_iterable(islice(_iter_rows_nonzero_cells(A), nb_rows)
+                                   for A, nb_rows, _, _, _ in matrices)
+        return MPS_PROBLEM(splitext(self.file_name)[0], False, 0, obj, names,
+                           lbs, ubs, integers, row_names, senses, rhs, rows)
+
+    def __get_columns(self):
+        """
+        return the names, lower bounds, upper bounds and integer flags
+        of the columns, as _ColumnView instances reading the matrices,
+        the binary columns being between 0 and 1
+        """
+        mat = self.__matrices
+
+        def lower_bound(col):
+            return 0. if mat.bin_list[col] else _bound_to_float(mat.lb[col])
+
+        def upper_bound(col):
+            return 1. if mat.bin_list[col] else _bound_to_float(mat.ub[col])
+
+        def is_integer(col):
+            return bool(mat.bin_list[col] or mat.int_list[col])
+
+        return tuple(_ColumnView(self.nb_vars, get)
+                     for get in [_var_name, lower_bound, upper_bound, is_integer])
+
+
+class _ColumnView(object):
+    """
+    read-only sequence of a property of the columns of the matrices,
+    computed each time it is read instead of being stored for each column
+    """
+    __slots__ = ('size', 'get')
+
+    def __init__(self, size, get):
+        self.size = size
+        self.get = get
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        return self.get(index)
+
+
+class _RowNames(object):
+    """
+    read-only sequence of the names of the rows of the matrices,
+    <default name><row> for each matrix, built each time they are read
+    """
+    __slots__ = ('blocks', 'size')
+
+    def __init__(self, blocks):
+        """:param blocks: list of tuples (number of rows, default name), one per matrix"""
+        self.blocks = blocks
+        self.size = sum(nb_rows for nb_rows, _ in blocks)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if index >= 0:
+            for nb_rows, default_name in self.blocks:
+                if index < nb_rows:
+                    return "".join([default_name, str(index)])
+                index -= nb_rows
+        raise IndexError(index)
+
+
+def _var_name(col):
+    """return the name of the variable of the column col"""
+    return "".join([MIPModel.DEFAULT_VAR_NAME, str(col)])
+
+
+def _var_col(name, nb_vars):
+    """return the column of the variable named name, None if it is not one of the model"""
+    prefix = MIPModel.DEFAULT_VAR_NAME
+    if not name.startswith(prefix) or not name[len(prefix):].isdecimal():
+        return None
+    col = int(name[len(prefix):])
+    return col if col < nb_vars else None
+
+
+def _get_nonzero_cells(row):
+    """
+    return the columns and the values of the non zero cells of a row
+
+    :param row: a list-like instance, a numpy array
+            or a scipy sparse row with its cells sorted
+    :return: tuple of 2 lists, (columns, values)
+    """
+    if _is_sparse(row):
+        row = row.tocsr()
+        cols, coeffs = row.indices.tolist(), row.data.tolist()
+    elif hasattr(row, 'dtype'):
+        cols = row.nonzero()[0]
+        return cols.tolist(), row[cols].tolist()
+    else:
+        coeffs = [row[col] for col in range(len(row))]
+        cols = range(len(coeffs))
+    nonzero = [(col, coeff) for col, coeff in zip(cols, coeffs) if coeff != 0]
+    return [col for col, _ in nonzero], [coeff for _, coeff in nonzero]
+
+
+def _get_nb_constraints(mat, rhs):
+    """
+    return the number of constraints mat * x (operator) rhs, the rows of the matrix
+    with a right hand side, as in MIPModel.build_with_matrices:
+    the validation accepts a matrix [[]] for an empty rhs
+    """
+    return min(_get_nb_rows(mat), _get_nb_rows(rhs))
+
+
+def _iter_rows_nonzero_cells(mat):
+    """
+    yield, for each row of the matrix, the columns
+    and the values of its non zero cells
+
+    :param mat: a matrix-like instance, a numpy array or a scipy csr matrix
+    """
+    if _is_sparse(mat):
+        indptr, indices, data = mat.indptr, mat.indices, mat.data
+        for row in range(mat.shape[0]):
+            start, end = indptr[row], indptr[row + 1]
+            cols = indices[start:end].tolist()
+            coeffs = data[start:end].tolist()
+            nonzero = [(col, coeff) for col, coeff in zip(cols, coeffs) if coeff != 0]
+            yield [col for col, _ in nonzero], [coeff for _, coeff in nonzero]
+    else:
+        for row in range(_get_nb_rows(mat)):
+            yield _get_nonzero_cells(mat[row])
+
+
+def _iter_lp_constraints(mat, rhs, operator, default_name, format_number):
+    """
+    yield the lp lines of the constraints mat * x (operator) rhs
+
+    a row without any non zero cell is written 0 x0 (operator) rhs
+
+    :param mat: a matrix-like instance, a numpy array or a scipy csr matrix
+    :param rhs: a list-like instance, the right hand sides
+    :param operator: Operator of the constraints
+    :param default_name: prefix of the names of the constraints
+    :param format_number: the function returning the str value of the numbers
+    """
+    rows = islice(_iter_rows_nonzero_cells(mat), _get_nb_constraints(mat, rhs))
+    for row, (cols, coeffs) in enumerate(rows):
+        if cols:
+            lhs = _lpstr_terms(map(_var_name, cols), coeffs, format_number)
+        else:
+            lhs = " ".join(["0", _var_name(0)])
+        yield "{}{}: {} {} {}".format(default_name, row, lhs, operator,
+                                      format_number(rhs[row]))
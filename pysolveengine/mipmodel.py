@@ -6,11 +6,30 @@ models via the Solve-Engine.
 
 """
 
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from enum import Enum
 from collections import namedtuple
-
-from .helper import StrEnum, _get_logger, check_instance, check_name
+from collections.abc import MutableMapping
+from functools import partial
+from itertools import chain, count, islice, product
+from math import isnan
+from numbers import Integral
+from os.path import isfile, splitext
+
+import grpc
+import requests
+
+from .helper import (StrEnum, _get_logger, _get_numpy, _get_scipy_sparse, check_instance, check_name,
+                     iter_chunks, decode_variables, align_values)
 from .basemodel import BaseModel, SolverStatusCode
+from .config import SEStatusCode
+from .constraintstore import _ConstraintStore
+from .lpformat import read_lp
+from .mpsformat import MPS_PROBLEM, iter_mps_lines, read_mps
+from .presolve import presolve as presolve_problem, propagate_bounds, MAX_PASSES
+from .snapshot import (read_snapshot, write_snapshot, close_mapping, copy_section,
+                       join_names, split_names)
 
 LOGGER = _get_logger()
 
@@ -34,6 +53,12 @@ class Infinity:
     def __repr__(self):
         return "INF"
 
+    def __eq__(self, other):
+        return isinstance(other, Infinity) or other == float('inf')
+
+    def __hash__(self):
+        return hash(float('inf'))
+
 
 class NegInfinity:
     """
@@ -54,7 +79,15 @@ class NegInfinity:
     def __repr__(self):
         return "-INF"
 
+    def __eq__(self, other):
+        return isinstance(other, NegInfinity) or other == float('-inf')
+
+    def __hash__(self):
+        return hash(float('-inf'))
+
 INF = Infinity()
+NAN = float('nan')
+_TABLE_IDS = count()
 
 
 class VarType(Enum):
@@ -70,6 +103,10 @@ class Operator(StrEnum):
     GEQ = ">="
 
 
+# the senses of the constraints, by their code in the snapshots
+_SENSES = (Operator.LEQ, Operator.EEQ, Operator.GEQ)
+
+
 class Direction(StrEnum):
     """Optimization Directions"""
     MAXIMIZE = "Maximize"
@@ -91,7 +128,8 @@ class MIPModel(BaseModel):
     this is necessary to connect to the solver
 
     model_name: the name that the uploaded file should have,
-    without extension, default is model
+    without extension, default is model, the problem is written in the
+    lp format unless the name ends with .mps
 
     sleep_time: the time we should sleep between checks if the SolveEngine
     is finished solving the problem
@@ -102,22 +140,50 @@ class MIPModel(BaseModel):
 
     http_mode(boolean): active http requests instead of grpc
 
-    __variables : dictionary of problem variables, var_name : var_instance
-    __lst_variables : list of variables, to keep the order
-                    of the vars they have been added with
-    __constraints : list of constraints
+    compression: None (default), gzip or zstd, to compress the problem
+    while sending it, zstd needs http_mode and the zstandard package
+
+    compact_lp(boolean): write the lp file without the default bounds,
+    see _iter_compact_bounds
+
+    precision: None (default) to write the numbers with the shortest
+    str value reading back the same float, or the number of significant
+    digits of the numbers written in the lp file
+
+    __vars : _VarTable, columnar storage of the variables,
+            in the order they have been added with
+    __constraints : _ConstraintStore of _ConstraintRecord, the constraints normalised
+            when they are added, without the expressions they come from
     __obj : objective function defined with namedtuple,
             attributes : expression, direction (min/max),
             and the value updated when solved
+    __obj_cache : tuple (state of the objective expression, its lp string)
+    __obj_terms : None, or the objective expression owned by the model,
+            the objective being copied by the first call to set_obj_coeff
+    __presolved : PRESOLVED namedtuple of the problem sent while solving
+            with the presolve, None otherwise
+    __presolve_stats : PRESOLVE_STATS namedtuple of the last presolve
+    __row_index : _RowIndex of the constraints added, None unless
+            the detection of the duplicate constraints is enabled
+
+    The lp strings of the objective, of each constraint and of
+    the bounds of each variable are cached, so that building the
+    problem file again only computes the lines which have been modified.
     """
     OBJECTIVE = namedtuple('Objective', 'expr direction value')
+    DEDUP_STATS = namedtuple('DedupStats', 'duplicate_rows parallel_rows bytes_saved')
+    SCENARIO_RESULT = namedtuple('ScenarioResult', 'index status objective values job_id error')
+    SCENARIO_KEYS = ("rhs", "bounds", "obj")
+    MATRICES = namedtuple('ModelMatrices', 'f A b Aeq beq lb ub integers '
+                                           'obj_constant maximize ineq_rows eq_rows')
     DEFAULT_VAR_NAME = "x"
     DEFAULT_EQ_NAME = "cEq"
     DEFAULT_INEQ_NAME = "cIneq"
 
     def __init__(self, token, model_name="model", sleep_time=2,
                  debug=False,
-                 interactive_mode=False, http_mode=False):
+                 interactive_mode=False, http_mode=False, compression=None,
+                 compact_lp=False, precision=None):
         """
         initialise the model
 
@@ -128,33 +194,46 @@ class MIPModel(BaseModel):
             debug : to initiate, or not, Logger()
             interactive_mode : to print the advances of the solving while solving
             http_mode : use http requests if True, GRPC if False
+            compression : None, gzip or zstd to compress the problem sent
+            compact_lp : write the lp file without the default bounds
+            precision : None, or the number of significant digits of the numbers
         """
         check_instance(fct_name='init MIPModel', value=model_name,
                        name='model_name', type_=str)
-        if not model_name.endswith(".lp"):
-            file_name = "".join([model_name, ".lp"])
-        else:
-            file_name = model_name
+        self._compact_lp = compact_lp
+        self._format_number = _get_lp_number_format('init MIPModel', compact_lp, precision)
+        file_name, file_ending = _get_file_name(model_name)
         super(MIPModel, self).__init__(token=token,
                                        file_name=file_name,
                                        sleep_time=sleep_time,
                                        debug=debug,
+                                       file_ending=file_ending,
                                        interactive_mode=interactive_mode,
-                                       http_mode=http_mode)
-        self.__variables = dict()
-        self.__lst_variables = list()
-        self.__constraints = []
+                                       http_mode=http_mode,
+                                       compression=compression)
+        self.__vars = _VarTable(self._format_number)
+        self.__constraints = _ConstraintStore()
         self.__obj = MIPModel.OBJECTIVE(Expr(), Direction.MINIMIZE, None)
+        self.__obj_cache = (None, None)
+        self.__obj_terms = None
+        self.__presolved = None
+        self.__presolve_stats = None
+        self.__row_index = None
 
     def reinit(self):
         """
         Reinitialise the model characteristics that are not init parameters
         :return: Nothing
         """
-        self.__variables = dict()
-        self.__lst_variables = list()
-        self.__constraints = []
+        self.__vars = _VarTable(self._format_number)
+        self.__constraints = _ConstraintStore()
         self.__obj = MIPModel.OBJECTIVE(Expr(), Direction.MINIMIZE, None)
+        self.__obj_cache = (None, None)
+        self.__obj_terms = None
+        self.__presolved = None
+        self.__presolve_stats = None
+        if self.__row_index is not None:
+            self.__row_index = _RowIndex()
         super(MIPModel, self).reinit()
 
     def __add_var(self, name, lb=-INF, ub=INF, var_type=VarType.CONTINUOUS):
@@ -162,14 +241,19 @@ class MIPModel(BaseModel):
         check_instance(fct_name='add_var', value=name,
                        name='name', type_=str)
         check_name(name=name, obj_type="variable")
+        check_instance(fct_name='add_var', value=lb,
+                       name='lb', type_=(float, int, Infinity,
+                                         NegInfinity))
+        check_instance(fct_name='add_var', value=ub,
+                       name='ub', type_=(float, int, Infinity,
+                                         NegInfinity))
+        check_instance(fct_name='add_var', value=var_type,
+                       name='var_type', type_=VarType)
 
-        if name in self.__variables:
+        if name in self.__vars.indices:
             raise ValueError("".join(["Variable ", name,
                                       " does exists already"]))
-        var = Var(name, lb, ub, var_type)
-        self.__variables[name] = var
-        self.__lst_variables.append(var)
-        return var
+        return Var(self.__vars, self.__vars.add(name, lb, ub, var_type))
 
     def add_continuous_var(self, name, lb=-INF, ub=INF):
         """
@@ -235,17 +319,78 @@ class MIPModel(BaseModel):
         """
         return self.add_integer_var(name=name, lb=0, ub=1)
 
+    def add_vars(self, name, index_sets, lb=-INF, ub=INF, vtype=VarType.CONTINUOUS):
+        """
+        add a family of variables, one per element of the cartesian
+        product of the index sets, in one call
+
+        The variable of the indices (j, m, t) is named name_j_m_t,
+        the names are only built when the model is written or when
+        one of them is read.
+
+        x = model.add_vars("x", [jobs, machines, 24], lb=0, vtype=VarType.INTEGER)
+        x[job, machine, 3] is the variable x_<job>_<machine>_3
+
+        Args:
+        name: the name of the family
+
+        index_sets: list of the index sets, each one being a list of
+        index values or an int n for the values 0 to n - 1,
+        a single int n is the same as [n]
+
+        lb, ub: the bounds of the variables, a number for all of them,
+        or a vector (list or numpy array, flattened if it has several
+        dimensions) of one bound per variable, the last index changing first
+
+        vtype: the VarType of the variables
+
+        Returns:
+        the VarFamily of the variables, indexable by the index values
+
+        Raises:
+        ValueError: if an index set has duplicate values or values containing ':',
+        if a vector of bounds has not one value per variable,
+        if the name of the family is already used by another family,
+        or if one of the names of the variables is already used
+        """
+        check_instance(fct_name='add_vars', value=name,
+                       name='name', type_=str)
+        check_name(name=name, obj_type="variable")
+        check_instance(fct_name='add_vars', value=vtype,
+                       name='vtype', type_=VarType)
+        index_sets = _get_index_sets(name, index_sets)
+        nb_vars = 1
+        for values in index_sets:
+            nb_vars *= len(values)
+        lbs = _get_bounds_array(lb, nb_vars, "lb")
+        ubs = _get_bounds_array(ub, nb_vars, "ub")
+        start = self.__vars.add_family(name, index_sets, lbs, ubs, vtype)
+        return VarFamily(self.__vars, start, name, index_sets)
+
     def add_constraint(self, constr, name=None):
         """add Constraint
 
         Adds a constraint to the model
 
+        The constraint is normalised once, all the variables on the left
+        and the constant on the right, and stored in a compact form:
+        modifying its expressions afterwards does not change the model.
+
         Args:
         constr: the constraint
-        name (optional): a name for the constraint
+        name (optional): a name for the constraint, it can be the name
+        of other constraints: the functions taking a name (set_rhs,
+        remove_constraint...) use the last constraint added of this name
+        not removed
+
+        Returns:
+        the index of the constraint, which never changes (see
+        remove_constraint), None if it has been merged into another
+        one (see enable_dedup)
 
         Raises:
-        ValueError: is constr is not of type Constraint
+        ValueError: is constr is not of type Constraint,
+        if it has no variable or a variable of another model
         """
         check_instance(fct_name="add_constraint", value=constr,
                        name='constr', type_=Constraint)
@@ -254,8 +399,116 @@ class MIPModel(BaseModel):
                            name='name', type_=str)
             check_name(name=name, obj_type="constraint")
 
-        constr.name = name or constr.name
-        self.__constraints.append(constr)
+        expr = constr._normalised()
+        for var in expr._vars:
+            if var._table is not self.__vars:
+                raise ValueError("".join(["The variable ", var.name,
+                                          " does not belong to this model"]))
+        indices = array('l', [var._index for var in expr._vars])
+        record = _ConstraintRecord(name or constr.name, indices, array('d', expr._coefs),
+                                   constr.operator, -expr.constant)
+        return self.__append_record(record)
+
+    def __append_record(self, record):
+        """
+        append a constraint record to the constraints of the model,
+        unless it is merged into another one by the row index
+
+        :return: the index of the constraint, None if it has been merged
+        """
+        handle = self.__constraints.append(record, record.name)
+        if self.__row_index is None:
+            return handle
+        try:
+            kept = self.__index_row(record, handle)
+        except Exception:
+            self.__constraints.remove(handle, record.name)
+            raise
+        if kept:
+            return handle
+        self.__constraints.remove(handle, record.name)
+        return None
+
+    def enable_dedup(self):
+        """
+        detect the duplicate and parallel constraints when they are added
+
+        The nonzero terms of each constraint added are sorted and divided by the
+        first coefficient, and the rows obtained are hashed. A constraint
+        equal to another one, or to a multiple of it, is not added:
+        the right hand side of the constraint already added is set to the
+        tightest of both. The constraints already in the model are indexed
+        (and merged) as well.
+        The constraints merged are not in the model. They are kept by the
+        index: when the constraint they have been merged into is removed,
+        they are added again to the model, at the end of the constraints
+        (with new indices), and merged again between them.
+        The named ones can still be given by their name to set_rhs and
+        remove_constraint, and get_constraint_index returns the index of the
+        constraint they have been merged into. Setting the right hand side of
+        one of these constraints derives the tightest one again: the
+        constraints merged are merged again, or added again if they are not
+        implied anymore.
+        """
+        if self.__row_index is not None:
+            return
+        self.__row_index = _RowIndex()
+        for handle, _ in list(self.__constraints.iter_handles()):
+            # the records indexed are the ones kept by the model
+            record = self.__constraints.get(handle)
+            if not self.__index_row(record, handle):
+                self.__constraints.remove(handle, record.name)
+
+    def __index_row(self, record, handle):
+        """
+        add a constraint record to the row index
+
+        :param handle: the handle of the record in the constraints
+        :return: False if the record has been merged into another one,
+                and must not be added to the model
+        """
+        if self.__row_index.add(record, handle):
+            return True
+        self.__row_index.bytes_saved += len(self.__lpstr_constraint(record)) + 1
+        return False
+
+    def __release_merged(self, kept):
+        """
+        release the records merged into a record kept by the row index,
+        which gets its own right hand side back
+
+        :return: the list of the records released, to be added again
+        """
+        records = self.__row_index.release(kept)
+        for record in records:
+            self.__row_index.bytes_saved -= len(self.__lpstr_constraint(record)) + 1
+        return records
+
+    def __get_merged(self, constraint):
+        """
+        get the record merged by the row index of a constraint given by its name,
+        None if it is an index, a name of a constraint of the model or not merged
+        """
+        if self.__row_index is None or not isinstance(constraint, str):
+            return None
+        try:
+            self.__constraints.get_handle(constraint)
+        except KeyError:
+            return self.__row_index.find(constraint)
+        return None
+
+    @property
+    def dedup_stats(self):
+        """
+        get the DEDUP_STATS namedtuple of the constraints not added,
+        the numbers of duplicate and parallel constraints merged and of
+        bytes saved in the lp file, None unless enable_dedup has been called
+        """
+        index = self.__row_index
+        if index is None:
+            return None
+        return MIPModel.DEDUP_STATS(index.duplicate_rows, index.parallel_rows,
+                                    index.bytes_saved)
 
     def set_obj(self, expr):
         """
@@ -281,6 +534,145 @@ class MIPModel(BaseModel):
     def set_to_maximize(self):
         """maximize the objective"""
         self.set_direction(Direction.MAXIMIZE)
+
+    def set_obj_coeff(self, var, coeff):
+        """
+        set the coefficient of a variable in the objective, in place
+
+        The first call copies the objective expression, modifying the
+        expression given to set_obj afterwards does not change the model.
+        Only the lp line of the objective is written again.
+
+        :param var: the variable, of this model
+        :param coeff: the new coefficient, a number
+        """
+        self.__check_var(var, "set_obj_coeff")
+        check_instance(fct_name="set_obj_coeff", value=coeff,
+                       name="coeff", type_=(float, int))
+        self.__get_obj_terms().add_term(var, coeff)
+
+    def __get_obj_terms(self):
+        """
+        get the objective expression owned by the model, merged,
+        the objective is copied if it has been set since the last call
+        """
+        expr = self.__obj.expr
+        if self.__obj_terms is None or self.__obj_terms is not expr:
+            if isinstance(expr, Expr):
+                expr._merge()
+                terms = Expr(expr.constant)
+                terms._vars = expr._vars[:expr._size]
+                terms._coefs = expr._coefs[:expr._size]
+                terms._size = expr._size
+            else:
+                terms = Expr(float(str(expr)))
+            self.__obj = self.__obj._replace(expr=terms)
+            self.__obj_terms = terms
+        return self.__obj_terms
+
+    def set_rhs(self, constraint, rhs):
+        """
+        set the right hand side of a constraint, in place,
+        only the lp line of this constraint is written again
+
+        :param constraint: the index of the constraint (see print_constraints),
+            or its name
+        :param rhs: the new right hand side, a number
+        """
+        merged = self.__get_merged(constraint)
+        record = self.__get_record(constraint, "set_rhs") if merged is None else merged
+        check_instance(fct_name="set_rhs", value=rhs,
+                       name="rhs", type_=(float, int))
+        index = self.__row_index
+        if merged is not None:
+            kept = self.__constraints.get(index.merged_into[merged])
+        elif index is not None and record in index.merged:
+            kept = record
+        else:
+            kept = None
+        released = [] if kept is None else self.__release_merged(kept)
+        record.rhs = float(rhs)
+        record.lp_line = None
+        # the tightest right hand side of the rows merged is derived again
+        for other in released:
+            self.__append_record(other)
+
+    def set_bounds(self, var, lb=None, ub=None):
+        """
+        set the bounds of a variable, in place,
+        only the lp line of its bounds is written again
+
+        :param var: the variable, of this model
+        :param lb, ub: the new bounds, None to keep the current one
+        """
+        self.__check_var(var, "set_bounds")
+        for value, name in ((lb, "lb"), (ub, "ub")):
+            if value is not None:
+                check_instance(fct_name="set_bounds", value=value, name=name,
+                               type_=(float, int, Infinity, NegInfinity))
+        if lb is not None:
+            self.__vars.set_lb(var._index, lb)
+        if ub is not None:
+            self.__vars.set_ub(var._index, ub)
+
+    def __check_var(self, var, fct_name):
+        """
+        Raises:
+        ValueError: if var is not a variable of this model
+        """
+        check_instance(fct_name=fct_name, value=var, name="var", type_=Var)
+        if var._table is not self.__vars:
+            raise ValueError("".join(["The variable ", var.name,
+                                      " does not belong to this model"]))
+
+    def __get_record(self, constraint, fct_name):
+        """
+        get the record of a constraint given by its index or its name
+
+        Raises:
+        ValueError: if there is no such constraint
+        """
+        return self.__constraints.get(self.__get_handle(constraint, fct_name))
+
+    def __get_handle(self, constraint, fct_name):
+        """
+        get the index of a constraint given by its index or its name,
+        in O(1), a negative index -k being the one of the k-th last constraint
+
+        Raises:
+        ValueError: if there is no such constraint
+        """
+        check_instance(fct_name=fct_name, value=constraint,
+                       name="constraint", type_=(int, str))
+        try:
+            return self.__constraints.get_handle(constraint)
+        except KeyError:
+            if isinstance(constraint, str):
+                raise ValueError("".join(["Could not ", fct_name,
+                                          ", there is no constraint named ", constraint]))
+            raise ValueError("".join(["The index specified, ", str(constraint),
+                                      ", is out of range or removed. There are ",
+                                      str(len(self.__constraints)),
+                                      " constraints."]))
+
+    def get_constraint_index(self, name):
+        """
+        get the index of a constraint by its name, in O(1),
+        the last one added of this name if several constraints have it
+
+        :param name: the name of the constraint
+        :return: its index, see remove_constraint, the index of the constraint
+            it has been merged into if it has been merged (see enable_dedup)
+
+        Raises:
+        ValueError: if there is no constraint of this name
+        """
+        check_instance(fct_name="get_constraint_index", value=name,
+                       name="name", type_=str)
+        merged = self.__get_merged(name)
+        if merged is not None:
+            return self.__row_index.merged_into[merged]
+        return self.__get_handle(name, "get_constraint_index")
     
     def build_with_matrices(self, f, A, b, 
                             Aeq=None, beq=None,
@@ -293,6 +685,9 @@ class MIPModel(BaseModel):
             f, b, beq, lb, ub : lists of real numbers
             A, Aeq: matrices of real numbers
             int_list, bin_list: lists of binary numbers
+
+            numpy arrays and scipy sparse matrices (for A, Aeq)
+            are accepted as well and checked in a vectorised way
             
             such that it matches with this model
             
@@ -311,7 +706,8 @@ class MIPModel(BaseModel):
         int_list = list() if int_list is None else int_list
         bin_list = list() if bin_list is None else bin_list
 
-        _check_matrices(f, A, b, Aeq, beq, lb, ub, int_list, bin_list)
+        lb, ub, int_list, bin_list = _check_matrices(f, A, b, Aeq, beq, lb, ub,
+                                                     int_list, bin_list)
 
         self.reinit()
         self.__build_variables_matrices(len(f), lb, ub, int_list, bin_list)
@@ -331,7 +727,7 @@ class MIPModel(BaseModel):
         :param int_list, bin_list: a list-like, uni-dimensional
                 instance made of binaries
 
-        :updates: model.__variables
+        :updates: model.__vars
         """
         lst_tuples = _build_name_index_tuples(self.DEFAULT_VAR_NAME, nb_vars)
         for index, var_name in lst_tuples:
@@ -348,7 +744,7 @@ class MIPModel(BaseModel):
 
         :param f: a list-like, uni-dimensional instance made of doubles
         """
-        expr = _build_expr_coeff_vars(f, self.__lst_variables)
+        expr = dot(f, self.__get_lst_variables())
         self.set_obj(expr)
         self.set_to_minimize()
 
@@ -373,12 +769,15 @@ class MIPModel(BaseModel):
         """
         lst_tuples = _build_name_index_tuples(self.DEFAULT_EQ_NAME if boo_equ
                                               else self.DEFAULT_INEQ_NAME, len(b))
-        for index, cstr_name in lst_tuples:
-            expr = _build_expr_coeff_vars(A[index], self.__lst_variables)
-            if boo_equ:
-                self.add_constraint(expr == b[index], cstr_name)
-            else:
-                self.add_constraint(expr <= b[index], cstr_name)
+        operator = Operator.EEQ if boo_equ else Operator.LEQ
+        iter_rows = _iter_rows_coeffs_vars(A, range(len(self.__vars)))
+        for (index, cstr_name), (coeffs, cols) in zip(lst_tuples, iter_rows):
+            nonzero = [(col, coeff) for col, coeff in zip(cols, coeffs) if coeff != 0]
+            self.__append_record(
+                _ConstraintRecord(cstr_name,
+                                  array('l', [col for col, _ in nonzero]),
+                                  array('d', [coeff for _, coeff in nonzero]),
+                                  operator, b[index]))
 
     def get_variable(self, name):
         """
@@ -390,27 +789,57 @@ class MIPModel(BaseModel):
         """
         check_instance(fct_name='get_variable_with_name', value=name,
                        name='name', type_=str)
-        return self.__variables[name]
+        return Var(self.__vars, self.__vars.indices[name])
+
+    def __get_lst_variables(self):
+        """return the list of all the variables, in the order of their index"""
+        return [Var(self.__vars, index) for index in range(len(self.__vars))]
 
     def remove_constraint_with_index(self, index):
-        """remove one constraint with the index"""
+        """remove one constraint with the index, see remove_constraint"""
         check_instance(fct_name="remove_constraint_with_index",
                        value=index, name='index', type_=int)
-        try:
-            self.__constraints.pop(index)
-        except:
-            raise ValueError("".join(["The index specified, ", str(index),
-                                      ", is out of range. There are ",
-                                      str(len(self.__constraints)),
-                                      " constraints."]))
+        self.remove_constraint(index)
+
+    def remove_constraint(self, constraint):
+        """
+        remove one constraint, given by its index or its name, in O(1)
+
+        The index of a constraint is the number of constraints added
+        before it, returned by add_constraint and shown by print_constraints.
+        It never changes: removing a constraint does not shift the index
+        of the following ones. A negative index -k is the one of
+        the k-th last constraint.
+
+        :param constraint: the index or the name of the constraint
+
+        Raises:
+        ValueError: if there is no such constraint
+        """
+        merged = self.__get_merged(constraint)
+        if merged is not None:
+            # the tightest right hand side of the others is derived again
+            kept = self.__constraints.get(self.__row_index.merged_into[merged])
+            for other in self.__release_merged(kept):
+                if other is not merged:
+                    self.__append_record(other)
+            return
+        handle = self.__get_handle(constraint, "remove_constraint")
+        record = self.__constraints.get(handle)
+        self.__constraints.remove(handle, record.name)
+        if self.__row_index is not None:
+            # the constraints merged into it are added again, with new indices
+            self.__row_index.remove(record)
+            for other in self.__release_merged(record):
+                self.__append_record(other)
 
     def print_constraints(self):
         """
         prints the constraints with the index to remove them in case
         """
-        rg = range(0, len(self.__constraints))
-        str_cstrs = list(map(str, self.__constraints))
-        print("\n".join(map(str, zip(rg, str_cstrs))))
+        lines = ((handle, self.__lpstr_constraint(record))
+                 for handle, record in self.__constraints.iter_handles())
+        print("\n".join(map(str, lines)))
 
     @property
     def obj(self):
@@ -431,14 +860,251 @@ class MIPModel(BaseModel):
 
         :return: the dictionary of variables
         """
-        def make_tuple(var): return tuple([var.name, var.value])
+        return dict(zip(self.__vars.names, map(_value_or_msg, self.__vars.values)))
+
+    @property
+    def var_results_array(self):
+        """
+        get the values of the variables, in the order they have been added,
+        as a numpy array (array.array('d') if numpy is not installed)
+        the variables without value returned by the solver are NaN
+
+        :return: a new vector of the values
+        """
+        np = _get_numpy()
+        if np is not None:
+            return np.array(self.__vars.values)
+        return array('d', self.__vars.values)
+
+    def solve(self, presolve=False):
+        """
+        solve the model, see BaseModel.solve
+
+        With the presolve, the problem is reduced before being sent:
+        the fixed variables are replaced by their value, the constraints
+        with one variable become bounds, the empty, redundant and duplicate
+        constraints are removed, and so are the zero coefficients.
+        The model itself is not modified, and the results (var_results, obj)
+        are given for all its variables.
+
+        Args:
+        presolve: boolean, True to reduce the problem before sending it
+
+        Raises:
+        ValueError: if the presolve finds the problem infeasible
+        """
+        check_instance(fct_name="solve", value=presolve,
+                       name="presolve", type_=bool)
+        if presolve:
+            self.__presolved = presolve_problem(self.__get_mps_problem())
+            self.__presolve_stats = self.__presolved.stats
+            LOGGER.debug("presolve: {}".format(self.__presolve_stats))
+        try:
+            super(MIPModel, self).solve()
+        finally:
+            self.__presolved = None
+
+    @property
+    def presolve_stats(self):
+        """
+        get the PRESOLVE_STATS namedtuple of the last solve with the presolve,
+        the numbers of variables, constraints and coefficients removed,
+        None if the presolve has never been used
+        """
+        return self.__presolve_stats
+
+    def tighten_bounds(self, max_passes=MAX_PASSES):
+        """
+        tighten the bounds of the variables implied by the constraints
+
+        The minimal and maximal values of each constraint, given the bounds
+        of its variables, bound each of its variables: for x + y <= 4 with
+        y >= 1, x <= 3. The constraints of the variables tightened are
+        propagated again, pass after pass. The bounds of the integer
+        variables are rounded, a variable is fixed if its bounds become equal.
+
+        Args:
+        max_passes: the maximal number of passes over the constraints
+
+        Returns:
+        PROPAGATION_STATS namedtuple, the numbers of bounds tightened,
+        of variables fixed and of passes done
+
+        Raises:
+        ValueError: if the problem is found infeasible, no bound is modified then
+        """
+        check_instance(fct_name="tighten_bounds", value=max_passes,
+                       name="max_passes", type_=int)
+        res = propagate_bounds(self.__get_mps_problem(), max_passes)
+        table = self.__vars
+        for index, (lb, ub) in enumerate(zip(res.lbs, res.ubs)):
+            if lb != table.lbs[index]:
+                table.set_lb(index, lb)
+            if ub != table.ubs[index]:
+                table.set_ub(index, ub)
+        return res.stats
+
+    def solve_scenarios(self, overrides, max_concurrency=4):
+        """
+        solve the model under several scenarios, each one being a job
+        of the Solve Engine, max_concurrency jobs being solved at the same time
+
+        A scenario is a dictionary of the values overriding the ones of
+        the model, with the keys:
+            rhs: dictionary constraint (index or name) : right hand side
+            bounds: dictionary variable : tuple (lb, ub), None keeping a bound
+            obj: dictionary variable : coefficient in the objective
+        The problem of a scenario is written from the cached lines of the
+        model, only the lines of the values overridden are written again.
+        The model itself is not modified.
+
+        Args:
+        overrides: list of the scenarios
+        max_concurrency: the maximal number of jobs solved at the same time
+
+        Returns:
+        list of SCENARIO_RESULT namedtuples, in the order of the scenarios:
+            index: the index of the scenario
+            status: the status returned by the solver, failed if the
+                Solve Engine could not solve it (the error of the client
+                is then recorded, the other scenarios are still solved)
+            objective: the objective value, None if failed or if the
+                solver did not return one (e.g. infeasible scenario)
+            values: vector of the values of the variables, in the order
+                they have been added, NaN if not returned (see var_results_array),
+                None if failed
+            job_id: the id of the job
+            error: the error message if failed, None otherwise
+        """
+        return sorted(self.iter_scenarios(overrides, max_concurrency),
+                      key=lambda result: result.index)
+
+    def iter_scenarios(self, overrides, max_concurrency=4):
+        """
+        solve the model under several scenarios, see solve_scenarios,
+        and yield the SCENARIO_RESULT of each one as soon as it is solved
+
+        The problem of a scenario is only written when a job can be created
+        for it, so that at most max_concurrency problems are held in memory.
+        """
+        check_instance(fct_name="solve_scenarios", value=overrides,
+                       name="overrides", type_=list)
+        check_instance(fct_name="solve_scenarios", value=max_concurrency,
+                       name="max_concurrency", type_=int)
+        if max_concurrency < 1:
+            raise ValueError("Could not solve_scenarios, max_concurrency must be at least 1")
+        for scenario in overrides:
+            check_instance(fct_name="solve_scenarios", value=scenario,
+                           name="scenario", type_=dict)
+            unknown = set(scenario).difference(MIPModel.SCENARIO_KEYS)
+            if unknown:
+                raise ValueError("".join(["Could not solve_scenarios, unknown override ",
+                                          ", ".join(sorted(map(str, unknown))), ", the keys must be ",
+                                          ", ".join(MIPModel.SCENARIO_KEYS)]))
+
+        # the names are built before the jobs read them in their threads
+        indices = self.__vars.indices
+        scenarios = enumerate(overrides)
+        pending = set()
+        executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        try:
+            while True:
+                for index, scenario in islice(scenarios, max_concurrency - len(pending)):
+                    job = _ScenarioJob(self, self.__write_scenario(scenario))
+                    pending.add(executor.submit(self.__solve_scenario, index, job, indices))
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            # the scenarios not started are dropped, the running ones are waited for
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def __write_scenario(self, scenario):
+        """return the list of the chunks of the problem of a scenario"""
+        saved = self.__apply_overrides(scenario)
+        try:
+            return list(self._iter_model_chunks())
+        finally:
+            self.__restore_overrides(*saved)
+
+    def __apply_overrides(self, scenario):
+        """
+        apply the overrides of a scenario to the model
+
+        :return: tuple of what __restore_overrides needs to restore the model,
+            the cached lp lines included
+        """
+        table = self.__vars
+        records, columns = list(), list()
+        obj = (self.__obj, self.__obj_terms, self.__obj_cache)
+        try:
+            for constraint, rhs in scenario.get("rhs", dict()).items():
+                record = self.__get_record(constraint, "solve_scenarios")
+                records.append((record, record.rhs, record.lp_line))
+                self.set_rhs(constraint, rhs)
+            for var, bounds in scenario.get("bounds", dict()).items():
+                self.__check_var(var, "solve_scenarios")
+                index = var._index
+                columns.append((index, table.lbs[index], table.ubs[index],
+                                table.bounds_lines[index]))
+                lb, ub = bounds
+                self.set_bounds(var, lb, ub)
+            # the objective of the model is copied by set_obj_coeff, not modified
+            self.__obj_terms = None
+            for var, coeff in scenario.get("obj", dict()).items():
+                self.set_obj_coeff(var, coeff)
+        except Exception:
+            self.__restore_overrides(records, columns, obj)
+            raise
+        return records, columns, obj
+
+    def __restore_overrides(self, records, columns, obj):
+        """restore the model modified by __apply_overrides"""
+        table = self.__vars
+        for record, rhs, lp_line in reversed(records):
+            record.rhs = rhs
+            record.lp_line = lp_line
+        for index, lb, ub, bounds_line in reversed(columns):
+            table.lbs[index] = lb
+            table.ubs[index] = ub
+            table.bounds_lines[index] = bounds_line
+        self.__obj, self.__obj_terms, self.__obj_cache = obj
+
+    def __solve_scenario(self, index, job, indices):
+        """
+        solve the problem of a scenario with a new client,
+        called in the threads of iter_scenarios
 
-        iter_tuples = map(make_tuple, self.__lst_variables)
-        return dict(iter_tuples)
+        :param index: the index of the scenario
+        :param job: the _ScenarioJob of the scenario
+        :param indices: the dictionary var_name : index of the variables
+        :return: its SCENARIO_RESULT
+        """
+        client = None
+        try:
+            client = self._new_client(job)
+            job_id, _, result = client.manage_solving()
+            names, values = decode_variables(result)
+            positions = list(map(indices.__getitem__, names))
+            values = _as_vector(align_values(values, positions, len(indices)))
+        except (ValueError, KeyError, requests.RequestException, grpc.RpcError) as err:
+            return MIPModel.SCENARIO_RESULT(index, str(SEStatusCode.FAILED), None, None,
+                                            getattr(client, "_id", None), str(err) or repr(err))
+        try:
+            objective = float(result.objective_value)
+        except (TypeError, ValueError):
+            # infeasible or unbounded scenarios have no objective value
+            objective = None
+        return MIPModel.SCENARIO_RESULT(index, str(result.status), objective, values, job_id, None)
 
     def _process_solution(self, result_obj):
         """
-        process the results of the solver
+        process the results of the solver,
+        the values of the variables are only decoded when one of them is read
 
         :param result_obj: the object given as a response
             from Solveengine after solving the problem
@@ -449,8 +1115,10 @@ class MIPModel(BaseModel):
         if s_status not in SolverStatusCode.get_values():
             raise ValueError("solver status unknown:", self.solver_status)
 
-        for var in result_obj.variables:
-            self.__variables[str(var.name)].set_value(var.value)
+        fixed = None
+        if self.__presolved is not None:
+            fixed = (self.__presolved.fixed_cols, self.__presolved.fixed_values)
+        self.__vars.set_solution(result_obj, fixed)
         return s_status
 
     def print_results(self):
@@ -461,29 +1129,340 @@ class MIPModel(BaseModel):
         lst_lines.append("".join(["Status : ", self.solver_status]))
         lst_lines.append("".join(["Objective value : ", str(self.obj)]))
         lst_lines.append("Variables :")
-        lst_lines.extend(list(map(str, self.__lst_variables)))
+        lst_lines.extend(map(str, self.__get_lst_variables()))
         print("\n".join(lst_lines))
 
-    def build_str_model(self):
+    def _iter_model_lines(self):
+        """
+        yield the lines of the problem written in the lp format,
+        or in the free MPS format if the file name ends with .mps,
+        one constraint/variable at a time
         """
-        Builds the str file of the problem, written in the mlip format
-        :return: returns the str value of the text
+        if self.file_name.endswith(".mps"):
+            problem = (self.__presolved.problem if self.__presolved is not None
+                       else self.__get_mps_problem())
+            return iter_mps_lines(problem)
+        return self.__iter_lp_lines()
+
+    def __iter_lp_lines(self):
+        """yield the lines of the problem written in the lp format"""
+        if self.__presolved is not None:
+            for line in _iter_lp_lines(self.__presolved.problem, self._compact_lp,
+                                       self._format_number):
+                yield line
+            return
+        yield str(self.__obj.direction.value)
+        yield self.__lpstr_obj()
+        yield "Subject To"
+        for record in self.__constraints:
+            yield self.__lpstr_constraint(record)
+        if self._compact_lp:
+            integer = VarType.INTEGER.value
+            for line in _iter_compact_bounds(self.__vars.names, self.__vars.lbs,
+                                             self.__vars.ubs,
+                                             (var_type == integer
+                                              for var_type in self.__vars.types),
+                                             self._format_number):
+                yield line
+            yield "End"
+            return
+        yield "Bounds"
+        for index in range(len(self.__vars)):
+            yield self.__vars.lpstr_bounds(index)
+        yield "General"
+        integer = VarType.INTEGER.value
+        for name, var_type in zip(self.__vars.names, self.__vars.types):
+            if var_type == integer:
+                yield name
+        yield "End"
+
+    def __lpstr_constraint(self, record):
         """
+        get the lp string of a constraint record, cached in the record
 
-        list_lines = list()
-        list_lines.append(str(self.__obj.direction.value))
-        list_lines.append(str(self.__obj.expr.lpstr()))
-        list_lines.append("Subject To")
-        list_lines.extend(c.lpstr() for c in self.__constraints)
-        list_lines.append("Bounds")
-        
-        bound_lst = [v.lpstr_bounds() for v in self.__lst_variables]
-        list_lines.extend(b for b in bound_lst if b)
+        a constraint built from a row of zeros is written 0 x (operator) rhs,
+        x being the first variable
+        """
+        if record.lp_line is None:
+            names = self.__vars.names
+            if record.indices:
+                lhs = _lpstr_terms((names[index] for index in record.indices),
+                                   record.coefs, self._format_number)
+            else:
+                lhs = " ".join(["0", names[0]])
+            name_str = "{}: ".format(record.name) if record.name else ""
+            record.lp_line = "{}{} {} {}".format(name_str, lhs, record.sense,
+                                                 self._format_number(record.rhs))
+        return record.lp_line
+
+    def __lpstr_obj(self):
+        """
+        get the lp string of the objective function,
+        cached until the objective expression is modified or replaced
+        """
+        state = _get_state(self.__obj.expr)
+        if self.__obj_cache[0] != state:
+            expr = self.__obj.expr
+            lpstr = (expr.lpstr(self._format_number) if isinstance(expr, Expr)
+                     else str(expr))
+            self.__obj_cache = (state, lpstr)
+        return self.__obj_cache[1]
+
+    def write_lp(self, path):
+        """
+        write the problem in the lp format into a file,
+        chunk by chunk, without building the whole str value
+
+        :param path: string value of the path of the file
+        """
+        check_instance(fct_name="write_lp", value=path,
+                       name="path", type_=str)
+        # the lp format, whatever the file ending of the model
+        with open(path, 'wb') as f:
+            for chunk in iter_chunks(self.__iter_lp_lines()):
+                f.write(chunk)
+
+    def write_mps(self, path, fixed=False):
+        """
+        write the problem in the MPS format into a file, line by line
+
+        :param path: string value of the path of the file
+        :param fixed: boolean, True for the fixed MPS format, in which
+            the names must not be longer than 8 characters,
+            False for the free MPS format
+        """
+        check_instance(fct_name="write_mps", value=path,
+                       name="path", type_=str)
+        check_instance(fct_name="write_mps", value=fixed,
+                       name="fixed", type_=bool)
+        lines = iter_mps_lines(self.__get_mps_problem(), fixed=fixed)
+        with open(path, 'wb') as f:
+            for chunk in iter_chunks(lines):
+                f.write(chunk)
+
+    def to_matrices(self):
+        """
+        export the model as matrices, in one pass over the constraints
+        and without writing any lp string
+
+                             {   A * x <= b
+            min or max f x   { Aeq * x  = beq
+                             {    lb <= x <= ub
+                             { x[i] integer if integers[i]
+
+        the constraints >= are multiplied by -1 to be written in A,
+        the columns are the variables in the order they have been added,
+        the cells of a row are in the order of the terms of its constraint
+
+        :return: MIPModel.MATRICES namedtuple
+            f, b, beq, lb, ub: vectors of floats, lb and ub being +/-inf
+                if there is no bound
+            A, Aeq: scipy csr matrices, or CSR_MATRIX namedtuples
+                (data, indices, indptr, shape) if scipy is not installed
+            integers: vector of booleans, True for the integer variables
+            obj_constant: the constant of the objective
+            maximize: True if the objective is maximized
+            ineq_rows, eq_rows: vectors of the indices of the constraints
+                of the rows of A and Aeq, the index of print_constraints
+            the vectors are numpy arrays, or array.array if numpy is not installed
+        """
+        nb_vars = len(self.__vars)
+        ineq, eq = _CsrBuilder(), _CsrBuilder()
+        ineq_rows, eq_rows = array('l'), array('l')
+        for index, record in self.__constraints.iter_handles():
+            if record.sense == Operator.EEQ:
+                eq.append(record.indices, record.coefs, record.rhs)
+                eq_rows.append(index)
+            elif record.sense == Operator.LEQ:
+                ineq.append(record.indices, record.coefs, record.rhs)
+                ineq_rows.append(index)
+            else:
+                ineq.append(record.indices, array('d', [-coef for coef in record.coefs]),
+                            -record.rhs)
+                ineq_rows.append(index)
+
+        obj, obj_constant = self.__get_obj_vector()
+        integer = VarType.INTEGER.value
+        integers = array('b', [var_type == integer for var_type in self.__vars.types])
+        np = _get_numpy()
+        if np is not None:
+            integers = np.frombuffer(integers, dtype=np.int8).astype(bool)
+        return MIPModel.MATRICES(_as_vector(obj), ineq.to_csr(nb_vars), _as_vector(ineq.rhs),
+                                 eq.to_csr(nb_vars), _as_vector(eq.rhs),
+                                 _as_vector(array('d', self.__vars.lbs)),
+                                 _as_vector(array('d', self.__vars.ubs)),
+                                 integers, obj_constant,
+                                 self.__obj.direction == Direction.MAXIMIZE,
+                                 _as_vector(ineq_rows), _as_vector(eq_rows))
+
+    def __get_obj_vector(self):
+        """
+        return the objective as a tuple (array of the coefficients
+        of the variables, constant)
+        """
+        obj = array('d', [0]) * len(self.__vars)
+        expr = self.__obj.expr
+        if isinstance(expr, Expr):
+            expr._merge()
+            for var, coeff in zip(expr._vars, expr._coefs):
+                obj[var._index] += coeff
+            return obj, expr.constant
+        return obj, float(str(expr))
+
+    def __get_mps_problem(self):
+        """return the MPS_PROBLEM namedtuple describing the model"""
+        table = self.__vars
+        obj, obj_constant = self.__get_obj_vector()
+        records = list(self.__constraints)
+        return MPS_PROBLEM(splitext(self.file_name)[0], self.__obj.direction == Direction.MAXIMIZE,
+                           obj_constant, obj, table.names, table.lbs, table.ubs,
+                           table.types, [record.name for record in records],
+                           [record.sense for record in records],
+                           [record.rhs for record in records],
+                           [(record.indices, record.coefs) for record in records])
+
+    def build_from_file(self, file_path):
+        """
+        Builds the model using an existing problem
+        written in the MPS format, free or fixed, or in the LP format
+
+        The file is read line by line and the constraints are stored
+        directly in their compact form, without building any expression.
+
+        :param file_path: string value of the path to the file, ending with .mps or .lp
+        """
+        check_instance(fct_name="build_from_file", value=file_path,
+                       name="file_path", type_=str)
+        extension = splitext(file_path)[1]
+        if extension not in (".mps", ".lp"):
+            raise ValueError("\n".join(["Could not build_from_file, the path must end with "
+                                        "'.mps' or '.lp'.",
+                                        "".join(["Here is the path given : ", file_path])]))
+        if not isfile(file_path):
+            raise ValueError("\n".join(["Could not build_from_file, file does not exist.",
+                                        "".join(["Here is the path given : ", file_path])]))
+        problem = read_mps(file_path) if extension == ".mps" else read_lp(file_path)
+        self.reinit()
+
+        lst_vars = [self.__add_var(name, lb, ub,
+                                   VarType.INTEGER if integer else VarType.CONTINUOUS)
+                    for name, lb, ub, integer in zip(problem.col_names, problem.lbs,
+                                                     problem.ubs, problem.integers)]
+        self.set_obj(dot(problem.obj, lst_vars) + problem.obj_constant)
+        if problem.maximize:
+            self.set_to_maximize()
+        for name, sense, rhs, (cols, coefs) in zip(problem.row_names, problem.senses,
+                                                   problem.rhs, problem.rows):
+            self.__append_record(_ConstraintRecord(name, cols, coefs,
+                                                   Operator(sense), rhs))
+
+    def save(self, path):
+        """
+        save the model into a binary snapshot, see the snapshot module,
+        to be loaded again with MIPModel.load
+
+        The snapshot holds the columns of the variables (names, bounds,
+        types and values), the constraints as a CSR matrix with their
+        names, senses and right hand sides, and the objective as a vector.
+        The families of variables are saved as single variables.
+
+        :param path: string value of the path of the file
+        """
+        check_instance(fct_name="save", value=path, name="path", type_=str)
+        table = self.__vars
+        records = list(self.__constraints)
+        codes = dict((str(sense), code) for code, sense in enumerate(_SENSES))
+        indptr, indices, coefs = array('l', [0]), array('l'), array('d')
+        senses, rhs = array('b'), array('d')
+        for record in records:
+            indices.extend(record.indices)
+            coefs.extend(record.coefs)
+            indptr.append(len(indices))
+            senses.append(codes[str(record.sense)])
+            rhs.append(record.rhs)
+        obj, obj_constant = self.__get_obj_vector()
+        meta = dict(model_name=self.file_name, obj_constant=obj_constant,
+                    maximize=self.__obj.direction == Direction.MAXIMIZE,
+                    obj_value=self.__obj.value)
+        write_snapshot(path, "mip", meta,
+                       [("names", join_names(table.names, "save")),
+                        ("lbs", table.lbs), ("ubs", table.ubs),
+                        ("types", table.types), ("values", table.values),
+                        ("obj", obj),
+                        ("row_names", join_names([record.name or "" for record in records],
+                                                 "save")),
+                        ("indptr", indptr), ("indices", indices), ("coefs", coefs),
+                        ("senses", senses), ("rhs", rhs)])
+
+    @classmethod
+    def load(cls, path, token, **kwargs):
+        """
+        load a model saved with save
+
+        The file is memory-mapped: the coefficients of the constraints
+        stay in the pages of the file, shared by the processes loading it,
+        and the names of the variables are only decoded when they are read.
+        The file stays open until the model is closed, see close.
+
+        :param path: string value of the path of the file
+        :param token: api-key to solve with solve engine, it is not saved
+        :param kwargs: the other init parameters, the model_name
+            being the one of the saved model by default
+        :return: the MIPModel built
 
-        list_lines.append("General")
-        list_lines.extend(v.name for v in self.__lst_variables if v.is_integer)
-        list_lines.append("End")
-        return "\n".join(list_lines)
+        Raises:
+        ValueError: if the file is not a snapshot of a MIP model
+        """
+        check_instance(fct_name="load", value=path, name="path", type_=str)
+        if not isfile(path):
+            raise ValueError("\n".join(["Could not load, file does not exist.",
+                                        "".join(["Here is the path given : ", path])]))
+        meta, sections, mapping = read_snapshot(path, "mip")
+        kwargs.setdefault("model_name", meta["model_name"])
+        try:
+            model = cls(token, **kwargs)
+        except Exception:
+            sections.clear()
+            close_mapping(mapping)
+            raise
+        model.__load_snapshot(meta, sections)
+        model._keep_mapping(mapping)
+        return model
+
+    def __load_snapshot(self, meta, sections):
+        """fill the model with the meta values and the sections of a snapshot"""
+        table = self.__vars
+        table.load_columns(sections["names"], sections["lbs"], sections["ubs"],
+                           sections["types"], sections["values"])
+        obj_coefs = sections["obj"]
+        cols = [col for col, coeff in enumerate(obj_coefs) if coeff != 0]
+        obj = dot([obj_coefs[col] for col in cols], [Var(table, col) for col in cols])
+        obj.constant = meta["obj_constant"]
+        direction = Direction.MAXIMIZE if meta["maximize"] else Direction.MINIMIZE
+        self.__obj = MIPModel.OBJECTIVE(obj, direction, meta["obj_value"])
+
+        # the rows stay in the sections, each record is built when its row is read
+        self.__constraints.attach(_SnapshotRows(sections))
+
+    def _own_snapshot(self):
+        """
+        copy the columns, the rows and the records built from the
+        snapshot loaded, the rows staying lazy
+        """
+        self.__vars.own_snapshot()
+        store = self.__constraints
+        if store.lazy is None:
+            return
+        store.lazy.own_sections()
+        records = list(store.built.values())
+        if self.__row_index is not None:
+            # the records merged are not in the store anymore
+            records.extend(record for merged in self.__row_index.merged.values()
+                           for record, _ in merged)
+        for record in records:
+            if isinstance(record.indices, memoryview):
+                record.indices = copy_section(record.indices)
+                record.coefs = copy_section(record.coefs)
 
 
 class Constraint(object):
@@ -495,6 +1474,9 @@ class Constraint(object):
     operator: either <=, = or >=
     rhs: an expression or number, the right-hand-side of the constraint
     optional name: the name of the constraint
+
+    The lp string is cached, with the state of lhs and rhs it has been
+    computed with, and only computed again if one of them has been modified.
     """
 
     def __init__(self, lhs, operator, rhs, name=None):
@@ -514,7 +1496,38 @@ class Constraint(object):
         self.__operator = operator
         self.__lhs = lhs
         self.__rhs = rhs
-        self.name = name
+        self.__name = name
+        self.__lp_cache = None
+        self.__lp_state = None
+
+    @property
+    def name(self):
+        """get the name of the constraint"""
+        return self.__name
+
+    @name.setter
+    def name(self, name):
+        """set the name of the constraint, the lp string has to be computed again"""
+        self.__name = name
+        self.__lp_cache = None
+
+    @property
+    def operator(self):
+        """get the operator of the constraint"""
+        return self.__operator
+
+    def _normalised(self):
+        """
+        return the merged expression lhs - rhs, a new instance
+
+        Raises:
+        ValueError: if the constraint does not contain any variable
+        """
+        expr = self.__lhs - self.__rhs
+        if not isinstance(expr, Expr) or expr.is_constant:
+            raise ValueError("a constraint must have a least one variable")
+        expr._merge()
+        return expr
 
     def __format_str(self, lhs, rhs):
         """
@@ -534,73 +1547,505 @@ class Constraint(object):
 
         :return: str value of the constraint
         """
-        lhs = self.__lhs - self.__rhs
-        if not isinstance(lhs, Expr) or lhs.is_constant:
-            raise ValueError("a constraint must have a least one variable")
+        state = (_get_state(self.__lhs), _get_state(self.__rhs))
+        if self.__lp_cache is not None and state == self.__lp_state:
+            return self.__lp_cache
+
+        lhs = self._normalised()
         rhs = -lhs.constant
         lhs.constant = 0
-        return self.__format_str(lhs, rhs)
+        self.__lp_cache = self.__format_str(lhs, rhs)
+        self.__lp_state = state
+        return self.__lp_cache
 
     def __str__(self):
         return self.__format_str(self.__lhs, self.__rhs)
 
 
-class Expr(object):
-    """class for linear expression
+class _ConstraintRecord(object):
+    """
+    compact form of a constraint added to a model
 
-    This class represents an affine linear expression.
+        sum(coefs[k] * x[indices[k]]) (sense) rhs
 
     Attributes:
-    constant: the constant part of the expression, default=0
+    name: the name of the constraint, None if not named
+    indices: array of the indices of the variables in the _VarTable
+    coefs: array of their coefficients
+    sense: Operator of the constraint
+    rhs: float value of the right hand side
+    lp_line: the cached lp string, None if not computed yet
     """
+    __slots__ = ('name', 'indices', 'coefs', 'sense', 'rhs', 'lp_line')
 
-    def __init__(self, constant=0):
-        self.variables = dict()
-        self.constant = constant
-
-    def add_term(self, var, value):
-        """add term to expression
+    def __init__(self, name, indices, coefs, sense, rhs):
+        self.name = name
+        self.indices = indices
+        self.coefs = coefs
+        self.sense = sense
+        self.rhs = float(rhs)
+        self.lp_line = None
 
-        Args:
-        var: variable
-        value: any object which returns a number by calling its __str__ method
 
-        Raises:
-        ValueError: if var is not a variable obtained by the add_var method
-        of the model class
-        """
-        if not isinstance(var, Var):
-            raise ValueError("no a variable")
-        self.variables[var] = value
-        return self
+class _SnapshotRows(object):
+    """
+    constraints of a snapshot loaded, kept in its CSR sections,
+    the lazy source of the _ConstraintStore of the model
 
-    def lpstr(self):
-        """return the lp string of the expression"""
-        if not self.variables:
-            return str(self.constant)
+    The _ConstraintRecord of a row is only built when the row is read,
+    its indices and coefficients being memoryviews on the sections.
 
-        res = []
-        for var, value in self.variables.items():
-            res.append("+" if value >= 0 else "-")
-            if abs(value) != 1:
-                res.append(str(abs(value)))
-            res.append(var.name)
-        if res[0] == "+":
-            res = res[1:]
-        lpstr = " ".join(res)
-        if self.constant:
-            lpstr += " + {}".format(self.constant)
-        return lpstr
+    Attributes:
+    indptr, indices, coefs: the sections of the CSR matrix of the rows
+    senses: the codes of the senses, see _SENSES
+    rhs: the right hand sides
+    names: list of the names of the rows, "" if not named,
+        decoded when they are first read
+    """
+    __slots__ = ('indptr', 'indices', 'coefs', 'senses', 'rhs',
+                 '_names', '_names_blob', '_handles', '_shadowed')
+
+    def __init__(self, sections):
+        self.indptr = sections["indptr"]
+        self.indices = sections["indices"]
+        self.coefs = sections["coefs"]
+        self.senses = sections["senses"]
+        self.rhs = sections["rhs"]
+        self._names = None
+        self._names_blob = sections["row_names"]
+        self._handles = None
+        self._shadowed = None
+
+    def __len__(self):
+        return len(self.rhs)
 
     @property
-    def is_constant(self):
-        """is the expr just a number
+    def names(self):
+        """get the list of the names of the rows"""
+        if self._names is None:
+            self._names = split_names(self._names_blob, len(self.rhs))
+        return self._names
+
+    def build(self, handle):
+        """build the _ConstraintRecord of a row"""
+        start, end = self.indptr[handle], self.indptr[handle + 1]
+        return _ConstraintRecord(self.names[handle] or None, self.indices[start:end],
+                                 self.coefs[start:end], _SENSES[self.senses[handle]],
+                                 self.rhs[handle])
+
+    def own_sections(self):
+        """copy the sections, before the snapshot is closed"""
+        if isinstance(self.rhs, memoryview):
+            self.indptr, self.indices, self.coefs, self.senses, self.rhs = map(
+                copy_section, (self.indptr, self.indices, self.coefs, self.senses, self.rhs))
+            self._names_blob = bytes(self._names_blob)
+
+    def find(self, name):
+        """get the indices of the rows named name, the last one first"""
+        if self._handles is None:
+            self._handles, self._shadowed = dict(), dict()
+            for handle, row_name in enumerate(self.names):
+                if row_name in self._handles:
+                    self._shadowed.setdefault(row_name, list()).append(self._handles[row_name])
+                if row_name:
+                    self._handles[row_name] = handle
+        if name not in self._handles:
+            return ()
+        return chain((self._handles[name],), reversed(self._shadowed.get(name, ())))
+
+
+class _RowIndex(object):
+    """
+    index of the constraint records by their normalised rows,
+    to find the duplicate and parallel constraints in O(1)
+
+    A row is normalised by sorting its nonzero terms by variable index and
+    dividing them by the first coefficient, its scale, so that the multiples
+    of a row have the same key. The coefficients of the key are rounded to
+    12 significant digits (KEY_FORMAT), so that the rows equal up to the rounding
+    errors of their coefficients (0.3 and 3 * 0.1) have the same key, and a
+    row matching a key is only merged if its coefficients are equal to the
+    ones of the row kept up to the relative TOLERANCE (the rare rows whose
+    coefficients round to both sides of a digit being kept apart).
+    For each key, the index keeps the first record added of each sense,
+    once normalised (the sense is swapped if the scale is negative), and
+    the records merged into it, which take its place if it is removed.
+    The records merged keep their own right hand side, and the record kept
+    its own one in own_rhs when it is tightened, so that the tightest one can
+    be derived again when one of them changes (see release).
 
-        Returns:
-        True if the expression does not contain any variables, otherwise False
+    Attributes:
+    rows: dictionary key : {str value of the normalised sense: (record, scale, handle)}
+    merged: dictionary record kept : list of the tuples (record merged into it,
+        True if it was a duplicate row)
+    merged_into: dictionary record merged : handle of the record kept
+    own_rhs: dictionary record kept : its right hand side before it has been tightened
+    names: dictionary name : list of the records merged of this name, the last one last
+    duplicate_rows: the number of records equal to a record kept
+    parallel_rows: the number of records multiple of a record kept
+    bytes_saved: the size of the lp lines of the records not kept
+    """
+    LEQ, EEQ, GEQ = str(Operator.LEQ), str(Operator.EEQ), str(Operator.GEQ)
+    SWAPPED = {LEQ: GEQ, GEQ: LEQ, EEQ: EEQ}
+    TOLERANCE = 1e-9
+    KEY_FORMAT = ".12g"
+
+    def __init__(self):
+        self.rows = dict()
+        self.merged = dict()
+        self.merged_into = dict()
+        self.own_rhs = dict()
+        self.names = dict()
+        self.duplicate_rows = 0
+        self.parallel_rows = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def terms(record):
+        """return the sorted list of the terms (index, coef) of a record with a nonzero coef"""
+        return sorted((index, coef) for index, coef in zip(record.indices, record.coefs)
+                      if coef != 0)
+
+    @staticmethod
+    def normalise(record):
         """
-        return not any(self.variables)
-
+        return the tuple (key, scale, sense, rhs) of the normalised row of a record,
+        sense being the str value of its Operator, None if all its coefs are zero
+        """
+        terms = _RowIndex.terms(record)
+        if not terms:
+            return None
+        scale = terms[0][1]
+        key_format = _RowIndex.KEY_FORMAT
+        key = tuple((index, float(format(coef / scale, key_format))) for index, coef in terms)
+        sense = str(record.sense)
+        if scale < 0:
+            sense = _RowIndex.SWAPPED[sense]
+        return key, scale, sense, record.rhs / scale
+
+    def add(self, record, handle):
+        """
+        add a record, or merge it into the record kept for its row:
+        the right hand side of this one becomes the tightest of both
+
+        :param handle: the handle of the record in the constraints of the model
+        :return: True if the record is kept, False if it has been merged
+        """
+        normalised = self.normalise(record)
+        if normalised is None:
+            # a row of zeros, never merged
+            return True
+        key, scale, sense, rhs = normalised
+        kept = self.rows.setdefault(key, dict())
+        if self.EEQ in kept:
+            eq_record, eq_scale, eq_handle = kept[self.EEQ]
+            value = eq_record.rhs / eq_scale
+            if (not self.__same_row(eq_record, eq_scale, record, scale)
+                    or sense == self.EEQ and abs(value - rhs) > self.__tolerance(rhs)
+                    or sense == self.LEQ and value > rhs
+                    or sense == self.GEQ and value < rhs):
+                # conflicting rows, both are kept for the solver to report it
+                return True
+            self.__merge(eq_record, eq_handle, record, eq_scale, scale)
+            return False
+        if sense not in kept:
+            kept[sense] = (record, scale, handle)
+            return True
+
+        kept_record, kept_scale, kept_handle = kept[sense]
+        value = kept_record.rhs / kept_scale
+        if not self.__same_row(kept_record, kept_scale, record, scale):
+            return True
+        if sense == self.EEQ and abs(value - rhs) > self.__tolerance(rhs):
+            return True
+        self.__merge(kept_record, kept_handle, record, kept_scale, scale)
+        if sense != self.EEQ and rhs != value and (rhs < value) == (sense == self.LEQ):
+            self.own_rhs.setdefault(kept_record, kept_record.rhs)
+            kept_record.rhs = rhs * kept_scale
+            kept_record.lp_line = None
+        return False
+
+    def remove(self, record):
+        """
+        remove a record from the index, if it is the one kept for its row,
+        the records merged into it being released with release
+        """
+        normalised = self.normalise(record)
+        if normalised is None:
+            return
+        key, _, sense, _ = normalised
+        kept = self.rows.get(key, dict())
+        if sense in kept and kept[sense][0] is record:
+            del kept[sense]
+
+    def release(self, kept_record):
+        """
+        forget the records merged into a record kept, which gets
+        its own right hand side back, to be indexed again
+
+        :return: the list of the records merged into it, not merged anymore,
+            to be added again
+        """
+        merged = self.merged.pop(kept_record, [])
+        for record, duplicate in merged:
+            if duplicate:
+                self.duplicate_rows -= 1
+            else:
+                self.parallel_rows -= 1
+            del self.merged_into[record]
+            if record.name is not None:
+                same_name = self.names[record.name]
+                same_name[:] = [other for other in same_name if other is not record]
+                if not same_name:
+                    del self.names[record.name]
+        if kept_record in self.own_rhs:
+            kept_record.rhs = self.own_rhs.pop(kept_record)
+            kept_record.lp_line = None
+        return [record for record, _ in merged]
+
+    def find(self, name):
+        """get the last record merged named name, None if there is none"""
+        same_name = self.names.get(name)
+        return same_name[-1] if same_name else None
+
+    def __merge(self, kept_record, kept_handle, record, kept_scale, scale):
+        """keep a record merged into a kept one, counted as a duplicate or a parallel row"""
+        kept_rhs = self.own_rhs.get(kept_record, kept_record.rhs)
+        duplicate = (scale == kept_scale and record.rhs == kept_rhs
+                     and record.sense == kept_record.sense)
+        if duplicate:
+            self.duplicate_rows += 1
+        else:
+            self.parallel_rows += 1
+        self.merged.setdefault(kept_record, list()).append((record, duplicate))
+        self.merged_into[record] = kept_handle
+        if record.name is not None:
+            self.names.setdefault(record.name, list()).append(record)
+
+    def __same_row(self, kept_record, kept_scale, record, scale):
+        """return True if the normalised rows of two records with the same key are equal"""
+        tolerance = self.TOLERANCE
+        kept_terms = self.terms(kept_record)
+        terms = self.terms(record)
+        return all(abs(kept_coef / kept_scale - coef / scale)
+                   <= tolerance * max(abs(kept_coef / kept_scale), abs(coef / scale))
+                   for (_, kept_coef), (_, coef) in zip(kept_terms, terms))
+
+    def __tolerance(self, value):
+        """return the tolerance to compare value with another number"""
+        return self.TOLERANCE * max(1, abs(value))
+
+
+class Expr(object):
+    """class for linear expression
+
+    This class represents an affine linear expression.
+
+    The terms are stored in two parallel arrays, the variables and their
+    coefficients, in which a variable can appear several times.
+    They are merged lazily, only when the expression is read,
+    the variables being identified by their integer key.
+    An expression built from another one (e + x) shares its arrays
+    as long as it only appends terms to them, so that summing
+    n terms one by one costs O(n) and not O(n^2). The coefficients are
+    only modified in place in arrays the expression owns (_owned).
+
+    _version is increased each time the terms are modified, it allows
+    the constraints and the model to know if their cached lp string
+    is still valid.
+
+    Attributes:
+    constant: the constant part of the expression, default=0
+    """
+    __slots__ = ('_vars', '_coefs', '_size', '_merged', '_owned', '_positions',
+                 '_version', 'constant')
+
+    def __init__(self, constant=0):
+        self._vars = list()
+        self._coefs = array('d')
+        self._size = 0
+        self._merged = True
+        self._owned = True
+        self._positions = None
+        self._version = 0
+        self.constant = constant
+
+    def _own_arrays(self):
+        """
+        make sure the arrays can be appended to without changing
+        another expression sharing them
+        """
+        if len(self._coefs) != self._size:
+            self._vars = self._vars[:self._size]
+            self._coefs = self._coefs[:self._size]
+            self._owned = True
+
+    def _append_term(self, var, coeff):
+        """append one term, without merging it with the existing ones"""
+        self._own_arrays()
+        self._vars.append(var)
+        self._coefs.append(coeff)
+        self._size += 1
+        self._merged = False
+        self._positions = None
+        self._version += 1
+
+    def _extend_terms(self, other, factor=1):
+        """
+        append the terms of another expression, multiplied by factor
+
+        :param other: Expr instance
+        :param factor: number multiplying the coefficients of other
+        """
+        size = other._size
+        if not size:
+            return
+        vars_ = other._vars[:size]
+        coefs = other._coefs[:size]
+        if factor != 1:
+            coefs = array('d', [coeff * factor for coeff in coefs])
+        self._own_arrays()
+        self._vars.extend(vars_)
+        self._coefs.extend(coefs)
+        self._size += size
+        self._merged = False
+        self._positions = None
+        self._version += 1
+
+    def _merge(self):
+        """sum the coefficients of the variables appearing several times"""
+        if self._merged:
+            # drop the terms appended by the expressions built from this one
+            self._own_arrays()
+            return
+        positions = dict()
+        vars_ = list()
+        coefs = array('d')
+        for var, coeff in zip(self._vars[:self._size], self._coefs):
+            key = _term_key(var)
+            pos = positions.get(key)
+            if pos is None:
+                positions[key] = len(vars_)
+                vars_.append(var)
+                coefs.append(coeff)
+            else:
+                coefs[pos] += coeff
+        self._vars = vars_
+        self._coefs = coefs
+        self._size = len(vars_)
+        self._merged = True
+        self._owned = True
+        self._positions = positions
+
+    def _find_term(self, var):
+        """
+        merge the terms, make sure the expression owns its arrays
+        and return the position of a variable in them, None if it is absent
+        """
+        self._merge()
+        if not self._owned:
+            self._vars = self._vars[:self._size]
+            self._coefs = self._coefs[:self._size]
+            self._owned = True
+        if self._positions is None:
+            self._positions = dict((_term_key(other), pos)
+                                   for pos, other in enumerate(self._vars))
+        return self._positions.get(_term_key(var))
+
+    def _set_term(self, var, value):
+        """set the coefficient of a variable, added if it is absent"""
+        pos = self._find_term(var)
+        if pos is None:
+            self._positions[_term_key(var)] = self._size
+            self._vars.append(var)
+            self._coefs.append(value)
+            self._size += 1
+        else:
+            self._coefs[pos] = value
+        self._version += 1
+
+    def _remove_term(self, var):
+        """
+        remove the term of a variable
+
+        Raises:
+        KeyError: if the variable is not in the expression
+        """
+        pos = self._find_term(var)
+        if pos is None:
+            raise KeyError(var)
+        del self._vars[pos]
+        del self._coefs[pos]
+        self._size -= 1
+        self._positions = None
+        self._version += 1
+
+    @property
+    def variables(self):
+        """
+        get the terms of the expression
+
+        :return: a mapping {variable: coefficient} reading the terms of
+            the expression, the changes made to it are made to the expression
+        """
+        return _Terms(self)
+
+    @variables.setter
+    def variables(self, dct_vars):
+        """replace the terms of the expression"""
+        self._vars = list(dct_vars)
+        self._coefs = array('d', dct_vars.values())
+        self._size = len(self._vars)
+        self._merged = False
+        self._owned = True
+        self._positions = None
+        self._version += 1
+
+    def add_term(self, var, value):
+        """add term to expression
+
+        if the variable is already in the expression,
+        value replaces its coefficient
+
+        Args:
+        var: variable
+        value: any object which returns a number by calling float()
+
+        Raises:
+        ValueError: if var is not a variable obtained by the add_var method
+        of the model class
+        """
+        if not isinstance(var, Var):
+            raise ValueError("no a variable")
+        self._set_term(var, value)
+        return self
+
+    def lpstr(self, format_number=None):
+        """
+        return the lp string of the expression
+
+        :param format_number: the function returning the str value of
+                the numbers, _format_number by default
+        """
+        if not self._size:
+            return str(self.constant)
+
+        format_number = format_number or _format_number
+        self._merge()
+        lpstr = _lpstr_terms((var.name for var in self._vars), self._coefs, format_number)
+        if self.constant:
+            lpstr += " + {}".format(format_number(self.constant))
+        return lpstr
+
+    @property
+    def is_constant(self):
+        """is the expr just a number
+
+        Returns:
+        True if the expression does not contain any variables, otherwise False
+        """
+        return not self._size
+
     def __str__(self):
         return self.lpstr()
 
@@ -608,25 +2053,40 @@ class Expr(object):
         return "Expr[{}]".format(self)
 
     def get_copy(self):
-        """return shallow copy"""
+        """return shallow copy, sharing the arrays of terms"""
         expr = Expr(self.constant)
-        expr.variables = self.variables.copy()
+        expr._vars = self._vars
+        expr._coefs = self._coefs
+        expr._size = self._size
+        expr._merged = self._merged
+        expr._owned = self._owned = False
         return expr
 
     def __iadd__(self, other):
-        if not isinstance(other, Expr):
-            other = Expr(other)
-        self.constant += other.constant
-        for var, value in other.variables.items():
-            self.variables[var] = self.variables.get(var, 0) + value
+        if isinstance(other, Expr):
+            self.constant += other.constant
+            self._extend_terms(other)
+        else:
+            self.constant += other
+        return self
+
+    def __isub__(self, other):
+        if isinstance(other, Expr):
+            self.constant -= other.constant
+            self._extend_terms(other, factor=-1)
+        else:
+            self.constant -= other
         return self
 
     def __imul__(self, other):
         if isinstance(other, Expr):
             raise ValueError("cannot multiply Expr with Expr")
         self.constant *= other
-        for var in self.variables:
-            self.variables[var] *= other
+        self._vars = self._vars[:self._size]
+        self._coefs = array('d', [coeff * other
+                                  for coeff in self._coefs[:self._size]])
+        self._owned = True
+        self._version += 1
         return self
 
     def __add__(self, other):
@@ -651,7 +2111,9 @@ class Expr(object):
         return self.__div__(other)
 
     def __sub__(self, other):
-        return self + (-other)
+        expr = self.get_copy()
+        expr -= other
+        return expr
 
     def __rsub__(self, other):
         return -self + other
@@ -662,10 +2124,6 @@ class Expr(object):
     def __radd__(self, other):
         return self + other
 
-    def __isub__(self, other):
-        self += -other
-        return self
-
     def __idiv__(self, other):
         self *= (1 / other)
         return self
@@ -690,52 +2148,439 @@ class Expr(object):
         return self.variables == other.variables and self.constant == other.constant
 
 
+def _term_key(var):
+    """
+    return the key identifying a variable in the terms of an expression,
+    the integer key of a Var, the object itself otherwise
+    """
+    return getattr(var, '_key', var)
+
+
+class _Terms(MutableMapping):
+    """
+    the terms of an expression, as a mapping {variable: coefficient}
+
+    It reads and writes the arrays of the expression, so that
+    expr.variables[var] = coeff modifies the expression like add_term.
+    The terms of a variable can not be modified.
+    """
+    __slots__ = ('_expr',)
+
+    def __init__(self, expr):
+        self._expr = expr
+
+    def __writable_expr(self):
+        """return the expression, raise TypeError if it is a variable"""
+        if isinstance(self._expr, Var):
+            raise TypeError("The terms of the variable {} can not be modified"
+                            .format(self._expr.name))
+        return self._expr
+
+    def __getitem__(self, var):
+        expr = self._expr
+        if isinstance(expr, Var):
+            if _term_key(var) == expr._key:
+                return 1.
+            raise KeyError(var)
+        expr._merge()
+        if expr._positions is None:
+            expr._positions = dict((_term_key(other), pos)
+                                   for pos, other in enumerate(expr._vars[:expr._size]))
+        pos = expr._positions.get(_term_key(var))
+        if pos is None:
+            raise KeyError(var)
+        return expr._coefs[pos]
+
+    def __setitem__(self, var, coeff):
+        self.__writable_expr()._set_term(var, coeff)
+
+    def __delitem__(self, var):
+        self.__writable_expr()._remove_term(var)
+
+    def __iter__(self):
+        expr = self._expr
+        expr._merge()
+        return iter(list(expr._vars))
+
+    def __len__(self):
+        expr = self._expr
+        expr._merge()
+        return expr._size
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class _VarTable(object):
+    """
+    columnar storage of the variables of a MIP model
+
+    Each variable is addressed by its index, the order it has been added with.
+
+    Attributes:
+    uid: integer identifying the table among all the models, the key
+        of a variable, used to hash it and to identify it in the
+        expressions, is (uid << KEY_SHIFT) | index
+    names: list of the names of the variables, the names of the families
+        of variables being only built when they are read
+    lbs, ubs: arrays of the bounds, INF being stored as float('inf')
+    types: array of the VarType values
+    values: array of the values after solving, NaN if not computed,
+        decoded from the result of the solver the first time it is read
+    the columns loaded from a snapshot are memoryviews on the file,
+        copied into arrays when one of them is modified
+    indices: dictionary var_name : index
+    bounds_lines: list of the cached lp strings of the bounds,
+                None if not computed yet
+    format_number: the function returning the str value of the bounds
+    """
+    __slots__ = ('uid', '_names', 'lbs', 'ubs', 'types', '_values', '_solution',
+                 '_indices', '_families', '_family_names', '_heads', '_names_blob',
+                 'bounds_lines', 'format_number')
+    KEY_SHIFT = 32
+
+    def __init__(self, format_number=None):
+        self.uid = next(_TABLE_IDS)
+        self.format_number = format_number or _format_number
+        self._names = list()
+        self.lbs = array('d')
+        self.ubs = array('d')
+        self.types = array('b')
+        self._values = array('d')
+        self._solution = None
+        self._indices = dict()
+        # families whose names are not built yet, (name, index_sets)
+        self._families = list()
+        # names of all the families added
+        self._family_names = set()
+        # the heads (the part before the first '_') of the names of the
+        # variables and of the families, a name of a family can only be
+        # the one of another variable if their heads are the same
+        self._heads = set()
+        # names of the variables loaded from a snapshot, not decoded yet
+        self._names_blob = None
+        self.bounds_lines = list()
+
+    def __len__(self):
+        return len(self.lbs)
+
+    def add(self, name, lb, ub, var_type):
+        """
+        add a variable at the end of the table
+
+        :return: the index of the new variable
+        """
+        index = len(self.lbs)
+        # the pending solution is decoded and the names
+        # are built before the table grows
+        self.own_columns()
+        self.values.append(NAN)
+        self.names.append(name)
+        self._heads.add(_get_head(name))
+        self.lbs.append(_bound_to_float(lb))
+        self.ubs.append(_bound_to_float(ub))
+        self.types.append(var_type.value)
+        self._indices[name] = index
+        self.bounds_lines.append(None)
+        return index
+
+    def add_family(self, name, index_sets, lbs, ubs, var_type):
+        """
+        add the variables of a family at the end of the table,
+        their names are built when they are first read
+
+        :param name: the name of the family
+        :param index_sets: list of the lists of index values
+        :param lbs, ubs: arrays of the bounds, one per variable
+        :return: the index of the first variable of the family
+
+        Raises:
+        ValueError: if the family exists already, or if one of its names
+        is the one of another variable, the table being unchanged
+        """
+        if self.has_family(name):
+            raise ValueError("".join(["Family of variables ", name,
+                                      " does exists already"]))
+        if self._names_blob is not None:
+            # the heads of the names loaded from a snapshot are known once decoded
+            self.__build_names()
+        new_names = None
+        if _get_head(name) in self._heads:
+            new_names = _get_family_names(name, index_sets)
+            if not self.indices.keys().isdisjoint(new_names):
+                raise ValueError("".join(["The names of the family of variables ", name,
+                                          " are already used by other variables"]))
+        start = len(self.lbs)
+        nb_vars = len(lbs)
+        self.own_columns()
+        self.values.extend(array('d', [NAN]) * nb_vars)
+        self.lbs.extend(lbs)
+        self.ubs.extend(ubs)
+        self.types.extend(array('b', [var_type.value]) * nb_vars)
+        self.bounds_lines.extend([None] * nb_vars)
+        self._family_names.add(name)
+        self._heads.add(_get_head(name))
+        if new_names is None:
+            self._families.append((name, index_sets))
+        else:
+            self._indices.update(zip(new_names, range(start, start + nb_vars)))
+            self._names.extend(new_names)
+        return start
+
+    def load_columns(self, names_blob, lbs, ubs, types, values):
+        """
+        fill an empty table with the columns of a snapshot, kept as they
+        are until one of them is modified (see own_columns),
+        the names are decoded when they are first read
+
+        :param names_blob: bytes-like value of the names separated by new lines
+        :param lbs, ubs, types, values: memoryviews of the columns
+        """
+        assert not len(self.lbs)
+        self.lbs, self.ubs, self.types, self._values = lbs, ubs, types, values
+        self.bounds_lines = [None] * len(self.lbs)
+        if len(self.lbs):
+            self._names_blob = names_blob
+
+    def own_columns(self):
+        """copy the columns loaded from a snapshot, before one of them is modified"""
+        if isinstance(self.lbs, memoryview):
+            self.lbs, self.ubs, self.types = map(copy_section, (self.lbs, self.ubs, self.types))
+        # the values are replaced by the ones of a solution
+        if isinstance(self._values, memoryview):
+            self._values = copy_section(self._values)
+
+    def own_snapshot(self):
+        """copy the columns and the names not decoded yet, before the snapshot is closed"""
+        self.own_columns()
+        if isinstance(self._names_blob, memoryview):
+            self._names_blob = bytes(self._names_blob)
+
+    def has_family(self, name):
+        """return True if a family of variables named name has been added"""
+        return name in self._family_names
+
+    @property
+    def names(self):
+        """get the list of the names of the variables"""
+        if len(self._names) != len(self.lbs):
+            self.__build_names()
+        return self._names
+
+    @property
+    def indices(self):
+        """get the dictionary var_name : index"""
+        if len(self._names) != len(self.lbs):
+            self.__build_names()
+        return self._indices
+
+    def __build_names(self):
+        """
+        build the names of the families of variables not built yet,
+        name_i_j for the indices (i, j), after the names loaded from
+        a snapshot, their uniqueness being checked by add_family
+        """
+        if self._names_blob is not None:
+            new_names = split_names(self._names_blob, len(self.lbs))
+            self._names_blob = None
+            self._indices.update(zip(new_names, range(len(new_names))))
+            self._names.extend(new_names)
+            self._heads.update(map(_get_head, new_names))
+        for name, index_sets in self._families:
+            start = len(self._indices)
+            new_names = _get_family_names(name, index_sets)
+            self._indices.update(zip(new_names, range(start, start + len(new_names))))
+            self._names.extend(new_names)
+        self._families = list()
+
+    @property
+    def values(self):
+        """get the array of the values, NaN if not computed"""
+        if self._solution is not None:
+            self.__decode_solution()
+        return self._values
+
+    def set_solution(self, result_obj, fixed=None):
+        """
+        keep the result of the solver as it is,
+        its values are only decoded when one of them is read
+
+        :param result_obj: the result returned by SE
+        :param fixed: None, or tuple of the arrays (indices, values) of the
+                variables removed by the presolve, not in the result
+        """
+        self._solution = (result_obj, fixed)
+
+    def __decode_solution(self):
+        """decode the pending solution into the array of the values"""
+        result_obj, fixed = self._solution
+        names, values = decode_variables(result_obj)
+        self._solution = None
+        positions = None if names == self.names else list(map(self.indices.__getitem__, names))
+        self._values = align_values(values, positions, len(self.lbs))
+        if fixed is not None:
+            for index, value in zip(*fixed):
+                self._values[index] = value
+
+    def set_lb(self, index, lb):
+        """set the lower bound of a variable, its lp string is computed again"""
+        self.own_columns()
+        self.lbs[index] = _bound_to_float(lb)
+        self.bounds_lines[index] = None
+
+    def set_ub(self, index, ub):
+        """set the upper bound of a variable, its lp string is computed again"""
+        self.own_columns()
+        self.ubs[index] = _bound_to_float(ub)
+        self.bounds_lines[index] = None
+
+    def set_type(self, index, var_type):
+        """set the VarType of a variable"""
+        self.own_columns()
+        self.types[index] = var_type.value
+
+    def set_value(self, index, value):
+        """set the value of a variable"""
+        if self._solution is not None:
+            self.__decode_solution()
+        self.own_columns()
+        self._values[index] = value
+
+    def lpstr_bounds(self, index):
+        """build the lp string of the bounds, cached until a bound is modified"""
+        line = self.bounds_lines[index]
+        if line is None:
+            line = "{} <= {} <= {}".format(self.format_number(self.lbs[index]),
+                                           self.names[index],
+                                           self.format_number(self.ubs[index]))
+            self.bounds_lines[index] = line
+        return line
+
+
+class VarFamily(object):
+    """
+    family of variables indexed by the cartesian product of index sets
+
+    This class should not be used directly, only via the model.add_vars method.
+
+    family[j, m, t] is the variable of the indices (j, m, t),
+    family[j] if there is only one index set.
+    The variable of the indices (j, m, t) is named name_j_m_t,
+    the names are only built when the model is written.
+
+    Attributes:
+    name: the name of the family
+    index_sets: tuple of the lists of the index values
+    shape: tuple of the sizes of the index sets
+    """
+
+    def __init__(self, table, start, name, index_sets):
+        """
+        Initialize a family of variables
+
+        :param table: the _VarTable of the model the variables belong to
+        :param start: the index in the table of the first variable
+        :param name: the name of the family
+        :param index_sets: list of the lists of index values
+        """
+        self.__table = table
+        self.__start = start
+        self.__name = name
+        self.__index_sets = tuple(index_sets)
+        self.__positions = [dict((value, pos) for pos, value in enumerate(values))
+                            for values in index_sets]
+        self.__strides = list()
+        stride = 1
+        for values in reversed(index_sets):
+            self.__strides.insert(0, stride)
+            stride *= len(values)
+        self.__size = stride
+
+    @property
+    def name(self):
+        """get the name of the family"""
+        return self.__name
+
+    @property
+    def index_sets(self):
+        """get the tuple of the lists of the index values"""
+        return self.__index_sets
+
+    @property
+    def shape(self):
+        """get the sizes of the index sets"""
+        return tuple(len(values) for values in self.__index_sets)
+
+    def __len__(self):
+        return self.__size
+
+    def __getitem__(self, key):
+        """
+        get the variable of the indices key
+
+        Raises:
+        KeyError: if an index is not in its index set
+        """
+        if not isinstance(key, tuple) or len(self.__positions) == 1:
+            key = (key,)
+        if len(key) != len(self.__positions):
+            raise KeyError(key)
+        offset = self.__start
+        for value, positions, stride in zip(key, self.__positions, self.__strides):
+            offset += positions[value] * stride
+        return Var(self.__table, offset)
+
+    def __iter__(self):
+        """iterate over the variables, the last index changing first"""
+        table = self.__table
+        return (Var(table, index) for index in range(self.__start, self.__start + self.__size))
+
+    def items(self):
+        """iterate over the tuples (indices, variable)"""
+        return zip(product(*self.__index_sets), self)
+
+
 class Var(Expr):
     """variable class
 
     Class that represents a Variable.
     This class should not be used directed, only via the model.add_var method.
 
+    A Var is a light handle on a row of the _VarTable of its model,
+    all its attributes are read from and written to the table.
+    It is hashed with its integer key, so that two variables of
+    different models with the same name are different keys
+    of a dictionary.
+
     Attributes:
     name: the name of the variable
     lb: the lower bound of the variable
     ub: the upper bound of the variable
-    vartype: the type of the variable, either continuous or integer
+    var_type: the type of the variable, either continuous or integer
     """
+    __slots__ = ('_table', '_index', '_key')
 
-    def __init__(self, name, lb, ub, var_type):
+    def __init__(self, table, index):
         """
         Initialize a Variable
 
-        :param name: string value for the variable name
-        :param lb/ub: double value for the lower/upper
-                bound of the variable, can be Inf
-        :param var_type: of VarType enum, defines if
-        integer/binary/continuous
+        :param table: the _VarTable of the model the variable belongs to
+        :param index: integer value for the index of the variable in the table
         """
-
-        super(Var, self).__init__()
-
-        check_instance(fct_name='create new Var()', value=name,
-                       name='name', type_=str)
-        check_instance(fct_name='create new Var()', value=lb,
-                       name='lb', type_=(float, int, Infinity,
-                                         NegInfinity))
-        check_instance(fct_name='create new Var()', value=ub,
-                       name='ub', type_=(float, int, Infinity,
-                                         NegInfinity))
-        check_instance(fct_name='create new Var()', value=var_type,
-                       name='var_type', type_=VarType)
-
-        self.__name = name
-        self.var_type = var_type
-        self.lb = lb
-        self.ub = ub
-        self.__value = None
-        self.variables = {self: 1}
+        self._table = table
+        self._index = index
+        self._key = (table.uid << _VarTable.KEY_SHIFT) | index
 
     def __hash__(self):
-        return hash(str(self.name))
+        return self._key
+
+    # a variable is the expression 1 * var, its terms are built when read
+    constant = property(lambda self: 0)
+    _size = property(lambda self: 1)
+    _merged = property(lambda self: True)
+    _version = property(lambda self: 0)
+    _vars = property(lambda self: [self])
+    _coefs = property(lambda self: array('d', [1]))
 
     @property
     def value(self):
@@ -744,39 +2589,417 @@ class Var(Expr):
         Raises:
         ValueError: if no value has been computed yet
         """
-        if self.__value is None:
-            return "not computed"
-        return self.__value
+        return _value_or_msg(self._table.values[self._index])
 
     def set_value(self, val):
         """internal method to set value of variable"""
-        self.__value = val
+        self._table.set_value(self._index, val)
 
     @property
     def name(self):
         """get the name of the variable"""
-        return self.__name
+        return self._table.names[self._index]
+
+    @property
+    def lb(self):
+        """get the lower bound of the variable"""
+        return _float_to_bound(self._table.lbs[self._index])
+
+    @lb.setter
+    def lb(self, lb):
+        """set the lower bound, the lp string of the bounds is computed again"""
+        self._table.set_lb(self._index, lb)
+
+    @property
+    def ub(self):
+        """get the upper bound of the variable"""
+        return _float_to_bound(self._table.ubs[self._index])
+
+    @ub.setter
+    def ub(self, ub):
+        """set the upper bound, the lp string of the bounds is computed again"""
+        self._table.set_ub(self._index, ub)
+
+    @property
+    def var_type(self):
+        """get the type of the variable"""
+        return VarType(self._table.types[self._index])
+
+    @var_type.setter
+    def var_type(self, var_type):
+        """set the type of the variable"""
+        self._table.set_type(self._index, var_type)
 
     def lpstr_bounds(self):
-        """build the lp string"""
-        return "{} <= {} <= {}".format(self.lb, self.name, self.ub)
+        """build the lp string, cached until a bound is modified"""
+        return self._table.lpstr_bounds(self._index)
 
     @property
     def is_integer(self):
-        return self.var_type == VarType.INTEGER
+        return self._table.types[self._index] == VarType.INTEGER.value
+
+    def get_copy(self):
+        """return an expression made of this variable only"""
+        expr = Expr()
+        expr._append_term(self, 1)
+        return expr
 
     def __iadd__(self, other):
         expr = self.get_copy()
         expr += other
         return expr
 
+    def __isub__(self, other):
+        expr = self.get_copy()
+        expr -= other
+        return expr
+
     def __imul__(self, other):
         expr = self.get_copy()
         expr *= other
         return expr
     
     def __str__(self):
-        return "".join([self.__name, " : ", str(self.__value)])
+        value = self._table.values[self._index]
+        return "".join([self.name, " : ", str(None if isnan(value) else value)])
+
+
+CSR_MATRIX = namedtuple('CsrMatrix', 'data indices indptr shape')
+
+
+class _ScenarioJob(object):
+    """
+    the problem of a scenario of a model, written once, given
+    to the client solving it in place of the model
+
+    Attributes:
+    file_name, compression: the ones of the model
+    interactive: False, the jobs of the scenarios print nothing
+    """
+
+    def __init__(self, model, chunks):
+        """
+        :param model: the model of the scenario
+        :param chunks: the list of the chunks of bytes of the problem
+        """
+        self.file_name = model.file_name
+        self.compression = model.compression
+        self.interactive = False
+        self.__chunks = chunks
+
+    def _iter_model_chunks(self):
+        """yield the chunks of the problem"""
+        return iter(self.__chunks)
+
+    def print_if_interactive(self, msg):
+        """print nothing, the scenarios are solved at the same time"""
+
+
+class _CsrBuilder(object):
+    """
+    build a matrix in the compressed sparse row form, row by row,
+    the cells of the row k being at the positions indptr[k] to indptr[k + 1]
+    """
+
+    def __init__(self):
+        self.data = array('d')
+        self.indices = array('l')
+        self.indptr = array('l', [0])
+        self.rhs = array('d')
+
+    def append(self, cols, coefs, rhs):
+        """add a row, with its right hand side"""
+        self.data.extend(coefs)
+        self.indices.extend(cols)
+        self.indptr.append(len(self.data))
+        self.rhs.append(rhs)
+
+    def to_csr(self, nb_cols):
+        """
+        return the scipy csr matrix built,
+        the CSR_MATRIX namedtuple of the arrays if scipy is not installed
+        """
+        shape = (len(self.rhs), nb_cols)
+        sparse = _get_scipy_sparse()
+        if sparse is None:
+            return CSR_MATRIX(self.data, self.indices, self.indptr, shape)
+        return sparse.csr_matrix((_as_vector(self.data), _as_vector(self.indices),
+                                  _as_vector(self.indptr)), shape=shape)
+
+
+def _as_vector(arr):
+    """return an array.array as a numpy array sharing its memory, if numpy is installed"""
+    np = _get_numpy()
+    if np is None:
+        return arr
+    return np.frombuffer(arr, dtype=arr.typecode)
+
+
+def _bound_to_float(bound):
+    """return the float value of a bound, +/-inf for INF"""
+    if isinstance(bound, Infinity):
+        return float('inf')
+    if isinstance(bound, NegInfinity):
+        return float('-inf')
+    return float(bound)
+
+
+def _float_to_bound(value):
+    """return the bound of a float value, INF for +/-inf"""
+    if value == float('inf'):
+        return INF
+    if value == float('-inf'):
+        return -INF
+    return value
+
+
+def _value_or_msg(value):
+    """return the value of a variable, 'not computed' if NaN"""
+    if isnan(value):
+        return "not computed"
+    return value
+
+
+def _format_number(value):
+    """
+    return the str value of a number, without '.0' for integral floats,
+    1e+20 and not 100000000000000000000
+    """
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return str(value)
+
+
+def _get_file_name(model_name):
+    """
+    return the file name of the model and its ending,
+    .lp is added to the model name unless it ends with .lp or .mps
+    """
+    for file_ending in [".lp", ".mps"]:
+        if model_name.endswith(file_ending):
+            return model_name, file_ending
+    return "".join([model_name, ".lp"]), ".lp"
+
+
+def _compact_number(value, precision=None):
+    """
+    return the shortest str value of a number, reading back the same float,
+    or rounded to precision significant digits
+
+    integral floats are written without '.0', 1e+20 and not 100000000000000000000
+    """
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        if precision is not None:
+            return "{:.{}g}".format(value, precision)
+        # float() for the subclasses of float, like numpy.float64
+        return repr(float(value))
+    return str(value)
+
+
+def _get_lp_number_format(fct_name, compact_lp, precision):
+    """
+    check the lp format options of a model and return
+    the function writing the numbers in the lp file
+
+    :param compact_lp: boolean, True for the compact lp format
+    :param precision: None, or the int number of significant digits
+    """
+    check_instance(fct_name=fct_name, value=compact_lp,
+                   name='compact_lp', type_=bool)
+    if precision is None:
+        return _compact_number if compact_lp else _format_number
+    check_instance(fct_name=fct_name, value=precision,
+                   name='precision', type_=int)
+    if not 1 <= precision <= 17:
+        raise ValueError("".join(["Could not ", fct_name, ", precision must be between 1 and 17,",
+                                  " not ", str(precision)]))
+    return partial(_compact_number, precision=precision)
+
+
+def _iter_compact_bounds(names, lbs, ubs, integers, format_number):
+    """
+    yield the Bounds, General and Binary sections of a lp file,
+    without the default bounds of the lp format, 0 <= x <= inf,
+    the variables between -inf and inf being written x free,
+    and the integer variables between 0 and 1 in the Binary section
+
+    the sections without any line are not written
+
+    :param names: list of the names of the variables
+    :param lbs, ubs: vectors of their bounds, +/-inf if none
+    :param integers: iterable of booleans, True for the integer variables
+    :param format_number: the function returning the str value of the numbers
+    """
+    generals, binaries = list(), list()
+    has_bounds = False
+    for name, lb, ub, integer in zip(names, lbs, ubs, integers):
+        if integer:
+            if lb == 0 and ub == 1:
+                binaries.append(name)
+                continue
+            generals.append(name)
+        if lb == 0 and ub == INF:
+            continue
+        if not has_bounds:
+            has_bounds = True
+            yield "Bounds"
+        if lb == -INF and ub == INF:
+            yield " ".join([name, "free"])
+        elif lb == ub:
+            yield " ".join([name, "=", format_number(lb)])
+        elif ub == INF:
+            yield " ".join([name, ">=", format_number(lb)])
+        elif lb == 0:
+            yield " ".join([name, "<=", format_number(ub)])
+        else:
+            yield "{} <= {} <= {}".format(format_number(lb), name, format_number(ub))
+    for section, section_names in [("General", generals), ("Binary", binaries)]:
+        if section_names:
+            yield section
+            for name in section_names:
+                yield name
+
+
+def _iter_lp_lines(problem, compact_lp=False, format_number=_format_number):
+    """
+    yield the lines of a problem written in the lp format
+
+    :param problem: MPS_PROBLEM namedtuple
+    :param compact_lp: boolean, True to write the bounds with _iter_compact_bounds
+    :param format_number: the function returning the str value of the numbers
+    """
+    names = problem.col_names
+    yield str(Direction.MAXIMIZE.value if problem.maximize else Direction.MINIMIZE.value)
+    cols = [col for col, coeff in enumerate(problem.obj) if coeff]
+    obj = _lpstr_terms((names[col] for col in cols), (problem.obj[col] for col in cols),
+                       format_number)
+    if problem.obj_constant or not obj:
+        constant = format_number(problem.obj_constant)
+        obj = " + ".join([obj, constant]) if obj else constant
+    yield obj
+
+    yield "Subject To"
+    for name, sense, rhs, (indices, coefs) in zip(problem.row_names, problem.senses,
+                                                  problem.rhs, problem.rows):
+        lhs = _lpstr_terms((names[index] for index in indices), coefs, format_number)
+        name_str = "{}: ".format(name) if name else ""
+        yield "{}{} {} {}".format(name_str, lhs, sense, format_number(rhs))
+    if compact_lp:
+        for line in _iter_compact_bounds(names, problem.lbs, problem.ubs,
+                                         problem.integers, format_number):
+            yield line
+        yield "End"
+        return
+    yield "Bounds"
+    for name, lb, ub in zip(names, problem.lbs, problem.ubs):
+        yield "{} <= {} <= {}".format(format_number(lb), name, format_number(ub))
+    yield "General"
+    for name, integer in zip(names, problem.integers):
+        if integer:
+            yield name
+    yield "End"
+
+
+def _get_index_sets(name, index_sets):
+    """
+    return the list of the lists of the index values of a family of variables
+
+    :param name: the name of the family, for the error messages
+    :param index_sets: a list of index sets, each one being an int n
+            for the values 0 to n - 1 or an iterable of values,
+            or a single int
+    """
+    if isinstance(index_sets, Integral):
+        index_sets = [index_sets]
+    res = list()
+    for values in index_sets:
+        values = list(range(values)) if isinstance(values, Integral) else list(values)
+        str_values = set(str(value) for value in values)
+        if len(str_values) != len(values):
+            raise ValueError("".join(["An index set of the family ", name,
+                                      " has duplicate values"]))
+        if any(":" in value for value in str_values):
+            raise ValueError("".join(["An index value of the family ", name,
+                                      " cannot contain ':'"]))
+        res.append(values)
+    return res
+
+
+def _get_bounds_array(bound, nb_vars, bound_name):
+    """
+    return the array('d') of the bounds of nb_vars variables,
+    +/-inf for INF
+
+    :param bound: a number or INF for all the variables, or a vector
+            (list or numpy array of any shape) of one bound per variable
+    :param bound_name: lb or ub, for the error messages
+    """
+    if isinstance(bound, (int, float, Infinity, NegInfinity)):
+        value = _bound_to_float(bound)
+        if isnan(value):
+            raise ValueError("".join(["The ", bound_name, " cannot be NaN"]))
+        return array('d', [value]) * nb_vars
+
+    if _is_numeric_array(bound) and not _is_sparse(bound):
+        np = _get_numpy()
+        values = np.ascontiguousarray(bound, dtype=np.float64).ravel()
+        has_nan = bool(np.isnan(values).any())
+        res = array('d')
+        res.frombytes(values.tobytes())
+    else:
+        res = array('d', map(_bound_to_float, bound))
+        has_nan = any(map(isnan, res))
+    if len(res) != nb_vars:
+        raise ValueError("".join(["The vector ", bound_name, " has ", str(len(res)),
+                                  " values, one per variable (", str(nb_vars),
+                                  ") is expected"]))
+    if has_nan:
+        raise ValueError("".join(["The vector ", bound_name, " cannot contain NaN"]))
+    return res
+
+
+def _get_state(side):
+    """
+    return what identifies the current value of one side of a constraint
+    or of the objective, to know if its cached lp string is still valid
+
+    :param side: an Expr or a number
+    """
+    if isinstance(side, Expr):
+        return (id(side), side._version, side.constant)
+    return side
+
+
+def _lpstr_terms(names, coeffs, format_number=_format_number):
+    """
+    return the lp string of a sum of terms, like '2 x - y + 3.5 z'
+
+    :param names: iterable of the str names of the variables
+    :param coeffs: iterable of their coefficients, in the same order
+    :param format_number: the function returning the str value of the numbers
+    """
+    res = []
+    for name, value in zip(names, coeffs):
+        res.append("+" if value >= 0 else "-")
+        if abs(value) != 1:
+            res.append(format_number(abs(value)))
+        res.append(name)
+    if res and res[0] == "+":
+        res = res[1:]
+    return " ".join(res)
+
+
+def _get_head(name):
+    """return the part of a name of variable before its first '_'"""
+    return name.partition("_")[0]
+
+
+def _get_family_names(name, index_sets):
+    """return the list of the names name_i_j of a family of variables"""
+    str_sets = [[str(value) for value in values] for values in index_sets]
+    return list(map("_".join, product([name], *str_sets)))
 
 
 def _build_name_index_tuples(name, index_max):
@@ -788,63 +3011,224 @@ def _build_name_index_tuples(name, index_max):
     return list(enumerate(names))
 
 
-def _build_expr_coeff_vars(lst_coeffs, lst_vars):
-    """return the expression given the lists of coefficient and variables"""
-    return sum(coeff * var for coeff, var in zip(lst_coeffs, lst_vars) if coeff != 0)
+def quicksum(iterable):
+    """
+    sum expressions, variables and numbers in one linear pass
+
+    sum() creates a new expression at each addition,
+    quicksum() appends all the terms to a single one
+
+    quicksum(2*x + 1 for x in lst_vars)
 
+    :param iterable: an iterable of Expr, Var or numbers
+    :return: the Expr of the sum
+    """
+    expr = Expr()
+    for elem in iterable:
+        if isinstance(elem, Var):
+            expr._append_term(elem, 1)
+        else:
+            expr += elem
+    return expr
 
-def _check_matrices(f, A, b, Aeq, beq, lb, ub, int_list, bin_list):
+
+def dot(coeffs, variables):
+    """
+    build the expression sum(coeffs[i] * variables[i]) in one linear pass
+    the terms with a coefficient equal to 0 are skipped
+
+    dot([2, 0, 3], [x, y, z]) is the expression 2 x + 3 z
+
+    :param coeffs: an iterable of numbers
+    :param variables: an iterable of Var (or Expr), same length as coeffs
+    :return: the Expr of the scalar product
+    """
+    expr = Expr()
+    for coeff, var in zip(coeffs, variables):
+        if coeff == 0:
+            continue
+        if isinstance(var, Var):
+            expr._append_term(var, coeff)
+        else:
+            expr += coeff * var
+    return expr
+
+
+def _iter_rows_coeffs_vars(mat, lst_vars):
+    """
+    yield for each row of the matrix its coefficients and the matching variables
+
+    for a scipy sparse matrix, only the stored cells of the row are returned
+
+    :param mat: a matrix-like, bi-dimensional instance made of doubles
+    :param lst_vars: the list of the variables, one per column
+    """
+    if _is_sparse(mat):
+        mat = mat.tocsr()
+        for start, end in zip(mat.indptr[:-1], mat.indptr[1:]):
+            cols = mat.indices[start:end]
+            yield mat.data[start:end], [lst_vars[col] for col in cols]
+    else:
+        for index in range(_get_nb_rows(mat)):
+            yield mat[index], lst_vars
+
+
+def _is_sparse(mat):
+    """return True if mat is a scipy sparse matrix"""
+    return hasattr(mat, 'tocsr') and hasattr(mat, 'nnz')
+
+
+def _is_numeric_array(arr):
+    """
+    return True if arr is a scipy sparse matrix or a numpy array
+    with a numeric dtype, which can be checked in a vectorised way
+    numpy arrays of objects (containing INF for instance) are not
+    """
+    if _is_sparse(arr):
+        return True
+    dtype = getattr(arr, 'dtype', None)
+    return dtype is not None and hasattr(arr, 'shape') and dtype.kind in 'biuf'
+
+
+def _get_nb_rows(mat):
+    """return the number of rows of a matrix-like or list-like instance"""
+    if hasattr(mat, 'shape'):
+        return mat.shape[0]
+    return len(mat)
+
+
+def _get_nb_cols(mat):
+    """return the number of columns of a matrix-like instance"""
+    if hasattr(mat, 'shape'):
+        return mat.shape[1]
+    return len(mat[0])
+
+
+def _as_list(lst):
+    """return a numpy array as a list of python numbers, lst unchanged otherwise"""
+    if hasattr(lst, 'tolist'):
+        return lst.tolist()
+    return lst
+
+
+def _check_matrices(f, A, b, Aeq, beq, lb, ub, int_list, bin_list,
+                    keep_arrays=False):
     """Check that the dimensions of the matrices match with each other
 
     Complete the vectors lb, ub, int_list, bin_list
     with values by default if they are shorter than the number of variables
+
+    :param keep_arrays: boolean, if True the numpy vectors which
+            do not need to be completed are returned unchanged
+    :return: the completed vectors lb, ub, int_list, bin_list
+            numpy arrays are returned as lists
     """
     __check_vector_attr(lst=f, lst_name='f')
     __check_matrix_attr(mat=A, mat_name='A')
-    __check_vector_attr(lst=b, lst_name='b')
+    __check_vector_attr(lst=b, lst_name='b', allow_inf=True)
 
-    nb_vars = len(f)
+    nb_vars = _get_nb_rows(f)
 
-    if len(A) != len(b):
+    if _get_nb_rows(A) != _get_nb_rows(b):
         raise ValueError("Input error : A and b are differently sized")
-    if len(A[0]) != nb_vars:
+    if _get_nb_cols(A) != nb_vars:
         raise ValueError("Input error : A and b are differently sized")
     if Aeq is not None:
         __check_matrix_attr(mat=Aeq, mat_name='Aeq')
-        __check_vector_attr(lst=beq, lst_name='beq')
+        __check_vector_attr(lst=beq, lst_name='beq', allow_inf=True)
 
-        if len(Aeq) not in [len(beq), 1]:
+        if _get_nb_rows(Aeq) not in [_get_nb_rows(beq), 1]:
             raise ValueError("Input error : Aeq and beq are differently sized")
-        if len(Aeq[0]) not in [nb_vars, 0]:
+        if _get_nb_cols(Aeq) not in [nb_vars, 0]:
             raise ValueError("Input error : Aeq and f are differently sized")
 
-    __check_vector_attr(lst=lb, lst_name='lb')
-    __check_vector_attr(lst=ub, lst_name='ub')
+    __check_vector_attr(lst=lb, lst_name='lb', allow_inf=True)
+    __check_vector_attr(lst=ub, lst_name='ub', allow_inf=True)
     __check_vector_attr(lst=int_list, lst_name='int_list')
     __check_vector_attr(lst=bin_list, lst_name='bin_list')
 
-    if not __check_complete_list(lb, nb_vars, -INF):
-        raise ValueError("Input error : the vector lb has too many values")
-    if not __check_complete_list(ub, nb_vars, INF):
-        raise ValueError("Input error : the vector ub has too many values")
-    if not __check_complete_list(int_list, nb_vars, 0):
-        raise ValueError("Input error : the vector int_list has too many values")
-    if not __check_complete_list(bin_list, nb_vars, 0):
-        raise ValueError("Input error : the vector bin_list has too many values")
+    vectors = list()
+    for vec, vec_name, def_value in [(lb, 'lb', -INF), (ub, 'ub', INF),
+                                     (int_list, 'int_list', 0),
+                                     (bin_list, 'bin_list', 0)]:
+        if not (keep_arrays and hasattr(vec, 'tolist') and len(vec) == nb_vars):
+            vec = _as_list(vec)
+            if not __check_complete_list(vec, nb_vars, def_value):
+                raise ValueError("".join(["Input error : the vector ", vec_name,
+                                          " has too many values"]))
+        vectors.append(vec)
+    lb, ub, int_list, bin_list = vectors
 
     if 1 in [i for i, j in zip(int_list, bin_list) if i == j]:
         raise ValueError("Input error : some variables are both integer and binary")
 
+    return lb, ub, int_list, bin_list
+
 
-def __check_vector_attr(lst, lst_name):
+def __check_array_attr(arr, arr_name, nb_dims, allow_inf):
+    """
+    Check a numpy array or a scipy sparse matrix in one vectorised pass:
+    its number of dimensions, that its values are numeric
+    and that there is no NaN, nor infinity if not allowed
+
+    :param arr: input to check
+    :param arr_name: its name, to be noticed in the error message
+    :param nb_dims: 1 for a row-like input, 2 for a matrix-like one
+    :param allow_inf: boolean, True if the values can be infinite
+    """
+    # numpy is installed, the input is one of its arrays
+    import numpy as np
+
+    if len(arr.shape) != nb_dims:
+        __raise_input_type_error("".join(["It should have ", str(nb_dims),
+                                          " dimension(s), here its shape is ",
+                                          str(arr.shape)]),
+                                 arr, arr_name)
+    if _is_sparse(arr):
+        arr = arr.tocoo()
+        values = arr.data
+    else:
+        values = arr
+    if values.dtype.kind not in 'biuf':
+        __raise_input_type_error("".join(["All the values should be numeric, ",
+                                          "here the dtype is ", str(values.dtype)]),
+                                 arr, arr_name)
+
+    if values.dtype.kind != 'f':
+        return
+    wrong_cells = np.isnan(values) if allow_inf else ~np.isfinite(values)
+    if not wrong_cells.any():
+        return
+
+    pos = np.flatnonzero(wrong_cells)[0]
+    if _is_sparse(arr):
+        cell = [arr.row[pos], arr.col[pos]]
+    else:
+        cell = np.unravel_index(pos, values.shape)
+    msg = "All the values should be numeric" + (" or INF" if allow_inf else ", not infinite")
+    __raise_input_type_error("\n".join([msg,
+                                        "".join(["The cell involved is the cell ",
+                                                 str([int(i) for i in cell])])]),
+                             values.flat[pos], arr_name)
+
+
+def __check_vector_attr(lst, lst_name, allow_inf=False):
     """
     Check the fact that the input is actually a row-like instance
     Must be able to be called in len(), and to call lst[i]
     and must contains only double values, or infinity
 
+    numpy arrays are checked in one vectorised pass,
+    the other inputs cell by cell
+
     :param lst: input to check
     :param lst_name: its name, to be noticed in the error message
+    :param allow_inf: for numpy arrays, True if the values can be infinite
     """
+    if _is_numeric_array(lst):
+        __check_array_attr(lst, lst_name, nb_dims=1, allow_inf=allow_inf)
+        return
+
     try:
         nb_rws = len(lst)
     except:
@@ -880,9 +3264,15 @@ def __check_matrix_attr(mat, mat_name):
     (like __check_vector_attr) but with only double
     values without infinity
 
+    numpy arrays and scipy sparse matrices are checked
+    in one vectorised pass, the other inputs cell by cell
+
     :param mat: input to check
     :param mat_name: its name, to be noticed in the error message
     """
+    if _is_numeric_array(mat):
+        __check_array_attr(mat, mat_name, nb_dims=2, allow_inf=False)
+        return
 
     try:
         nb_rws = len(mat)
@@ -0,0 +1,458 @@
+# -*- coding: utf-8 -*-
+"""Module for the MPS format
+
+This module writes and reads linear problems in the MPS format,
+free or fixed, line by line, so that the whole problem file is never
+built or loaded in memory as one string.
+
+The problems are exchanged as a MPS_PROBLEM namedtuple:
+    name: the name of the problem
+    maximize: True if the objective is maximized
+    obj_constant: the constant of the objective
+    obj: vector of the objective coefficients, one per column
+    col_names: list of the names of the columns (variables)
+    lbs, ubs: vectors of the bounds of the columns, +/-inf if none
+    integers: vector of booleans, True for the integer columns
+    row_names: list of the names of the rows (constraints), None if not named
+    senses: list of the str values of the operators of the rows, <=, = or >=
+    rhs: vector of the right hand sides of the rows
+    rows: list of tuples (columns, coefficients) of the non zero cells, one per row
+
+iter_mps_lines only reads senses, rhs and rows once, in order: they can be
+iterators (generators), so that the rows of a problem are never stored
+as python objects, and the names, obj and integers can be any sequence.
+"""
+
+from array import array
+from collections import namedtuple
+
+MPS_PROBLEM = namedtuple('MpsProblem', 'name maximize obj_constant obj col_names '
+                                       'lbs ubs integers row_names senses rhs rows')
+OBJ_ROW_NAME = "obj"
+RHS_NAME = "RHS"
+BOUND_NAME = "BND"
+DEFAULT_ROW_NAME = "c"
+SENSE_CODES = {"<=": "L", "=": "E", ">=": "G"}
+CODE_SENSES = {"L": "<=", "E": "=", "G": ">="}
+FIXED_NAME_SIZE = 8
+FIXED_NUMBER_SIZE = 12
+SECTIONS = ["NAME", "OBJSENSE", "ROWS", "COLUMNS", "RHS",
+            "RANGES", "BOUNDS", "ENDATA"]
+
+INF = float('inf')
+
+
+def iter_mps_lines(problem, fixed=False):
+    """
+    yield the lines of the problem written in the MPS format,
+    the matrix being written column by column
+
+    :param problem: MPS_PROBLEM namedtuple
+    :param fixed: boolean, True for the fixed MPS format, in which
+            the names must not be longer than 8 characters,
+            False for the free MPS format
+    """
+    def line(code, *fields):
+        return _format_line(code, fields, fixed)
+
+    row_names = _complete_row_names(problem.row_names)
+    yield " ".join(["NAME", problem.name]).rstrip()
+    if problem.maximize:
+        yield "OBJSENSE"
+        yield "    MAX"
+
+    yield "ROWS"
+    yield line("N", OBJ_ROW_NAME)
+    for name, sense in zip(row_names, problem.senses):
+        yield line(SENSE_CODES[str(sense)], name)
+
+    yield "COLUMNS"
+    starts, row_indices, coefs = _transpose(problem.rows, len(problem.col_names))
+    in_integers = False
+    for col, name in enumerate(problem.col_names):
+        if bool(problem.integers[col]) != in_integers:
+            in_integers = not in_integers
+            yield line("", "MARKER", "'MARKER'", "",
+                       "'INTORG'" if in_integers else "'INTEND'")
+        obj_coeff = problem.obj[col]
+        if obj_coeff or starts[col] == starts[col + 1]:
+            yield line("", name, OBJ_ROW_NAME, obj_coeff)
+        for pos in range(starts[col], starts[col + 1]):
+            yield line("", name, row_names[row_indices[pos]], coefs[pos])
+    if in_integers:
+        yield line("", "MARKER", "'MARKER'", "", "'INTEND'")
+
+    yield "RHS"
+    if problem.obj_constant:
+        yield line("", RHS_NAME, OBJ_ROW_NAME, -problem.obj_constant)
+    for name, value in zip(row_names, problem.rhs):
+        if value:
+            yield line("", RHS_NAME, name, value)
+
+    yield "BOUNDS"
+    for name, lb, ub, integer in zip(problem.col_names, problem.lbs,
+                                     problem.ubs, problem.integers):
+        for code, value in _iter_bounds(lb, ub, integer):
+            yield line(code, BOUND_NAME, name, value)
+    yield "ENDATA"
+
+
+def read_mps(file_path):
+    """
+    read a problem written in the MPS format, free or fixed,
+    line by line
+
+    The fields are separated by blanks, so the names must not contain
+    any space, even in the fixed format. The data lines may not be
+    indented, as in some free MPS files. The RANGES section
+    and the semi-continuous bounds are not supported.
+    The columns without bounds are between 0 and infinity,
+    the rows without right hand side are equal to 0.
+
+    :param file_path: string value of the path to the file
+    :return: MPS_PROBLEM namedtuple
+    """
+    reader = _MpsReader()
+    with open(file_path, 'r') as f:
+        for line_nb, line in enumerate(f, start=1):
+            try:
+                if not reader.read_line(line):
+                    break
+            except (KeyError, IndexError, ValueError) as err:
+                raise ValueError("".join(["Could not read the MPS file ", file_path,
+                                          ", line ", str(line_nb), " : ",
+                                          line.strip(), "\n", str(err)]))
+    return reader.get_problem()
+
+
+class _MpsReader(object):
+    """
+    state of the reading of a MPS file, filled line by line
+
+    The rows are built while the columns are read, so that the matrix
+    is never stored in another form than the one of MPS_PROBLEM.rows.
+    """
+
+    def __init__(self):
+        self.name = ""
+        self.maximize = False
+        self.obj_constant = 0
+        self.obj_name = None
+        self.section = None
+        self.in_integers = False
+        self.obj = array('d')
+        self.col_names = list()
+        self.col_indices = dict()
+        self.lbs = array('d')
+        self.ubs = array('d')
+        self.integers = array('b')
+        self.row_names = list()
+        self.row_indices = dict()
+        self.senses = list()
+        self.rhs = array('d')
+        self.rows = list()
+
+    def get_problem(self):
+        """return the MPS_PROBLEM namedtuple read"""
+        return MPS_PROBLEM(self.name, self.maximize, self.obj_constant, self.obj,
+                           self.col_names, self.lbs, self.ubs, self.integers,
+                           self.row_names, self.senses, self.rhs, self.rows)
+
+    def read_line(self, line):
+        """
+        read one line of the file
+
+        :return: False once the end of the file (ENDATA) is reached
+        """
+        if not line.strip() or line.startswith("*"):
+            return True
+        tokens = line.split()
+        # the data lines of the free format may not be indented
+        if not line[0].isspace() and (self.section is None or _is_header(tokens, self.section)):
+            return self.__read_section(tokens)
+        if self.section == "OBJSENSE":
+            self.maximize = tokens[0].upper() in ["MAX", "MAXIMIZE"]
+        elif self.section == "ROWS":
+            self.__read_row(tokens)
+        elif self.section == "COLUMNS":
+            self.__read_column(tokens)
+        elif self.section == "RHS":
+            self.__read_rhs(tokens)
+        elif self.section == "BOUNDS":
+            self.__read_bound(tokens)
+        else:
+            raise ValueError("unexpected line in the section {}".format(self.section))
+        return True
+
+    def __read_section(self, tokens):
+        """read the header of a section"""
+        section = tokens[0].upper()
+        if section not in SECTIONS:
+            raise ValueError("unknown section {}".format(tokens[0]))
+        if section == "RANGES":
+            raise ValueError("the RANGES section is not supported")
+        self.section = section
+        if section == "NAME":
+            self.name = " ".join(tokens[1:])
+        elif section == "OBJSENSE" and len(tokens) > 1:
+            self.maximize = tokens[1].upper() in ["MAX", "MAXIMIZE"]
+        return section != "ENDATA"
+
+    def __read_row(self, tokens):
+        """read a row type and its name"""
+        code, name = tokens[0].upper(), tokens[1]
+        if code == "N":
+            if self.obj_name is None:
+                self.obj_name = name
+            else:
+                # other free rows are not constraints, they are ignored
+                self.row_indices[name] = None
+            return
+        self.row_indices[name] = len(self.row_names)
+        self.row_names.append(name)
+        self.senses.append(CODE_SENSES[code])
+        self.rhs.append(0)
+        self.rows.append((array('l'), array('d')))
+
+    def __read_column(self, tokens):
+        """read the coefficients of a column, or an integer marker"""
+        if len(tokens) >= 3 and tokens[1].strip("'").upper() == "MARKER":
+            self.in_integers = tokens[2].strip("'").upper() == "INTORG"
+            return
+        name = tokens[0]
+        col = self.col_indices.get(name)
+        if col is None:
+            col = self.__add_column(name)
+        for row_name, value in _iter_pairs(tokens[1:]):
+            if row_name == self.obj_name:
+                self.obj[col] += value
+                continue
+            row = self.row_indices[row_name]
+            if row is not None:
+                indices, coefs = self.rows[row]
+                indices.append(col)
+                coefs.append(value)
+
+    def __add_column(self, name):
+        """add a column, with the default bounds 0 and infinity"""
+        col = len(self.col_names)
+        self.col_indices[name] = col
+        self.col_names.append(name)
+        self.obj.append(0)
+        self.lbs.append(0)
+        self.ubs.append(INF)
+        self.integers.append(self.in_integers)
+        return col
+
+    def __read_rhs(self, tokens):
+        """read the right hand sides, the name of the set is optional"""
+        if len(tokens) % 2:
+            tokens = tokens[1:]
+        for row_name, value in _iter_pairs(tokens):
+            if row_name == self.obj_name:
+                self.obj_constant = -value
+                continue
+            row = self.row_indices[row_name]
+            if row is not None:
+                self.rhs[row] = value
+
+    def __read_bound(self, tokens):
+        """read a bound of a column, the name of the set is optional"""
+        code = tokens[0].upper()
+        nb_values = 0 if code in ["FR", "MI", "PL", "BV"] else 1
+        args = tokens[1:]
+        if len(args) > 1 + nb_values:
+            args = args[1:]
+        col = self.col_indices[args[0]]
+        value = float(args[1]) if nb_values else None
+        if code == "UP":
+            self.ubs[col] = value
+        elif code == "LO":
+            self.lbs[col] = value
+        elif code == "FX":
+            self.lbs[col] = value
+            self.ubs[col] = value
+        elif code == "FR":
+            self.lbs[col] = -INF
+            self.ubs[col] = INF
+        elif code == "MI":
+            self.lbs[col] = -INF
+        elif code == "PL":
+            self.ubs[col] = INF
+        elif code == "BV":
+            self.lbs[col] = 0
+            self.ubs[col] = 1
+            self.integers[col] = True
+        elif code == "LI":
+            self.lbs[col] = value
+            self.integers[col] = True
+        elif code == "UI":
+            self.ubs[col] = value
+            self.integers[col] = True
+        else:
+            raise ValueError("the bound type {} is not supported".format(tokens[0]))
+
+
+def _iter_pairs(tokens):
+    """yield the pairs (name, value) of a data line"""
+    for index in range(0, len(tokens) - 1, 2):
+        yield tokens[index], float(tokens[index + 1])
+
+
+def _iter_bounds(lb, ub, integer):
+    """
+    yield the pairs (bound type, value) describing the bounds of a column,
+    the value being '' if the bound type has none
+
+    the integer columns without upper bound are written PL, as some
+    solvers give the upper bound 1 to integer columns by default
+    """
+    if lb == ub:
+        yield "FX", lb
+        return
+    if lb == -INF and ub == INF:
+        yield "FR", ""
+        return
+    if lb == -INF:
+        yield "MI", ""
+    elif lb != 0 or ub < 0:
+        yield "LO", lb
+    if ub != INF:
+        yield "UP", ub
+    elif integer:
+        yield "PL", ""
+
+
+def _transpose(rows, nb_cols):
+    """
+    return the matrix given row by row in the compressed sparse column form
+
+    :param rows: iterable of tuples (columns, coefficients), one per row,
+            read once
+    :param nb_cols: the number of columns
+    :return: tuple (starts, row_indices, coefs) of arrays, the cells of the
+            column col being at the positions starts[col] to starts[col + 1]
+    """
+    # the rows are first stored in the compressed sparse row form
+    indptr, indices, values = array('l', [0]), array('l'), array('d')
+    for cols, coefs in rows:
+        indices.extend(cols)
+        values.extend(coefs)
+        indptr.append(len(indices))
+
+    starts = array('l', [0]) * (nb_cols + 1)
+    for col in indices:
+        starts[col + 1] += 1
+    for col in range(nb_cols):
+        starts[col + 1] += starts[col]
+
+    nb_cells = starts[nb_cols]
+    row_indices = array('l', [0]) * nb_cells
+    coefs = array('d', [0]) * nb_cells
+    next_pos = array('l', starts)
+    for row in range(len(indptr) - 1):
+        for cell in range(indptr[row], indptr[row + 1]):
+            col = indices[cell]
+            pos = next_pos[col]
+            row_indices[pos] = row
+            coefs[pos] = values[cell]
+            next_pos[col] = pos + 1
+    return starts, row_indices, coefs
+
+
+def _is_header(tokens, section):
+    """
+    return True if the tokens of a line without indentation are the
+    header of a section: NAME or OBJSENSE followed by their value, or a
+    single word (a header of an unknown section being a single word as
+    well), except the value of the OBJSENSE section
+
+    :param tokens: the tokens of the line
+    :param section: the section being read
+    """
+    word = tokens[0].upper()
+    if len(tokens) == 1:
+        return section != "OBJSENSE" or word in SECTIONS
+    return word == "NAME" or (word == "OBJSENSE" and len(tokens) == 2)
+
+
+def _complete_row_names(row_names):
+    """
+    return the names of the rows, the rows without name being named c<index>
+    and the rows named as the objective row or as a previous row being
+    renamed (all prefixed by '_' as long as their name is already used),
+    row_names itself if all the rows have distinct names, none being
+    the one of the objective row
+    """
+    used = set(name for name in row_names if name)
+    if all(row_names) and len(used) == len(row_names) and OBJ_ROW_NAME not in used:
+        return row_names
+    used.add(OBJ_ROW_NAME)
+    written = set()
+    names = list()
+    for index, name in enumerate(row_names):
+        if not name or name == OBJ_ROW_NAME or name in written:
+            name = name or "".join([DEFAULT_ROW_NAME, str(index)])
+            while name in used:
+                name = "".join(["_", name])
+            used.add(name)
+        written.add(name)
+        names.append(name)
+    return names
+
+
+def _format_line(code, fields, fixed):
+    """
+    return a data line of a MPS file
+
+    :param code: the row or bound type, '' for the other sections
+    :param fields: the names and the numbers of the line, in the order
+            of the MPS fields: name, name, number, name, number
+    :param fixed: boolean, True for the fixed MPS format
+    """
+    if not fixed:
+        fields = [_format_mps_number(field) if _is_number(field) else field
+                  for field in fields]
+        return " " + " ".join([field for field in [code] + fields if field != ""])
+
+    fields = list(fields) + [""] * (5 - len(fields))
+    for pos, size in [(0, FIXED_NAME_SIZE), (1, FIXED_NAME_SIZE), (3, FIXED_NAME_SIZE)]:
+        if len(fields[pos]) > size:
+            raise ValueError("".join(["The name ", fields[pos], " is too long",
+                                      " for the fixed MPS format, ",
+                                      str(size), " characters at most"]))
+    for pos in [2, 4]:
+        if _is_number(fields[pos]):
+            fields[pos] = _fixed_number(fields[pos])
+    return " {:<2} {:<8}  {:<8}  {:>12}   {:<8}  {:>12}".format(code, *fields).rstrip()
+
+
+def _is_number(field):
+    """return True if the field is a number, and not a str value"""
+    return not isinstance(field, str)
+
+
+def _format_mps_number(value):
+    """
+    return the str value of a number, without '.0' for integral floats,
+    1e+20 and not 100000000000000000000
+    """
+    value = float(value)
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _fixed_number(value):
+    """
+    return the str value of a number, on 12 characters at most,
+    rounded if needed
+    """
+    value_str = _format_mps_number(value)
+    precision = FIXED_NUMBER_SIZE
+    while len(value_str) > FIXED_NUMBER_SIZE and precision > 1:
+        precision -= 1
+        value_str = "{:.{}g}".format(float(value), precision)
+    if len(value_str) > FIXED_NUMBER_SIZE:
+        raise ValueError("The value {} cannot be written in the fixed MPS format".format(value))
+    return value_str
@@ -0,0 +1,418 @@
+# -*- coding: utf-8 -*-
+"""Module for the presolve of the MIP models
+
+This module reduces a linear problem, given as a MPS_PROBLEM namedtuple
+(see mpsformat), before it is sent to the Solve Engine:
+    - the zero coefficients are removed,
+    - the fixed columns (lb == ub) are replaced by their value,
+    - the rows with a single column become bounds of this column,
+    - the empty rows, the rows always satisfied within the bounds of
+      their columns and the duplicate rows are removed.
+
+The reduced problem keeps the names of the columns, so that the values
+returned by the solver are matched with the columns by name: the
+postsolve only adds the values of the removed columns. Their contribution
+to the objective is added to its constant, so that the objective value
+returned by the solver is the one of the original problem.
+
+This module also tightens the bounds of the columns by propagating
+the minimal and maximal activities of the rows (propagate_bounds).
+"""
+
+from array import array
+from collections import namedtuple
+from math import ceil, floor
+
+from .mpsformat import MPS_PROBLEM, _transpose
+
+PRESOLVED = namedtuple('Presolved', 'problem fixed_cols fixed_values stats')
+PRESOLVE_STATS = namedtuple('PresolveStats', 'removed_cols removed_rows zero_coefs '
+                                             'singleton_rows empty_rows redundant_rows '
+                                             'duplicate_rows')
+PROPAGATED = namedtuple('Propagated', 'lbs ubs stats')
+PROPAGATION_STATS = namedtuple('PropagationStats', 'tightened_bounds fixed_cols passes')
+TOLERANCE = 1e-9
+# a bound of a continuous column is only tightened if it moves by more than this ratio
+MIN_IMPROVEMENT = 1e-6
+MAX_PASSES = 20
+
+INF = float('inf')
+
+
+def presolve(problem):
+    """
+    reduce the problem, see the description of the module
+
+    :param problem: MPS_PROBLEM namedtuple, it is not modified
+    :return: PRESOLVED namedtuple
+        problem: the reduced MPS_PROBLEM
+        fixed_cols, fixed_values: arrays of the indices of the removed
+            columns in the original problem, and of their values
+        stats: PRESOLVE_STATS namedtuple, the number of columns and rows
+            removed, and for each reduction the number of rows or
+            coefficients concerned
+
+    Raises:
+    ValueError: if the problem is found infeasible
+    """
+    return _Presolver(problem).run()
+
+
+class _Presolver(object):
+    """
+    state of the presolve of a problem
+
+    The rows are reduced pass after pass, until a pass does not
+    turn any row into a bound: a bound can fix a column, and a fixed
+    column can turn other rows into singleton rows.
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.lbs = array('d', problem.lbs)
+        self.ubs = array('d', problem.ubs)
+        self.rows = list(problem.rows)
+        self.senses = [str(sense) for sense in problem.senses]
+        self.rhs = array('d', problem.rhs)
+        self.active = bytearray(b'\x01') * len(self.rows)
+        self.counts = dict((field, 0) for field in PRESOLVE_STATS._fields)
+
+    def run(self):
+        """presolve the problem and return the PRESOLVED namedtuple"""
+        while self.__reduce_rows():
+            pass
+        self.__remove_duplicate_rows()
+        return self.__build_result()
+
+    def __reduce_rows(self):
+        """
+        reduce each active row once
+
+        :return: True if a row has been turned into a bound
+        """
+        lbs, ubs = self.lbs, self.ubs
+        changed = False
+        for row in range(len(self.rows)):
+            if not self.active[row]:
+                continue
+            cols, coefs = self.rows[row]
+            if any(not coef or lbs[col] == ubs[col] for col, coef in zip(cols, coefs)):
+                cols, coefs = self.__remove_fixed_terms(row, cols, coefs)
+                self.rows[row] = (cols, coefs)
+
+            if not cols:
+                self.__check_empty_row(row)
+                self.active[row] = False
+                self.counts["empty_rows"] += 1
+            elif len(cols) == 1:
+                self.__set_bounds(row, cols[0], coefs[0])
+                self.active[row] = False
+                self.counts["singleton_rows"] += 1
+                changed = True
+            elif self.__is_redundant(row, cols, coefs):
+                self.active[row] = False
+                self.counts["redundant_rows"] += 1
+        return changed
+
+    def __remove_fixed_terms(self, row, cols, coefs):
+        """
+        return the arrays of the terms of a row without the zero coefficients
+        and the fixed columns, whose values are moved to the right hand side
+        """
+        new_cols, new_coefs = array('l'), array('d')
+        for col, coef in zip(cols, coefs):
+            if not coef:
+                self.counts["zero_coefs"] += 1
+            elif self.lbs[col] == self.ubs[col]:
+                self.rhs[row] -= coef * self.lbs[col]
+            else:
+                new_cols.append(col)
+                new_coefs.append(coef)
+        return new_cols, new_coefs
+
+    def __check_empty_row(self, row):
+        """check that the row 0 (sense) rhs is satisfied"""
+        sense, rhs = self.senses[row], self.rhs[row]
+        if ((sense == "<=" and rhs < -TOLERANCE) or (sense == ">=" and rhs > TOLERANCE)
+                or (sense == "=" and abs(rhs) > TOLERANCE)):
+            self.__raise_infeasible(row, "it has no variable")
+
+    def __set_bounds(self, row, col, coef):
+        """turn the row coef * x[col] (sense) rhs into bounds of the column"""
+        sense, bound = self.senses[row], self.rhs[row] / coef
+        if coef < 0 and sense != "=":
+            sense = "<=" if sense == ">=" else ">="
+        lb, ub = self.lbs[col], self.ubs[col]
+        if sense in ["<=", "="]:
+            ub = min(ub, bound)
+        if sense in [">=", "="]:
+            lb = max(lb, bound)
+        if self.problem.integers[col]:
+            lb = ceil(lb - TOLERANCE) if lb != -INF else lb
+            ub = floor(ub + TOLERANCE) if ub != INF else ub
+        if lb > ub + TOLERANCE * max(1, abs(ub)):
+            self.__raise_infeasible(row, "it does not match the bounds of its variable")
+        # bounds equal up to the tolerance fix the column
+        self.lbs[col], self.ubs[col] = min(lb, ub), ub
+
+    def __is_redundant(self, row, cols, coefs):
+        """
+        return True if the row is satisfied for any value of its columns
+        within their bounds, from the minimal and maximal activities of the row
+
+        Raises:
+        ValueError: if the row cannot be satisfied within these bounds
+        """
+        min_activity = max_activity = 0
+        for col, coef in zip(cols, coefs):
+            if not coef:
+                # 0 * inf is nan
+                continue
+            if coef > 0:
+                min_activity += coef * self.lbs[col]
+                max_activity += coef * self.ubs[col]
+            else:
+                min_activity += coef * self.ubs[col]
+                max_activity += coef * self.lbs[col]
+        sense, rhs = self.senses[row], self.rhs[row]
+        tolerance = TOLERANCE * max(1, abs(rhs))
+        if ((sense != ">=" and min_activity > rhs + tolerance)
+                or (sense != "<=" and max_activity < rhs - tolerance)):
+            self.__raise_infeasible(row, "it cannot be satisfied within the bounds of its variables")
+        if sense == "<=":
+            return max_activity <= rhs + tolerance
+        if sense == ">=":
+            return min_activity >= rhs - tolerance
+        return max_activity - min_activity <= tolerance
+
+    def __remove_duplicate_rows(self):
+        """
+        remove the rows with the same terms and the same sense as another one,
+        the right hand side kept being the tightest one
+        """
+        first_rows = dict()
+        for row in range(len(self.rows)):
+            if not self.active[row]:
+                continue
+            cols, coefs = self.rows[row]
+            key = (self.senses[row], tuple(sorted(zip(cols, coefs))))
+            first = first_rows.setdefault(key, row)
+            if first == row:
+                continue
+            sense, rhs = self.senses[row], self.rhs[row]
+            if sense == "<=":
+                self.rhs[first] = min(self.rhs[first], rhs)
+            elif sense == ">=":
+                self.rhs[first] = max(self.rhs[first], rhs)
+            elif abs(self.rhs[first] - rhs) > TOLERANCE * max(1, abs(rhs)):
+                self.__raise_infeasible(row, "another row has the same terms and another value")
+            self.active[row] = False
+            self.counts["duplicate_rows"] += 1
+
+    def __build_result(self):
+        """build the reduced problem, the postsolve map and the statistics"""
+        problem, lbs, ubs = self.problem, self.lbs, self.ubs
+        new_cols = array('l', [-1]) * len(lbs)
+        kept_cols, fixed_cols, fixed_values = list(), array('l'), array('d')
+        obj_constant = problem.obj_constant
+        for col in range(len(lbs)):
+            if lbs[col] == ubs[col]:
+                fixed_cols.append(col)
+                fixed_values.append(lbs[col])
+                obj_constant += problem.obj[col] * lbs[col]
+            else:
+                new_cols[col] = len(kept_cols)
+                kept_cols.append(col)
+
+        kept_rows = [row for row in range(len(self.rows)) if self.active[row]]
+        rows = [(array('l', [new_cols[col] for col in self.rows[row][0]]), self.rows[row][1])
+                for row in kept_rows]
+        reduced = MPS_PROBLEM(problem.name, problem.maximize, obj_constant,
+                              array('d', [problem.obj[col] for col in kept_cols]),
+                              [problem.col_names[col] for col in kept_cols],
+                              array('d', [lbs[col] for col in kept_cols]),
+                              array('d', [ubs[col] for col in kept_cols]),
+                              array('b', [bool(problem.integers[col]) for col in kept_cols]),
+                              [problem.row_names[row] for row in kept_rows],
+                              [problem.senses[row] for row in kept_rows],
+                              array('d', [self.rhs[row] for row in kept_rows]),
+                              rows)
+        self.counts["removed_cols"] = len(fixed_cols)
+        self.counts["removed_rows"] = len(self.rows) - len(kept_rows)
+        return PRESOLVED(reduced, fixed_cols, fixed_values, PRESOLVE_STATS(**self.counts))
+
+    def __raise_infeasible(self, row, reason):
+        """raise the ValueError of an infeasible problem, found with the row"""
+        name = self.problem.row_names[row]
+        raise ValueError("".join(["The problem is infeasible, found by the presolve: the constraint ",
+                                  name if name else "".join(["of index ", str(row)]), " ", reason]))
+
+
+def propagate_bounds(problem, max_passes=MAX_PASSES):
+    """
+    tighten the bounds of the columns from the rows: for a row
+    sum(a[j] * x[j]) <= b, each term is at most b minus the minimal
+    activity of the other terms, computed with the bounds of their columns
+    (and symmetrically for >= and = rows)
+
+    The rows of the columns whose bounds have been tightened are
+    propagated again, pass after pass, until no bound changes or
+    max_passes passes have been done.
+    The bounds of the integer columns are rounded.
+
+    :param problem: MPS_PROBLEM namedtuple, it is not modified
+    :param max_passes: the maximal number of passes over the rows
+    :return: PROPAGATED namedtuple
+        lbs, ubs: arrays of the tightened bounds
+        stats: PROPAGATION_STATS namedtuple, the number of bounds tightened,
+            of columns fixed (lb == ub) and of passes done
+
+    Raises:
+    ValueError: if the problem is found infeasible
+    """
+    return _Propagator(problem).run(max_passes)
+
+
+class _Propagator(object):
+    """
+    state of the propagation of the bounds of a problem,
+    with the rows of each column to know which rows to propagate again
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.lbs = array('d', problem.lbs)
+        self.ubs = array('d', problem.ubs)
+        self.senses = [str(sense) for sense in problem.senses]
+        self.col_starts, self.col_rows, _ = _transpose(problem.rows, len(self.lbs))
+        self.tightened_bounds = 0
+
+    def run(self, max_passes):
+        """propagate the rows and return the PROPAGATED namedtuple"""
+        rows = range(len(self.problem.rows))
+        passes = 0
+        while rows and passes < max_passes:
+            passes += 1
+            changed_cols = set()
+            for row in rows:
+                changed_cols.update(self.__propagate_row(row))
+            next_rows = set()
+            for col in changed_cols:
+                next_rows.update(self.col_rows[self.col_starts[col]:self.col_starts[col + 1]])
+            rows = sorted(next_rows)
+
+        fixed_cols = sum(1 for col, (lb, ub) in enumerate(zip(self.lbs, self.ubs))
+                         if lb == ub and self.problem.lbs[col] != self.problem.ubs[col])
+        return PROPAGATED(self.lbs, self.ubs,
+                          PROPAGATION_STATS(self.tightened_bounds, fixed_cols, passes))
+
+    def __propagate_row(self, row):
+        """
+        tighten the bounds of the columns of a row
+
+        :return: the list of the columns whose bounds have been tightened
+        """
+        cols, coefs = self.problem.rows[row]
+        lbs, ubs = self.lbs, self.ubs
+        sense, rhs = self.senses[row], self.problem.rhs[row]
+        # activities without the infinite terms, and the numbers of infinite terms
+        min_act = max_act = 0
+        min_inf = max_inf = 0
+        for col, coef in zip(cols, coefs):
+            if not coef:
+                # 0 * inf is nan
+                continue
+            low, up = (coef * lbs[col], coef * ubs[col]) if coef > 0 else \
+                (coef * ubs[col], coef * lbs[col])
+            if low == -INF:
+                min_inf += 1
+            else:
+                min_act += low
+            if up == INF:
+                max_inf += 1
+            else:
+                max_act += up
+
+        tolerance = TOLERANCE * max(1, abs(rhs))
+        if ((sense != ">=" and not min_inf and min_act > rhs + tolerance)
+                or (sense != "<=" and not max_inf and max_act < rhs - tolerance)):
+            self.__raise_infeasible(row, None)
+
+        changed_cols = list()
+        for col, coef in zip(cols, coefs):
+            if not coef:
+                continue
+            low, up = (coef * lbs[col], coef * ubs[col]) if coef > 0 else \
+                (coef * ubs[col], coef * lbs[col])
+            new_lb, new_ub = -INF, INF
+            if sense != ">=":
+                # coef * x <= rhs - the minimal activity of the other terms
+                rest = _residual(min_act, min_inf, low)
+                if rest is not None:
+                    if coef > 0:
+                        new_ub = (rhs - rest) / coef
+                    else:
+                        new_lb = (rhs - rest) / coef
+            if sense != "<=":
+                # coef * x >= rhs - the maximal activity of the other terms
+                rest = _residual(max_act, max_inf, up)
+                if rest is not None:
+                    if coef > 0:
+                        new_lb = max(new_lb, (rhs - rest) / coef)
+                    else:
+                        new_ub = min(new_ub, (rhs - rest) / coef)
+            if self.__tighten(row, col, new_lb, new_ub):
+                changed_cols.append(col)
+        return changed_cols
+
+    def __tighten(self, row, col, new_lb, new_ub):
+        """
+        tighten the bounds of a column, if the new ones are tighter enough
+
+        :return: True if a bound has been tightened
+        """
+        lb, ub = self.lbs[col], self.ubs[col]
+        if self.problem.integers[col]:
+            new_lb = ceil(new_lb - TOLERANCE) if new_lb != -INF else new_lb
+            new_ub = floor(new_ub + TOLERANCE) if new_ub != INF else new_ub
+            lb_margin = ub_margin = 0.5
+        else:
+            lb_margin = MIN_IMPROVEMENT * max(1, abs(new_lb))
+            ub_margin = MIN_IMPROVEMENT * max(1, abs(new_ub))
+        changed = False
+        if new_lb > lb + lb_margin:
+            lb, changed = new_lb, True
+            self.tightened_bounds += 1
+        if new_ub < ub - ub_margin:
+            ub, changed = new_ub, True
+            self.tightened_bounds += 1
+        if not changed:
+            return False
+        if lb > ub + TOLERANCE * max(1, abs(ub)):
+            self.__raise_infeasible(row, self.problem.col_names[col])
+        # bounds equal up to the tolerance fix the column
+        self.lbs[col], self.ubs[col] = min(lb, ub), ub
+        return True
+
+    def __raise_infeasible(self, row, col_name):
+        """raise the ValueError of an infeasible problem, found with the row"""
+        name = self.problem.row_names[row]
+        reason = (" cannot be satisfied within the bounds of its variables" if col_name is None
+                  else "".join([" leaves no possible value to the variable ", col_name]))
+        raise ValueError("".join(["The problem is infeasible, found by the propagation",
+                                  " of the bounds: the constraint ",
+                                  name if name else "".join(["of index ", str(row)]), reason]))
+
+
+def _residual(activity, nb_infinite, term):
+    """
+    return the activity of a row without one of its terms,
+    None if it is infinite
+
+    :param activity: the activity of the finite terms of the row
+    :param nb_infinite: the number of infinite terms of the row
+    :param term: the value of the term removed, in the activity
+    """
+    if term in [INF, -INF]:
+        return activity if nb_infinite == 1 else None
+    return activity - term if nb_infinite == 0 else None
@@ -7,11 +7,15 @@ models via the Solve-Engine.
 """
 
 import itertools
+from array import array
 from functools import reduce
 from os.path import isfile
 
 from .basemodel import BaseModel, SolverStatusCode
-from .helper import check_instance
+from .helper import check_instance, decode_variables
+from .constraintstore import _ConstraintStore
+from .snapshot import (read_snapshot, write_snapshot, close_mapping, copy_section,
+                       join_names, split_names)
 
 
 class SATModel(BaseModel):
@@ -32,18 +36,26 @@ class SATModel(BaseModel):
 
     http_mode(boolean): active http requests instead of grpc
 
+    compression: None (default), gzip or zstd, to compress the problem
+    while sending it, zstd needs http_mode and the zstandard package
+
     __variables/__variables_name(dict):used to store the variables
     indexing them by id or by name
 
     __lst_variables: list of variables, in the order of added
     used to get the variables in a logical order
 
-    __constraints: list of the added constraints
+    __constraints: _ConstraintStore of the added constraints, addressed
+    by their index, which does not change when a constraint is removed
+
+    __snapshot_clauses: None, or tuple of the arrays (indptr, literals) of
+    the clauses loaded from a snapshot, written as they are and only turned
+    into constraints when the constraints are read or removed
     """
 
     def __init__(self, token, model_name="model", sleep_time=2,
                  debug=False,
-                 interactive_mode=False, http_mode=False):
+                 interactive_mode=False, http_mode=False, compression=None):
         """initialise the model
 
             INPUTS :
@@ -53,13 +65,14 @@ class SATModel(BaseModel):
                 debug : to initiate, or not, Logger()
                 interactive_mode : to print the advances of the solving while solving
                 http_mode : use http requests if True, GRPC if False
+                compression : None, gzip or zstd to compress the problem sent
 
             ATTRIBUTES :
                 __variables : dictionary of problem variables, var_id : var_instance
                 __variables_name : dictionary of problem variables, var_name : var_instance
                 __lst_variables : list of variables, to keep the order
                               of the vars they have been added with
-                __constraints : list of constraints
+                __constraints : _ConstraintStore of constraints
         """
         check_instance(fct_name='init SATModel', value=model_name,
                        name='model_name', type_=str)
@@ -72,12 +85,14 @@ class SATModel(BaseModel):
                                        sleep_time=sleep_time,
                                        debug=debug,
                                        interactive_mode=interactive_mode,
-                                       http_mode=http_mode)
+                                       http_mode=http_mode,
+                                       compression=compression)
 
         self.__variables = dict()
         self.__variables_name = dict()
         self.__lst_variables = list()
-        self.__constraints = list()
+        self.__constraints = _ConstraintStore()
+        self.__snapshot_clauses = None
 
     def reinit(self):
         """
@@ -87,7 +102,8 @@ class SATModel(BaseModel):
         self.__variables = dict()
         self.__variables_name = dict()
         self.__lst_variables = list()
-        self.__constraints = list()
+        self.__constraints = _ConstraintStore()
+        self.__snapshot_clauses = None
         super(SATModel, self).reinit()
 
     def _process_solution(self, result_obj):
@@ -102,10 +118,12 @@ class SATModel(BaseModel):
         if s_status not in SolverStatusCode.get_values():
             raise ValueError("solver status unknown:", self.solver_status)
         
-        for var in result_obj.variables:
-            var_id = int(var.name)
-            if var_id in self.__variables.keys():
-                self.__variables[var_id].set_value(True if int(var.value) == 1 else False)
+        names, values = decode_variables(result_obj)
+        variables = self.__variables
+        for var_id, value in zip(map(int, names), values):
+            var = variables.get(var_id)
+            if var is not None:
+                var.set_value(value == 1)
 
         return s_status
 
@@ -145,11 +163,12 @@ class SATModel(BaseModel):
         all constraint are implicitly connected via AND operator
 
         :param expr: expression to add (type Expr())
+        :return: the index of the constraint, see remove_constraint_with_index
         """
         check_instance(fct_name='add_constraint_expr',
                        value=expr, name='expr', type_=Expr)
 
-        self.__constraints.append(expr)
+        return self.__constraints.append(expr)
 
     def add_constraint_vector(self, lst):
         """
@@ -158,6 +177,7 @@ class SATModel(BaseModel):
 
         :param lst: a list of integers as a constraint
                 integers must be different from 0
+        :return: the index of the constraint, None if lst is empty
         """
         if not lst:
             return
@@ -170,7 +190,7 @@ class SATModel(BaseModel):
         for id_ in lst:
             self.__add_id(id_)
         iter_vars = map(self.__get_var, lst)
-        self.add_constraint_expr(reduce(OR, iter_vars))
+        return self.add_constraint_expr(reduce(OR, iter_vars))
 
     def add_list_constraints(self, lst_constraints):
         """
@@ -248,21 +268,38 @@ class SATModel(BaseModel):
 
     def remove_constraint_with_index(self, index):
         """
-        remove one constraint with the index
+        remove one constraint with the index, in O(1)
+
+        The index of a constraint is the number of constraints added before
+        it, it does not change when another constraint is removed.
+        A negative index -k is the one of the k-th last constraint.
 
         :param index: integer value of the index of
-                the constraint in the list
+                the constraint, shown by print_constraints
         """
         check_instance(fct_name="remove_constraint_with_index",
                        value=index, name='index', type_=int)
+        constraints = self.__get_constraints()
         try:
-            self.__constraints.pop(index)
-        except:
+            constraints.remove(constraints.get_handle(index))
+        except KeyError:
             raise ValueError("".join(["The index specified, ", str(index),
-                                      ", is out of range. There are ",
-                                      str(len(self.__constraints)),
+                                      ", is out of range or removed. There are ",
+                                      str(len(constraints)),
                                       " constraints."]))
 
+    def __get_constraints(self):
+        """
+        get the store of the constraints, the clauses loaded from a
+        snapshot being turned into constraints first, with the first indices
+        """
+        if self.__snapshot_clauses is not None:
+            indptr, literals = self.__snapshot_clauses
+            self.__snapshot_clauses = None
+            self.__constraints.prepend([reduce(OR, map(self.__get_var, literals[start:end]))
+                                        for start, end in zip(indptr, indptr[1:])])
+        return self.__constraints
+
     def __get_var(self, id_):
         """
         return the right variable even if the id is negative
@@ -309,9 +346,9 @@ class SATModel(BaseModel):
 
     def print_constraints(self):
         """prints the constraints with the index to remove them in case"""
-        rg = range(0, len(self.__constraints))
-        str_cstrs = list(map(str, self.__constraints))
-        print("\n".join(map(str, zip(rg, str_cstrs))))
+        lines = ((index, str(constr))
+                 for index, constr in self.__get_constraints().iter_handles())
+        print("\n".join(map(str, lines)))
 
     @property
     def var_results(self):
@@ -341,16 +378,98 @@ class SATModel(BaseModel):
                           for var in self.__lst_variables])
         print("\n".join(lst_lines))
 
-    def build_str_model(self):
+    def _iter_model_lines(self):
         """
-        Builds the str file of the problem, written in the cnf format
-        :return: returns the str value of the text
+        yield the lines of the problem written in the cnf format
         """
         clauses = (constr.convert_to_cnf().content for constr in self.__constraints)
         clauses = [clause for x in clauses for clause in x]
-        filestr = "p cnf {} {}\n".format(len(self.__variables), len(clauses))
-        filestr += "\n".join(clause.get_cnf_str() for clause in clauses)
-        return filestr
+        indptr, literals = self.__snapshot_clauses or (array('l', [0]), array('l'))
+        yield "p cnf {} {}".format(len(self.__variables), len(indptr) - 1 + len(clauses))
+        for start, end in zip(indptr, indptr[1:]):
+            yield " ".join(map(str, literals[start:end])) + " 0"
+        for clause in clauses:
+            yield clause.get_cnf_str()
+
+    def save(self, path):
+        """
+        save the model into a binary snapshot, see the snapshot module,
+        to be loaded again with SATModel.load
+
+        The snapshot holds the ids, names and values of the variables,
+        and the constraints converted into clauses, as the arrays
+        of their literals.
+
+        :param path: string value of the path of the file
+        """
+        check_instance(fct_name="save", value=path, name="path", type_=str)
+        indptr, literals = self.__snapshot_clauses or (array('l', [0]), array('l'))
+        indptr, literals = array('l', indptr), array('l', literals)
+        for constr in self.__constraints:
+            for clause in constr.convert_to_cnf().content:
+                literals.extend(int(x.get_cnf_str()) for x in clause.content)
+                indptr.append(len(literals))
+        variables = self.__lst_variables
+        values = array('b', [int(var.value) if isinstance(var.value, bool) else -1
+                             for var in variables])
+        write_snapshot(path, "sat", dict(model_name=self.file_name),
+                       [("names", join_names([var.name for var in variables], "save")),
+                        ("ids", array('l', [var.id for var in variables])),
+                        ("values", values), ("indptr", indptr), ("literals", literals)])
+
+    @classmethod
+    def load(cls, path, token, **kwargs):
+        """
+        load a model saved with save
+
+        The file is memory-mapped: the clauses stay in the pages of the file,
+        shared by the processes loading it, and are written from there when
+        the model is solved.
+
+        :param path: string value of the path of the file
+        :param token: api-key to solve with solve engine, it is not saved
+        :param kwargs: the other init parameters, the model_name
+            being the one of the saved model by default
+        :return: the SATModel built
+
+        Raises:
+        ValueError: if the file is not a snapshot of a SAT model
+        """
+        check_instance(fct_name="load", value=path, name="path", type_=str)
+        if not isfile(path):
+            raise ValueError("\n".join(["Could not load, file does not exist.",
+                                        "".join(["Here is the path given : ", path])]))
+        meta, sections, mapping = read_snapshot(path, "sat")
+        kwargs.setdefault("model_name", meta["model_name"])
+        try:
+            model = cls(token, **kwargs)
+        except Exception:
+            sections.clear()
+            close_mapping(mapping)
+            raise
+        model.__load_snapshot(sections)
+        model._keep_mapping(mapping)
+        return model
+
+    def __load_snapshot(self, sections):
+        """fill the model with the sections of a snapshot"""
+        ids = sections["ids"]
+        for name, id_, value in zip(split_names(sections["names"], len(ids)), ids,
+                                    sections["values"]):
+            var = Var(name, id_)
+            if value >= 0:
+                var.set_value(value == 1)
+            self.__variables[id_] = var
+            self.__variables_name[name] = var
+            self.__lst_variables.append(var)
+        if len(sections["indptr"]) > 1:
+            self.__snapshot_clauses = (sections["indptr"], sections["literals"])
+            self.__constraints.reserve(len(sections["indptr"]) - 1)
+
+    def _own_snapshot(self):
+        """copy the clauses of the snapshot loaded not turned into constraints yet"""
+        if self.__snapshot_clauses is not None:
+            self.__snapshot_clauses = tuple(map(copy_section, self.__snapshot_clauses))
 
 
 class Expr(object):
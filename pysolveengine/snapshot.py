@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""Module for the binary snapshots of the models
+
+A snapshot is one file holding a model as columns, to be saved and
+loaded without writing or parsing any lp/cnf text:
+
+    MAGIC | size of the header (8 bytes, little endian) | header | sections
+
+The header is a json object: the kind of model, the byte order and the
+sizes of the items of the machine which has written the file, the scalar
+values of the model (meta) and, for each section, its typecode, its offset
+from the first section and its number of items. A section is an
+array.array (a column) or a bytes blob (the names, separated by new lines),
+each one starting at a multiple of ALIGNMENT.
+
+The file is read with mmap: the sections are memoryviews on the pages of
+the file, so opening a snapshot neither reads nor copies the sections,
+and the processes opening the same snapshot share its pages. The mapping
+stays open until it is closed by its model (see BaseModel.close), once
+the model has copied the sections it still uses.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+SNAPSHOT = namedtuple('Snapshot', 'meta sections mapping')
+MAGIC = b"PYSESNAP"
+VERSION = 1
+ALIGNMENT = 8
+HEADER_SIZE = struct.Struct("<Q")
+
+
+def write_snapshot(path, kind, meta, sections):
+    """
+    write a snapshot into a file
+
+    :param path: string value of the path of the file
+    :param kind: str value of the kind of model, checked when it is read
+    :param meta: dictionary of the scalar values of the model, json serializable
+    :param sections: list of tuples (name, array.array, bytes, or
+        memoryview of a snapshot loaded)
+    """
+    layout = dict()
+    offset = 0
+    for name, data in sections:
+        if isinstance(data, array):
+            typecode = data.typecode
+        else:
+            typecode = data.format if isinstance(data, memoryview) else "B"
+        layout[name] = [typecode, offset, len(data)]
+        offset += _padded(len(data) * array(typecode).itemsize)
+    itemsizes = dict((typecode, array(typecode).itemsize)
+                     for typecode, _, _ in layout.values())
+    header = json.dumps(dict(kind=kind, version=VERSION, byteorder=sys.byteorder,
+                             itemsizes=itemsizes, meta=meta,
+                             sections=layout)).encode('utf-8')
+    # the snapshot is written next to the file and then renamed, so that the
+    # models loaded from the file it replaces keep their pages
+    tmp_path = "".join([path, ".tmp"])
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(HEADER_SIZE.pack(len(header)))
+        f.write(header)
+        _write_padding(f)
+        for _, data in sections:
+            f.write(data)
+            _write_padding(f)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path, kind):
+    """
+    open a snapshot with mmap, the sections are read-only memoryviews
+    on the file, cast to their typecode
+
+    :param path: string value of the path of the file
+    :param kind: str value of the kind of model expected
+    :return: SNAPSHOT namedtuple, the meta dictionary, the
+        dictionary section name : memoryview and the mmap of the file,
+        None if it is empty, to be closed with close_mapping
+
+    Raises:
+    ValueError: if the file is not a snapshot of this kind of model,
+        or has been written on a machine with other item sizes or byte order
+    """
+    with open(path, 'rb') as f:
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file cannot be mapped
+            mapping = None
+    view = memoryview(b"" if mapping is None else mapping)
+    try:
+        header, start = _read_header(view, path, kind)
+    except ValueError:
+        view.release()
+        close_mapping(mapping)
+        raise
+    itemsizes = header["itemsizes"]
+    sections = dict()
+    for name, (typecode, offset, nb_items) in header["sections"].items():
+        begin = start + offset
+        end = begin + nb_items * itemsizes[typecode]
+        sections[name] = view[begin:end].cast(typecode)
+    return SNAPSHOT(header["meta"], sections, mapping)
+
+
+def close_mapping(mapping):
+    """
+    close the mapping of a snapshot read, None for an empty file
+
+    Raises:
+    BufferError: if a memoryview on one of its sections is still used
+    """
+    if mapping is not None:
+        mapping.close()
+
+
+def _read_header(view, path, kind):
+    """
+    return the tuple (header dictionary, offset of the first section) of a snapshot
+
+    Raises:
+    ValueError: see read_snapshot
+    """
+    start = len(MAGIC) + HEADER_SIZE.size
+    if bytes(view[:len(MAGIC)]) != MAGIC or len(view) < start:
+        raise ValueError("".join(["The file ", path, " is not a model snapshot"]))
+    header_size, = HEADER_SIZE.unpack_from(view, len(MAGIC))
+    header = json.loads(bytes(view[start:start + header_size]).decode('utf-8'))
+    if header["kind"] != kind:
+        raise ValueError("".join(["The file ", path, " is a snapshot of a ",
+                                  header["kind"], " model, not of a ", kind, " model"]))
+    if header["version"] != VERSION:
+        raise ValueError("".join(["The snapshot ", path, " has the version ",
+                                  str(header["version"]), ", only the version ",
+                                  str(VERSION), " can be read"]))
+    itemsizes = header["itemsizes"]
+    if (header["byteorder"] != sys.byteorder or
+            any(array(typecode).itemsize != size for typecode, size in itemsizes.items())):
+        raise ValueError("".join(["The snapshot ", path, " has been written on a machine ",
+                                  "with another byte order or other sizes of numbers"]))
+    return header, _padded(start + header_size)
+
+
+def copy_section(view):
+    """return the array copy of a section of a snapshot read"""
+    column = array(view.format)
+    column.frombytes(view.cast('B'))
+    return column
+
+
+def join_names(names, fct_name):
+    """
+    return the names joined by new lines, encoded in utf-8
+
+    Raises:
+    ValueError: if a name contains a new line
+    """
+    blob = "\n".join(names)
+    if blob.count("\n") != max(len(names) - 1, 0):
+        raise ValueError("".join(["Could not ", fct_name, ", a name contains a new line"]))
+    return blob.encode('utf-8')
+
+
+def split_names(blob, nb_names):
+    """return the list of the names of a blob written by join_names"""
+    if not nb_names:
+        return []
+    return str(blob, 'utf-8').split("\n")
+
+
+def _padded(size):
+    """return the smallest multiple of ALIGNMENT greater or equal to size"""
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def _write_padding(f):
+    """write zeros until the position in the file is a multiple of ALIGNMENT"""
+    position = f.tell()
+    f.write(bytes(_padded(position) - position))
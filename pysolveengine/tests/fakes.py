@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""
+Module of the fake objects shared by the tests, replacing the responses of SE
+"""
+
+# pylint: disable=R0903, C0111
+
+from pysolveengine.helper import Variable
+
+
+class Result:
+    """result of a job, as returned by the clients, the variables being tuples (name, value)"""
+    def __init__(self, variables, objective_value=3, status="optimal"):
+        self.objective_value = objective_value
+        self.status = status
+        self.variables = [Variable(name, value) for name, value in variables]
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Module for testing the decoding of the solutions returned by SE
+"""
+
+# pylint: disable=R0201, C0103, W0612, C0111, protected-access
+
+import pytest
+from pysolveengine.helper import Variable, ObjResponse, SERequests
+from pysolveengine.mipmodel import MIPModel
+from pysolveengine.matrixmodel import MatrixMIPModel
+from pysolveengine.tests.fakes import Result
+
+np = pytest.importorskip("numpy")
+
+F = [-2, 1, 3]
+A = [[2, 3, 1], [-1, 0, 4]]
+B = [1, 0]
+
+
+class TestSolutionDecoding:
+    def test_mipmodel(self):
+        m = MIPModel("a")
+        m.build_with_matrices(F, A, B)
+        m._process_solution(Result([("x2", 1.5), ("x0", 2)]))
+        assert m.var_results == {"x0": 2, "x1": "not computed", "x2": 1.5}
+        arr = m.var_results_array
+        assert list(arr[[0, 2]]) == [2, 1.5]
+        assert np.isnan(arr[1])
+        m._process_solution(Result([("x0", 1), ("x1", 2), ("x2", 3)]))
+        assert list(m.var_results_array) == [1, 2, 3]
+        assert m.get_variable("x1").value == 2
+
+    def test_http_response(self):
+        json_obj = {"job_id": "1",
+                    "result": {"status": "optimal", "objective_value": 2,
+                               "variables": [{"name": "x1", "value": "4.5"},
+                                             {"name": "x0", "value": 1}]}}
+        resp = ObjResponse(json_obj, SERequests.GET_RESULT)
+        assert resp.variable_names == ["x1", "x0"]
+        assert list(resp.variable_values) == [4.5, 1]
+        assert [(var.name, var.value) for var in resp.variables] == [("x1", 4.5), ("x0", 1)]
+        assert resp.variables is resp.variables
+        mm = MatrixMIPModel("a")
+        mm.build_with_matrices(F, A, B)
+        mm._process_solution(resp)
+        assert list(mm.var_results[:2]) == [1, 4.5]
+
+    def test_lazy_decoding(self):
+        m = MIPModel("a")
+        m.build_with_matrices(F, A, B)
+        x0 = m.get_variable("x0")
+        result = Result([("x0", 2), ("x1", 3), ("x2", 4)])
+        m._process_solution(result)
+        result.variables.append(Variable("x1", 5))
+        # the values are decoded at the first read
+        assert x0.value == 2
+        assert m.get_variable("x1").value == 5
+        result.variables.pop()
+        assert m.get_variable("x1").value == 5
+        mm = MatrixMIPModel("a")
+        mm.build_with_matrices(F, A, B)
+        mm._process_solution(result)
+        assert list(mm.var_results) == [2, 3, 4]
+        mm.print_results()
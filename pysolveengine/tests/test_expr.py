@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Module for testing the linear expressions of the MIP models
+"""
+
+# pylint: disable=R0201, C0103, W0612, C0111, protected-access
+
+import pytest
+from pysolveengine.mipmodel import MIPModel, Expr, Var, VarType, INF, quicksum, dot
+
+
+def model_vars(nb_vars):
+    model = MIPModel(token="a")
+    return [model.add_continuous_var("x" + str(i)) for i in range(nb_vars)]
+
+
+class TestExprArrays:
+    def test_sum_is_merged(self):
+        x, y = model_vars(2)
+        e = sum(c * v for c, v in [(1, x), (2, y), (3, x)])
+        assert e.variables == {x: 4, y: 2}
+        assert e.lpstr() == "4 x0 + 2 x1"
+
+    def test_shared_arrays_are_not_modified(self):
+        x, y, z = model_vars(3)
+        e = x + y
+        f = e + z
+        g = e - z
+        assert e.variables == {x: 1, y: 1}
+        assert f.variables == {x: 1, y: 1, z: 1}
+        assert g.variables == {x: 1, y: 1, z: -1}
+
+    def test_derived_from_merged(self):
+        model = MIPModel(token="a", model_name="m.lp")
+        x, y, z = [model.add_continuous_var(name) for name in "xyz"]
+        e = x + y
+        str(e)
+        f = e + z
+        assert e.variables == {x: 1, y: 1}
+        assert e.lpstr() == "x + y"
+        assert f.variables == {x: 1, y: 1, z: 1}
+        model.add_constraint(e <= 3, name="c")
+        model.set_obj(e)
+        assert "c: x + y <= 3" in model.build_str_model()
+        assert list(model.to_matrices().f) == [1, 1, 0]
+
+    def test_copy_then_imul(self):
+        x, y = model_vars(2)
+        e = x + y
+        f = e.get_copy()
+        f *= 2
+        e += x
+        assert e.variables == {x: 2, y: 1}
+        assert f.variables == {x: 2, y: 2}
+
+    def test_var_is_unchanged(self):
+        x, y = model_vars(2)
+        e = x + y
+        e += x
+        t = x
+        t -= y
+        assert isinstance(x, Var)
+        assert x.variables == {x: 1}
+        assert t.variables == {x: 1, y: -1}
+
+    def test_add_term(self):
+        x, y = model_vars(2)
+        e = Expr(2).add_term(x, 3).add_term(y, -4).add_term(x, 1)
+        assert e.variables == {x: 1, y: -4}
+        assert e.lpstr() == "x0 - 4 x1 + 2"
+        f = x + y + x
+        g = f + y
+        f.add_term(x, 5)
+        assert f.variables == {x: 5, y: 1}
+        assert g.variables == {x: 2, y: 2}
+        with pytest.raises(ValueError):
+            Expr().add_term(2, 3)
+
+    def test_write_variables(self):
+        x, y, z = model_vars(3)
+        f = x + y + x
+        g = f + z
+        f.variables[y] = 3
+        f.variables[z] = -1
+        del f.variables[x]
+        assert f.variables == {y: 3, z: -1}
+        assert f.lpstr() == "3 x1 - x2"
+        assert g.variables == {x: 2, y: 1, z: 1}
+        e = Expr(0)
+        e.variables[1] = 2
+        assert e.variables == {1: 2} and not e.equals(Expr(0))
+        with pytest.raises(KeyError):
+            del e.variables[x]
+        with pytest.raises(TypeError):
+            x.variables[y] = 2
+
+    def test_is_constant(self):
+        x, = model_vars(1)
+        assert Expr(3).is_constant
+        assert not (x - x).is_constant
+        assert (x - x).lpstr() == "0 x0"
+
+    def test_float_coefficients(self):
+        x, y = model_vars(2)
+        assert (2.0 * x + 0.5 * y).lpstr() == "2 x0 + 0.5 x1"
+
+
+class TestQuicksum:
+    def test_quicksum(self):
+        x, y = model_vars(2)
+        e = quicksum([x, 2 * y, 3, x + 1])
+        assert e.variables == {x: 2, y: 2}
+        assert e.constant == 4
+        assert quicksum([]).is_constant
+
+    def test_quicksum_does_not_change_inputs(self):
+        x, y = model_vars(2)
+        e = x + y
+        quicksum([e, x])
+        assert e.variables == {x: 1, y: 1}
+
+    def test_dot(self):
+        x, y, z = model_vars(3)
+        e = dot([2, 0, -1.5], [x, y, z])
+        assert e.variables == {x: 2, z: -1.5}
+        assert e.lpstr() == "2 x0 - 1.5 x2"
+        assert dot([3], [x + 1]).equals(3 * x + 3)
+
+
+class TestVarTable:
+    def test_var_is_a_handle(self):
+        model = MIPModel(token="a")
+        x = model.add_integer_var("x", lb=-2, ub=INF)
+        y = model.get_variable("x")
+        assert y is not x and y.name == "x"
+        y.ub = 4
+        assert x.ub == 4 and x.lb == -2
+        assert x.is_integer
+        assert not hasattr(x, "__dict__")
+
+    def test_infinite_bounds(self):
+        x, = model_vars(1)
+        assert x.lb == -INF and x.ub == INF
+        assert x.ub == float("inf")
+        assert x.lpstr_bounds() == "-inf <= x0 <= inf"
+        x.lb = 0
+        assert x.lpstr_bounds() == "0 <= x0 <= inf"
+
+    def test_values(self):
+        model = MIPModel(token="a")
+        x = model.add_continuous_var("x")
+        assert x.value == "not computed"
+        assert str(x) == "x : None"
+        x.set_value(1.5)
+        assert model.get_variable("x").value == 1.5
+        assert model.var_results == {"x": 1.5}
+
+    def test_same_name_in_two_models(self):
+        x, = model_vars(1)
+        y, = model_vars(1)
+        assert x.name == y.name
+        assert hash(x) != hash(y)
+        assert (x + y).variables == {x: 1, y: 1}
+        assert hash(x) == hash(x.get_copy()._vars[0])
+
+
+class TestAddVars:
+    def test_family(self):
+        model = MIPModel(token="a")
+        x = model.add_vars("x", [["a", "b"], 3], lb=0, ub=[1, 2, 3, 4, 5, 6],
+                           vtype=VarType.INTEGER)
+        assert len(x) == 6 and x.shape == (2, 3)
+        var = x["b", 1]
+        assert var.name == "x_b_1"
+        assert var.ub == 5 and var.lb == 0 and var.is_integer
+        assert model.get_variable("x_a_2").ub == 3
+        assert [v.name for v in x][:2] == ["x_a_0", "x_a_1"]
+        assert [var.name for _, var in x.items()][-1] == "x_b_2"
+        with pytest.raises(KeyError):
+            x["c", 0]
+
+    def test_names_are_lazy(self):
+        model = MIPModel(token="a")
+        y = model.add_continuous_var("y")
+        x = model.add_vars("x", 4, lb=-1)
+        assert len(model._MIPModel__vars._names) == 1
+        model.add_constraint(x[3] + y >= 1)
+        assert "-1 <= x_3 <= inf" in model.build_str_model()
+        assert model._MIPModel__vars.names == ["y", "x_0", "x_1", "x_2", "x_3"]
+        z = model.add_continuous_var("z")
+        assert z._index == 5 and x[0]._index == 1
+
+    def test_numpy_bounds(self):
+        np = pytest.importorskip("numpy")
+        model = MIPModel(token="a")
+        x = model.add_vars("x", [2, 2], ub=np.array([[1, 2], [3, np.inf]]))
+        assert x[1, 0].ub == 3 and x[1, 1].ub == INF
+        with pytest.raises(ValueError):
+            model.add_vars("y", 2, lb=np.array([0, np.nan]))
+
+    def test_errors(self):
+        model = MIPModel(token="a")
+        model.add_vars("x", 2)
+        with pytest.raises(ValueError):
+            model.add_vars("x", 3)
+        with pytest.raises(ValueError):
+            model.add_vars("y", [[1, "1"]])
+        with pytest.raises(ValueError):
+            model.add_vars("y", [["a:b"]])
+        with pytest.raises(ValueError):
+            model.add_vars("y", 3, lb=[0, 1])
+        model.add_continuous_var("z_0")
+        with pytest.raises(ValueError, match="already used"):
+            model.add_vars("z", 1)
+        assert len(model._MIPModel__vars) == 3
+        model.build_str_model()
+
+    def test_names_used_by_another_family(self):
+        model = MIPModel(token="a")
+        model.add_vars("x", [["1_a", "2"]])
+        y = model.add_vars("y", 2)
+        with pytest.raises(ValueError, match="already used"):
+            model.add_vars("x_1", [["a"]])
+        assert len(model._MIPModel__vars) == 4
+        model.build_str_model()
+        with pytest.raises(ValueError, match="exists already"):
+            model.add_vars("x", 1)
+        with pytest.raises(ValueError, match="exists already"):
+            model.add_vars("y", 1)
+        model.add_vars("x_2", [["b"]])
+        assert model.get_variable("x_2_b")._index == 4
@@ -5,8 +5,14 @@ Module for testing the Solver-Engine interface
 
 # pylint: disable=R0201, C0103, W0612, C0111, protected-access
 
+import base64
+import json
+import tracemalloc
+import zlib
 import pytest
-from pysolveengine.helper import StrEnum
+from pysolveengine.helper import StrEnum, iter_chunks, iter_compressed
+from pysolveengine.mipmodel import MIPModel
+from pysolveengine.client import _iter_json_body, _join_chunks
 
 class ETest(StrEnum):
     A="a"
@@ -16,3 +22,104 @@ class TestStrEnum:
     def test_getValues(self):
         assert set(ETest.get_values()) == set(["a", "b"])
 
+
+
+class TestIterChunks:
+    def test_same_as_join(self):
+        lines = ["line" + str(i) for i in range(1000)]
+        chunks = list(iter_chunks(lines, chunk_size=100))
+        assert len(chunks) > 1
+        assert b"".join(chunks) == "\n".join(lines).encode('ascii')
+
+    def test_last_line_ends_a_chunk(self):
+        chunks = list(iter_chunks(["ab", "cd"], chunk_size=3))
+        assert chunks == [b"ab", b"\ncd"]
+        assert list(iter_chunks([])) == []
+
+
+class TestJoinChunks:
+    def test_same_as_join(self):
+        chunks = [("line" + str(i)).encode('ascii') for i in range(1000)]
+        assert _join_chunks(chunks) == b"".join(chunks)
+        assert _join_chunks([]) == b""
+
+    def test_memory_close_to_the_data(self):
+        size = 1 << 16
+        tracemalloc.start()
+        try:
+            data = _join_chunks(bytes(size) for _ in range(128))
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert len(data) == 128 * size
+        assert peak < 1.5 * len(data)
+
+
+class TestCompression:
+    def test_gzip(self):
+        chunks = [("line" + str(i)).encode('ascii') for i in range(1000)]
+        data = b"".join(iter_compressed(chunks, "gzip"))
+        assert zlib.decompress(data, 16 + zlib.MAX_WBITS) == b"".join(chunks)
+
+    def test_zstd(self):
+        zstandard = pytest.importorskip("zstandard")
+        chunks = [b"abc"] * 1000
+        data = b"".join(iter_compressed(chunks, "zstd"))
+        assert zstandard.ZstdDecompressor().decompressobj().decompress(data) == b"abc" * 1000
+
+    @pytest.mark.parametrize("nb_vars", [1, 2, 3, 5000])
+    def test_json_body(self, nb_vars):
+        m = MIPModel("a", model_name="pb", http_mode=True, compression="gzip")
+        lst_vars = [m.add_continuous_var("x" + str(i)) for i in range(nb_vars)]
+        m.add_constraint(sum(lst_vars) <= 3)
+        body = json.loads(b"".join(_iter_json_body(m)).decode('ascii'))
+        assert body["problems"][0]["name"] == "pb.lp"
+        assert base64.b64decode(body["problems"][0]["data"]) == m.build_str_model().encode('ascii')
+
+    def test_streamed_http_body(self, monkeypatch):
+        m = MIPModel("a", model_name="pb", http_mode=True, compression="gzip")
+        x = m.add_continuous_var("x")
+        m.add_constraint(x <= 3)
+        sent = dict()
+
+        def post(url, headers, data):
+            sent["headers"] = headers
+            # requests sends a generator chunk by chunk
+            assert not isinstance(data, (bytes, bytearray))
+            chunks = list(data)
+            sent["body"] = b"".join(chunks)
+            assert all(chunks)
+            raise ValueError("sent")
+        monkeypatch.setattr("pysolveengine.client.requests.post", post)
+        with pytest.raises(ValueError, match="sent"):
+            m.client._create_job()
+        assert sent["headers"]["Content-Encoding"] == "gzip"
+        body = json.loads(zlib.decompress(sent["body"], 16 + zlib.MAX_WBITS).decode('ascii'))
+        assert base64.b64decode(body["problems"][0]["data"]) == m.build_str_model().encode('ascii')
+
+    def test_plain_http_body(self, monkeypatch):
+        m = MIPModel("a", model_name="pb", http_mode=True)
+        x = m.add_continuous_var("x")
+        m.add_constraint(x <= 3)
+        sent = dict()
+
+        def post(url, headers, data):
+            sent["headers"] = headers
+            sent["body"] = data
+            raise ValueError("sent")
+        monkeypatch.setattr("pysolveengine.client.requests.post", post)
+        with pytest.raises(ValueError, match="sent"):
+            m.client._create_job()
+        # without compression, the body is sent at once, with a Content-Length
+        assert isinstance(sent["body"], bytes)
+        assert "Content-Encoding" not in sent["headers"]
+        data = base64.b64encode(m.build_str_model().encode('ascii')).decode('ascii')
+        assert json.loads(sent["body"].decode('ascii')) == dict(problems=[dict(name="pb.lp",
+                                                                               data=data)])
+
+    def test_wrong_compression(self):
+        with pytest.raises(ValueError):
+            MIPModel("a", compression="lzma")
+        with pytest.raises(ValueError):
+            MIPModel("a", compression="zstd")
+        assert MIPModel("a", compression="gzip").compression == "gzip"
@@ -0,0 +1,458 @@
+# -*- coding: utf-8 -*-
+"""
+Module for testing the lp files written for the MIP models
+"""
+
+# pylint: disable=R0201, C0103, W0612, C0111, protected-access
+
+import io
+import pytest
+from pysolveengine.mipmodel import MIPModel, Expr, _iter_lp_lines
+from pysolveengine.mpsformat import MPS_PROBLEM
+from pysolveengine.matrixmodel import MatrixMIPModel
+from pysolveengine.client import BaseClient
+from pysolveengine.tests.fakes import Result
+
+
+def small_model(model_name="model"):
+    m = MIPModel("a", model_name=model_name)
+    x = m.add_integer_var("x", lb=0, ub=1)
+    y = m.add_continuous_var("y", lb=-2)
+    m.add_constraint(x + 2 * y >= 2, name="c1")
+    m.add_constraint(x - y <= 4)
+    m.set_obj(x + y)
+    return m
+
+
+LP_RESULT = "\n".join(["Minimize",
+                       "x + y",
+                       "Subject To",
+                       "c1: x + 2 y >= 2",
+                       "x - y <= 4",
+                       "Bounds",
+                       "0 <= x <= 1",
+                       "-2 <= y <= inf",
+                       "General",
+                       "x",
+                       "End"])
+
+
+class TestStreamingWriter:
+    def test_build_str_model(self):
+        assert small_model().build_str_model() == LP_RESULT
+
+    def test_write_model(self):
+        sink = io.BytesIO()
+        small_model().write_model(sink)
+        assert sink.getvalue() == LP_RESULT.encode('ascii')
+
+    def test_write_lp(self, tmpdir):
+        path = str(tmpdir.join("model.lp"))
+        small_model().write_lp(path)
+        with open(path, 'rb') as f:
+            assert f.read() == LP_RESULT.encode('ascii')
+
+    def test_write_lp_of_mps_model(self, tmpdir):
+        path = str(tmpdir.join("model.lp"))
+        m = small_model("model.mps")
+        m.write_lp(path)
+        with open(path, 'rb') as f:
+            assert f.read() == LP_RESULT.encode('ascii')
+        mm = MatrixMIPModel("a", model_name="m.mps")
+        mm.build_with_matrices([1, 2], [[1, 1]], [4])
+        mm.write_lp(path)
+        with open(path) as f:
+            assert f.read().startswith("Minimize")
+
+
+class TestLpCache:
+    def test_constraint_cache(self):
+        m = MIPModel("a")
+        x = m.add_continuous_var("x")
+        y = m.add_continuous_var("y")
+        lhs = x + y
+        c = lhs <= 3
+        first = c.lpstr()
+        assert c.lpstr() is first
+        lhs += y
+        assert c.lpstr() == "x + 2 y <= 3"
+        lhs.constant = 1
+        assert c.lpstr() == "x + 2 y <= 2"
+        c.name = "c"
+        assert c.lpstr() == "c: x + 2 y <= 2"
+
+    def test_bounds_cache(self):
+        x = MIPModel("a").add_continuous_var("x", lb=0, ub=1)
+        first = x.lpstr_bounds()
+        assert x.lpstr_bounds() is first
+        x.ub = 4
+        assert x.lpstr_bounds() == "0 <= x <= 4"
+
+    def test_obj_cache(self):
+        m = small_model()
+        x = m.get_variable("x")
+        obj = 2 * x
+        m.set_obj(obj)
+        assert m.build_str_model().split("\n")[1] == "2 x"
+        obj *= 3
+        assert m.build_str_model().split("\n")[1] == "6 x"
+        m.set_obj(x)
+        assert m.build_str_model().split("\n")[1] == "x"
+
+
+class FakeClient(BaseClient):
+    """go through the steps of solving, the problems sent are kept in sent"""
+    def __init__(self, model):
+        super(FakeClient, self).__init__(model=model, sleep_time=0)
+        self.sent = list()
+
+    def _create_job(self):
+        self.sent.append(b"".join(self.model._iter_model_chunks()).decode())
+        self._id = "job{}".format(len(self.sent))
+
+    def _schedule_job(self):
+        pass
+
+    def _wait_results(self):
+        return "completed"
+
+    def _get_solution(self):
+        return Result([("x", 1), ("y", len(self.sent))])
+
+
+class TestParameters:
+    def test_solve_again(self):
+        m = small_model()
+        m.client = FakeClient(m)
+        m.solve()
+        m.set_rhs("c1", 3)
+        m.solve()
+        assert m.job_id == "job2" and m.se_status == "completed"
+        assert m.var_results == {"x": 1, "y": 2}
+        assert [problem.split("\n")[3] for problem in m.client.sent] == ["c1: x + 2 y >= 2",
+                                                                         "c1: x + 2 y >= 3"]
+
+    def test_set_rhs(self):
+        m = small_model()
+        lines = m.build_str_model().split("\n")
+        m.set_rhs("c1", 3.5)
+        m.set_rhs(1, -1)
+        new_lines = m.build_str_model().split("\n")
+        assert new_lines[3:5] == ["c1: x + 2 y >= 3.5", "x - y <= -1"]
+        assert new_lines[5:] == lines[5:]
+        with pytest.raises(ValueError, match="no constraint named c3"):
+            m.set_rhs("c3", 1)
+        with pytest.raises(ValueError, match="out of range"):
+            m.set_rhs(2, 1)
+
+    def test_set_bounds(self):
+        m = small_model()
+        x, y = m.get_variable("x"), m.get_variable("y")
+        m.set_bounds(y, ub=3)
+        m.set_bounds(x, lb=1, ub=1)
+        assert (y.lb, y.ub) == (-2, 3)
+        assert "\n".join(["Bounds", "1 <= x <= 1", "-2 <= y <= 3"]) in m.build_str_model()
+        with pytest.raises(ValueError):
+            m.set_bounds(MIPModel("a").add_continuous_var("x"), lb=0)
+
+    def test_set_obj_coeff(self):
+        m = small_model()
+        x, y = m.get_variable("x"), m.get_variable("y")
+        obj = 2 * x + 1
+        m.set_obj(obj)
+        m.set_obj_coeff(x, 3)
+        m.set_obj_coeff(y, -1)
+        assert m.build_str_model().split("\n")[1] == "3 x - y + 1"
+        # the expression given is not modified, nor used any more
+        assert obj.lpstr() == "2 x + 1"
+        obj += y
+        assert m.build_str_model().split("\n")[1] == "3 x - y + 1"
+        m.set_obj(x)
+        m.set_obj_coeff(y, 2)
+        assert m.build_str_model().split("\n")[1] == "x + 2 y"
+        assert m.to_matrices().f.tolist() == [1, 2]
+
+
+class TestConstraintIndex:
+    def test_stable_indices(self):
+        m = small_model()
+        x, y = m.get_variable("x"), m.get_variable("y")
+        assert m.add_constraint(x + y <= 5, name="c3") == 2
+        assert m.add_constraint(x - 3 * y >= 1) == 3
+        m.remove_constraint("c1")
+        m.remove_constraint_with_index(1)
+        # the indices of the other constraints do not change
+        assert m.get_constraint_index("c3") == 2
+        m.set_rhs(3, 2)
+        assert m.build_str_model().split("\n")[3:5] == ["c3: x + y <= 5", "x - 3 y >= 2"]
+        assert list(m.to_matrices().ineq_rows) == [2, 3]
+        with pytest.raises(ValueError, match="removed"):
+            m.remove_constraint_with_index(1)
+        with pytest.raises(ValueError, match="no constraint named c1"):
+            m.get_constraint_index("c1")
+        m.remove_constraint(-1)
+        assert m.build_str_model().split("\n")[3:5] == ["c3: x + y <= 5", "Bounds"]
+        assert m.add_constraint(x <= 1, name="c1") == 4
+
+    def test_duplicate_names(self):
+        m = small_model()
+        x = m.get_variable("x")
+        # a name refers to the last constraint added of this name
+        assert m.add_constraint(x <= 3, name="c1") == 2
+        assert m.add_constraint(x <= 2, name="c1") == 3
+        assert m.get_constraint_index("c1") == 3
+        m.remove_constraint(1)
+        m.remove_constraint("c1")
+        assert m.get_constraint_index("c1") == 2
+        m.set_rhs("c1", 5)
+        m.remove_constraint(2)
+        assert m.get_constraint_index("c1") == 0
+        m.remove_constraint("c1")
+        with pytest.raises(ValueError, match="no constraint named c1"):
+            m.get_constraint_index("c1")
+
+    def test_print_constraints(self, capsys):
+        m = small_model()
+        m.remove_constraint(0)
+        m.print_constraints()
+        assert capsys.readouterr().out == "(1, 'x - y <= 4')\n"
+
+
+class TestConstraintRecords:
+    def test_normalised_when_added(self):
+        m = MIPModel("a")
+        x = m.add_continuous_var("x")
+        y = m.add_continuous_var("y")
+        lhs = 2 * x + 2 * y + 1
+        m.add_constraint(lhs <= y + x + 4, name="c")
+        lhs += y
+        assert "c: x + y <= 3" in m.build_str_model()
+
+    def test_errors(self):
+        m = MIPModel("a")
+        x = m.add_continuous_var("x")
+        other = MIPModel("a").add_continuous_var("x")
+        with pytest.raises(ValueError):
+            m.add_constraint(x <= other)
+        with pytest.raises(ValueError):
+            m.add_constraint(Expr(1) <= 3)
+
+    def test_zero_row_of_matrices(self):
+        m = MIPModel("a")
+        m.build_with_matrices([1, 2], [[0, 0], [1, 0]], [3, 1])
+        assert "cIneq0: 0 x0 <= 3\ncIneq1: x0 <= 1" in m.build_str_model()
+
+
+class TestDedup:
+    def test_duplicate_and_parallel(self):
+        m = MIPModel("a")
+        m.enable_dedup()
+        x = m.add_continuous_var("x")
+        y = m.add_continuous_var("y")
+        m.add_constraint(x + 2 * y <= 4, name="a")
+        m.add_constraint(x + 2 * y <= 4)
+        m.add_constraint(2 * x + 4 * y <= 6)
+        m.add_constraint(-x - 2 * y >= -2)
+        m.add_constraint(2 * y + x >= 1, name="b")
+        m.add_constraint(3 * x + 6 * y >= 0)
+        lines = m.build_str_model().split("\n")
+        assert lines[3:5] == ["a: x + 2 y <= 2", "b: 2 y + x >= 1"]
+        assert lines[5] == "Bounds"
+        stats = m.dedup_stats
+        assert stats.duplicate_rows == 1 and stats.parallel_rows == 3
+        assert stats.bytes_saved == len("x + 2 y <= 4\n2 x + 4 y <= 6\n"
+                                        "- x - 2 y >= -2\n3 x + 6 y >= 0\n")
+
+    def test_equality(self):
+        m = MIPModel("a")
+        x = m.add_continuous_var("x")
+        y = m.add_continuous_var("y")
+        m.add_constraint(x - y == 1)
+        m.add_constraint(2 * x - 2 * y == 2)
+        assert m.dedup_stats is None
+        m.enable_dedup()
+        m.add_constraint(x - y <= 3)
+        m.add_constraint(y - x == 1)
+        assert "\n".join(["x - y = 1", "y - x = 1", "Bounds"]) in m.build_str_model()
+        assert m.dedup_stats.parallel_rows == 2
+
+    def test_rounding_errors(self):
+        m = MIPModel("a")
+        m.enable_dedup()
+        x = m.add_continuous_var("x")
+        y = m.add_continuous_var("y")
+        m.add_constraint(0.1 * x + 0.3 * y <= 2)
+        m.add_constraint(x + 0.1 * 3 / 0.1 * y <= 10)
+        m.add_constraint(x + 3.001 * y <= 10)
+        assert m.build_str_model().split("\n")[3:6] == ["0.1 x + 0.3 y <= 1",
+                                                       "x + 3.001 y <= 10", "Bounds"]
+        assert m.dedup_stats.parallel_rows == 1
+
+    def test_small_coefficients(self):
+        m = MIPModel("a")
+        m.enable_dedup()
+        x = m.add_continuous_var("x")
+        y = m.add_continuous_var("y", ub=1e12)
+        m.add_constraint(x + 1e-10 * y <= 1, name="a")
+        m.add_constraint(x + 3e-10 * y <= 1, name="b")
+        assert m.get_constraint_index("b") == 1
+        assert m.dedup_stats.parallel_rows == 0
+
+    def test_zero_coefficients(self):
+        m = MIPModel("a")
+        m.enable_dedup()
+        x = m.add_continuous_var("x")
+        y = m.add_continuous_var("y")
+        assert m.add_constraint(0 * x + y <= 1, name="a") == 0
+        assert m.add_constraint(x - x + y <= 2) is None
+        assert m.add_constraint(2 * y <= 1) is None
+        assert m.add_constraint(0 * x + 0 * y <= 3, name="b") == 3
+        assert "a: 0 x + y <= 0.5\nb: 0 x + 0 y <= 3\nBounds" in m.build_str_model()
+        assert m.dedup_stats.parallel_rows == 2
+
+    def test_removal_of_merged_into(self):
+        m = MIPModel("a")
+        m.enable_dedup()
+        x = m.add_continuous_var("x")
+        y = m.add_continuous_var("y")
+        m.add_constraint(x + y <= 3, name="a")
+        m.add_constraint(2 * x + 2 * y <= 4, name="b")
+        m.add_constraint(x + y <= 2, name="c")
+        assert "a: x + y <= 2\nBounds" in m.build_str_model()
+        m.remove_constraint("a")
+        assert m.get_constraint_index("b") == 3
+        assert "b: 2 x + 2 y <= 4\nBounds" in m.build_str_model()
+        assert m.dedup_stats == (0, 1, len("c: x + y <= 2\n"))
+        m.set_rhs("b", 6)
+        m.remove_constraint("b")
+        assert "c: x + y <= 2\nBounds" in m.build_str_model()
+        assert m.dedup_stats == (0, 0, 0)
+
+    def test_set_rhs_of_merged_rows(self):
+        m = MIPModel("a")
+        m.enable_dedup()
+        x = m.add_continuous_var("x")
+        y = m.add_continuous_var("y")
+        m.add_constraint(x + y <= 3, name="a")
+        m.add_constraint(2 * x + 2 * y <= 4, name="b")
+        m.add_constraint(x + y <= 2.5, name="c")
+        assert "a: x + y <= 2\nBounds" in m.build_str_model()
+        # the bounds of the constraints merged are kept
+        m.set_rhs("a", 6)
+        assert "a: x + y <= 2\nBounds" in m.build_str_model()
+        m.set_rhs("b", 10)
+        assert "a: x + y <= 2.5\nBounds" in m.build_str_model()
+        assert m.get_constraint_index("b") == 0
+        assert m.dedup_stats == (0, 2, len("b: 2 x + 2 y <= 10\nc: x + y <= 2.5\n"))
+
+    def test_remove_merged_rows(self):
+        m = MIPModel("a")
+        m.enable_dedup()
+        x = m.add_continuous_var("x")
+        y = m.add_continuous_var("y")
+        m.add_constraint(x + y <= 6, name="a")
+        m.add_constraint(2 * x + 2 * y <= 10, name="b")
+        m.add_constraint(x + y <= 2.5, name="c")
+        m.remove_constraint("c")
+        assert "a: x + y <= 5\nBounds" in m.build_str_model()
+        with pytest.raises(ValueError, match="no constraint named c"):
+            m.set_rhs("c", 1)
+        m.remove_constraint("b")
+        assert "a: x + y <= 6\nBounds" in m.build_str_model()
+        assert m.get_constraint_index("a") == 0
+        assert m.dedup_stats == (0, 0, 0)
+
+    def test_set_rhs_of_merged_equality(self):
+        m = MIPModel("a")
+        m.enable_dedup()
+        x = m.add_continuous_var("x")
+        y = m.add_continuous_var("y")
+        m.add_constraint(x - y == 1, name="a")
+        m.add_constraint(x - y <= 3, name="d")
+        assert "a: x - y = 1\nBounds" in m.build_str_model()
+        # d is not implied by a anymore, it is added again
+        m.set_rhs("a", 5)
+        assert "a: x - y = 5\nd: x - y <= 3\nBounds" in m.build_str_model()
+        assert m.get_constraint_index("d") == 2
+        assert m.dedup_stats == (0, 0, 0)
+
+    def test_removal(self):
+        m = MIPModel("a")
+        m.enable_dedup()
+        x = m.add_continuous_var("x")
+        y = m.add_continuous_var("y")
+        m.add_constraint(x + y <= 1)
+        m.remove_constraint_with_index(0)
+        m.add_constraint(x + y <= 2)
+        assert "x + y <= 2" in m.build_str_model()
+        m.build_with_matrices([1, 2], [[0, 0], [1, 0], [2, 0]], [3, 1, 1])
+        m.add_constraint(m.get_variable("x0") <= 0.25)
+        assert "cIneq0: 0 x0 <= 3\ncIneq1: x0 <= 0.25\nBounds" in m.build_str_model()
+        assert m.dedup_stats.parallel_rows == 2
+
+
+class TestCompactLp:
+    def model(self, **kwargs):
+        m = MIPModel("a", **kwargs)
+        x = m.add_integer_var("x", lb=0, ub=10)
+        y = m.add_continuous_var("y")
+        z = m.add_continuous_var("z", lb=0)
+        t = m.add_binary_var("t")
+        u = m.add_continuous_var("u", lb=-2)
+        v = m.add_continuous_var("v", lb=1.5, ub=1.5)
+        m.add_constraint(0.1 * x + 0.2 * y + z + t >= 0.1 + 0.2 + u + v)
+        m.set_obj(x + y / 3)
+        return m
+
+    def test_compact(self):
+        assert self.model(compact_lp=True).build_str_model() == "\n".join([
+            "Minimize",
+            "x + 0.3333333333333333 y",
+            "Subject To",
+            "0.1 x + 0.2 y + z + t - u - v >= 0.30000000000000004",
+            "Bounds",
+            "x <= 10",
+            "y free",
+            "u >= -2",
+            "v = 1.5",
+            "General",
+            "x",
+            "Binary",
+            "t",
+            "End"])
+
+    def test_precision(self):
+        lines = self.model(compact_lp=True, precision=4).build_str_model().split("\n")
+        assert lines[1] == "x + 0.3333 y"
+        assert lines[3] == "0.1 x + 0.2 y + z + t - u - v >= 0.3"
+        lines = self.model(precision=4).build_str_model().split("\n")
+        assert lines[3] == "0.1 x + 0.2 y + z + t - u - v >= 0.3"
+        assert lines[5] == "0 <= x <= 10"
+
+    def test_precision_of_bounds(self):
+        m = MIPModel("a", precision=3)
+        x = m.add_continuous_var("x", lb=0.123456, ub=1.23456789)
+        m.add_constraint(x / 3 <= 1)
+        lines = m.build_str_model().split("\n")
+        assert "0.333 x <= 1" in lines and "0.123 <= x <= 1.23" in lines
+        problem = MPS_PROBLEM("m", False, 0, [1 / 3], ["x"], [0.123456], [1.23456789],
+                              [False], ["c"], ["<="], [1], [([0], [1 / 3])])
+        lines = list(_iter_lp_lines(problem, format_number=m._format_number))
+        assert "c: 0.333 x <= 1" in lines and "0.123 <= x <= 1.23" in lines
+
+    @pytest.mark.parametrize("compact_lp", [False, True])
+    def test_large_numbers(self, compact_lp):
+        m = MIPModel("a", compact_lp=compact_lp)
+        x = m.add_continuous_var("x", lb=-1e300, ub=1e25)
+        m.add_constraint(1e20 * x <= 123456789012345.0)
+        lines = m.build_str_model().split("\n")
+        assert "1e+20 x <= 123456789012345" in lines
+        assert "-1e+300 <= x <= 1e+25" in lines
+
+    def test_no_bounds(self):
+        m = MIPModel("a", compact_lp=True)
+        x = m.add_continuous_var("x", lb=0)
+        m.add_constraint(x <= 1)
+        assert m.build_str_model().split("\n")[-2:] == ["x <= 1", "End"]
+        with pytest.raises(ValueError):
+            MIPModel("a", precision=0)
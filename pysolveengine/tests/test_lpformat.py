@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Module for testing the LP files read for the MIP models
+"""
+
+# pylint: disable=R0201, C0103, W0612, C0111, protected-access
+
+import pytest
+from pysolveengine.mipmodel import MIPModel, INF
+from pysolveengine.lpformat import read_lp
+from pysolveengine.tests.test_mps import small_model
+
+
+def write_file(tmpdir, lines, name="model.lp"):
+    path = str(tmpdir.join(name))
+    with open(path, "w") as f:
+        f.write("\n".join(lines + [""]))
+    return path
+
+
+def rows_of(pb):
+    return [(list(cols), list(coefs)) for cols, coefs in pb.rows]
+
+
+class TestReadLp:
+    @pytest.mark.parametrize("compact_lp", [False, True])
+    def test_round_trip(self, tmpdir, compact_lp):
+        m = small_model()
+        m._compact_lp = compact_lp
+        path = write_file(tmpdir, [m.build_str_model()])
+        pb = read_lp(path)
+        # the columns are numbered as they appear, t is in the objective
+        assert pb.col_names == ["x", "y", "t", "z"]
+        assert pb.maximize and pb.obj_constant == 1
+        assert list(pb.obj) == [1, 1, -2, 0]
+        assert pb.row_names == ["c1", "c2", "c3"]
+        assert pb.senses == [">=", "=", "<="]
+        assert list(pb.rhs) == [2, 4, 0.25]
+        assert rows_of(pb) == [([0, 1], [1, 2]), ([0, 1, 3], [1, -1, -1]), ([2, 3], [3, 1])]
+        assert list(pb.lbs) == [0, -2, 0, -INF]
+        assert list(pb.ubs) == [10, INF, 1, 3.5]
+        assert list(pb.integers) == [1, 0, 1, 0]
+
+        m2 = MIPModel("a", compact_lp=compact_lp)
+        m2.build_from_file(path)
+        m3 = MIPModel("a", compact_lp=compact_lp)
+        m3.build_from_file(write_file(tmpdir, [m2.build_str_model()], "other.lp"))
+        assert m3.build_str_model() == m2.build_str_model()
+
+    def test_read(self, tmpdir):
+        path = write_file(tmpdir, ["\\ a comment",
+                                   "MINIMIZE",
+                                   " cost: 2x+3 y",
+                                   "   - z + 4 \\ the constant",
+                                   "st",
+                                   " lim: x + y",
+                                   "   + 2 z >= - 3",
+                                   " other :",
+                                   " -x + 1 - 2y",
+                                   " <= 2",
+                                   " 1.5e1 a - .5 z = inf",
+                                   "Bounds",
+                                   " x free",
+                                   " -1 <= y <= 5",
+                                   " 4 >= z",
+                                   " z >= -Infinity",
+                                   " a = 2",
+                                   " b <= 3",
+                                   "Generals",
+                                   " y",
+                                   "Binaries",
+                                   " c",
+                                   "End",
+                                   "not read"])
+        pb = read_lp(path)
+        assert not pb.maximize and pb.obj_constant == 4
+        assert pb.col_names == ["x", "y", "z", "a", "b", "c"]
+        assert list(pb.obj) == [2, 3, -1, 0, 0, 0]
+        assert pb.row_names == ["lim", "other", None]
+        assert pb.senses == [">=", "<=", "="]
+        assert list(pb.rhs) == [-3, 1, INF]
+        assert rows_of(pb) == [([0, 1, 2], [1, 1, 2]), ([0, 1], [-1, -2]),
+                               ([3, 2], [15, -0.5])]
+        assert list(pb.lbs) == [-INF, -1, -INF, 2, 0, 0]
+        assert list(pb.ubs) == [INF, 5, 4, 2, 3, 1]
+        assert list(pb.integers) == [0, 1, 0, 0, 0, 1]
+
+    def test_build(self, tmpdir):
+        path = write_file(tmpdir, ["Maximize", " x + 2 y", "Subject To",
+                                   " c1: x + y <= 4", "Bounds", " x <= 3", "End"])
+        m = MIPModel("a")
+        m.build_from_file(path)
+        assert m.get_variable("x").ub == 3 and m.get_variable("y").ub == INF
+        assert m.build_str_model().split("\n")[:4] == ["Maximize", "x + 2 y",
+                                                       "Subject To", "c1: x + y <= 4"]
+
+    def test_unusual_spacing(self, tmpdir):
+        path = write_file(tmpdir, ["min", " x + y", "st", " c1: 2 z - y + 3 z <= 4",
+                                   " c2 : - t + 2 y >= - 1", "bounds", " x>=1", " y <= - 2",
+                                   " - 3 <= z <= 3", " 0 <= t<=1", "end"])
+        pb = read_lp(path)
+        assert pb.col_names == ["x", "y", "z", "t"]
+        assert rows_of(pb) == [([2, 1, 2], [2, -1, 3]), ([3, 1], [-1, 2])]
+        assert pb.row_names == ["c1", "c2"] and list(pb.rhs) == [4, -1]
+        assert list(pb.lbs) == [1, 0, -3, 0] and list(pb.ubs) == [INF, -2, 3, 1]
+
+    @pytest.mark.parametrize("lines, message", [
+        (["x + y"], "must start with the objective"),
+        (["min", " x <= 2"], "objective cannot contain"),
+        (["min", " x", "st", " -1 <= x + y <= 1"], "ranged constraints"),
+        (["min", " x", "st", " c: x + y <=", "End"], "not complete"),
+        (["min", " x", "st", " x + [ y ^ 2 ] <= 2"], "quadratic"),
+        (["min", " x", "semi-continuous", " x"], "not supported"),
+        (["min", " x", "bounds", " x <= 2 <= 3"], "a bound must be"),
+        (["min", " x", "st", " x + y <= nan"], "not a number"),
+    ])
+    def test_errors(self, tmpdir, lines, message):
+        path = write_file(tmpdir, lines)
+        with pytest.raises(ValueError, match=message):
+            read_lp(path)
+
+    def test_error_line(self, tmpdir):
+        path = write_file(tmpdir, ["min", " x", "st", " x 2 3 <= 1"])
+        with pytest.raises(ValueError, match="model.lp, line 4"):
+            MIPModel("a").build_from_file(path)
+        with pytest.raises(ValueError, match="'.mps' or '.lp'"):
+            MIPModel("a").build_from_file(str(tmpdir.join("model.txt")))
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Module for testing the MIP models built with matrices
+"""
+
+# pylint: disable=R0201, C0103, W0612, C0111, protected-access
+
+import pytest
+from pysolveengine.mipmodel import MIPModel
+from pysolveengine.matrixmodel import MatrixMIPModel
+from pysolveengine.tests.fakes import Result
+
+np = pytest.importorskip("numpy")
+
+F = [-2, 1, 3]
+A = [[2, 3, 1], [-1, 0, 4]]
+B = [1, 0]
+LP_RESULT = "\n".join(["Minimize",
+                       "- 2 x0 + x1 + 3 x2",
+                       "Subject To",
+                       "cIneq0: 2 x0 + 3 x1 + x2 <= 1",
+                       "cIneq1: - x0 + 4 x2 <= 0",
+                       "Bounds",
+                       "-inf <= x0 <= inf",
+                       "-inf <= x1 <= inf",
+                       "-inf <= x2 <= inf",
+                       "General",
+                       "End"])
+
+
+class TestCheckMatrices:
+    def test_lists(self):
+        m = MIPModel("a")
+        m.build_with_matrices(F, A, B)
+        assert m.build_str_model() == LP_RESULT
+
+    def test_numpy(self):
+        m = MIPModel("a")
+        m.build_with_matrices(np.array(F), np.array(A), np.array(B))
+        assert m.build_str_model() == LP_RESULT
+
+    def test_numpy_bounds(self):
+        m = MIPModel("a")
+        m.build_with_matrices(np.array(F), np.array(A), np.array(B),
+                              lb=np.array([0, -np.inf]), ub=np.array([1, 2, 3]),
+                              int_list=np.array([0, 1, 0]))
+        assert m.get_variable("x0").lb == 0
+        assert m.get_variable("x1").lb == -np.inf
+        assert str(m.get_variable("x2").lb) == "-inf"
+        assert m.get_variable("x1").is_integer
+
+    def test_scipy_sparse(self):
+        sparse = pytest.importorskip("scipy.sparse")
+        m = MIPModel("a")
+        m.build_with_matrices(F, sparse.csr_matrix(np.array(A)), B)
+        assert m.build_str_model() == LP_RESULT
+
+    @pytest.mark.parametrize("mat", [np.array([[1, np.nan, 2]]),
+                                     np.array([[1, np.inf, 2]]),
+                                     np.array([1, 2, 3]),
+                                     np.array([["a", "b", "c"]])])
+    def test_wrong_arrays(self, mat):
+        with pytest.raises(ValueError):
+            MIPModel("a").build_with_matrices(F, mat, [1])
+
+    def test_wrong_bounds(self):
+        with pytest.raises(ValueError):
+            MIPModel("a").build_with_matrices(F, A, B, lb=np.array([0, np.nan, 0]))
+        with pytest.raises(ValueError):
+            MIPModel("a").build_with_matrices(F, A, B, ub=np.zeros(4))
+
+
+class TestMatrixMIPModel:
+    def test_same_lp_as_mipmodel(self):
+        args = (F, A, B)
+        kwargs = dict(Aeq=[[1, 5, 0]], beq=[-2.5], lb=[0, 1, -1], ub=[5, 10, 3],
+                      int_list=[0, 0, 1], bin_list=[1, 0, 0])
+        m = MIPModel("a")
+        m.build_with_matrices(*args, **kwargs)
+        mm = MatrixMIPModel("a")
+        mm.build_with_matrices(*args, **kwargs)
+        assert mm.build_str_model() == m.build_str_model()
+        assert mm.nb_vars == 3
+        assert mm.nb_constraints == 3
+
+    def test_arrays_are_kept(self):
+        sparse = pytest.importorskip("scipy.sparse")
+        mat = sparse.csr_matrix(np.array(A))
+        f = np.array(F)
+        mm = MatrixMIPModel("a")
+        mm.build_with_matrices(f, mat, np.array(B), lb=np.zeros(3))
+        assert mm.matrices.A is mat
+        assert mm.matrices.f is f
+        assert mm.build_str_model().split("\nBounds\n")[0] == LP_RESULT.split("\nBounds\n")[0]
+
+    @pytest.mark.parametrize("model_name, compact_lp", [("m", True), ("m.mps", False)])
+    def test_same_file_as_mipmodel(self, model_name, compact_lp):
+        sparse = pytest.importorskip("scipy.sparse")
+        kwargs = dict(Aeq=[[1, 5, 0]], beq=[-2.5], lb=[0, 1, -1], ub=[5, 10, 3],
+                      int_list=[0, 0, 1], bin_list=[1, 0, 0])
+        m = MIPModel("a", model_name=model_name, compact_lp=compact_lp)
+        m.build_with_matrices(F, A, B, **kwargs)
+        mm = MatrixMIPModel("a", model_name=model_name, compact_lp=compact_lp)
+        mm.build_with_matrices(F, sparse.csr_matrix(np.array(A)), B, **kwargs)
+        assert mm.build_str_model() == m.build_str_model()
+
+    def test_empty_row(self):
+        mm = MatrixMIPModel("a")
+        mm.build_with_matrices(F, [[0, 0, 0]], [2])
+        assert "cIneq0: 0 x0 <= 2" in mm.build_str_model()
+
+    @pytest.mark.parametrize("model_name", ["m", "m.mps"])
+    def test_empty_equality_matrices(self, model_name):
+        m = MIPModel("a", model_name=model_name)
+        m.build_with_matrices(F, A, B, Aeq=[[]], beq=[])
+        mm = MatrixMIPModel("a", model_name=model_name)
+        mm.build_with_matrices(F, A, B, Aeq=[[]], beq=[])
+        assert mm.build_str_model() == m.build_str_model()
+        assert mm.nb_constraints == 2
+
+    def test_results(self):
+        mm = MatrixMIPModel("a")
+        mm.build_with_matrices(F, A, B)
+        assert mm.var_results == "not computed"
+        mm._process_solution(Result([("x2", 1.5), ("x0", 2)]))
+        assert list(mm.var_results[[0, 2]]) == [2, 1.5]
+        assert np.isnan(mm.var_results[1])
+        assert mm.obj == "3"
+
+    def test_unknown_results(self):
+        mm = MatrixMIPModel("a")
+        mm.build_with_matrices(F, A, B)
+        # the names the model has not written are skipped
+        mm._process_solution(Result([("x2", 1.5), ("slack", 7), ("x3", 4), ("x0", 2)]))
+        assert list(mm.var_results[[0, 2]]) == [2, 1.5] and len(mm.var_results) == 3
+        assert np.isnan(mm.var_results[1])
+
+
+class TestToMatrices:
+    def small_model(self):
+        m = MIPModel("a")
+        x = m.add_integer_var("x", lb=0, ub=10)
+        y = m.add_continuous_var("y", lb=-2)
+        z = m.add_binary_var("z")
+        m.add_constraint(x + 2 * y >= 2)
+        m.add_constraint(x - y - z == 4)
+        m.add_constraint(3 * z + y <= 0.25)
+        m.set_obj(x + y - 2 * z + 1)
+        m.set_to_maximize()
+        return m
+
+    def test_export(self):
+        pytest.importorskip("scipy.sparse")
+        res = self.small_model().to_matrices()
+        assert res.A.toarray().tolist() == [[-1, -2, 0], [0, 1, 3]]
+        assert res.b.tolist() == [-2, 0.25]
+        assert res.Aeq.toarray().tolist() == [[1, -1, -1]]
+        assert res.beq.tolist() == [4]
+        assert res.lb.tolist() == [0, -2, 0]
+        assert res.ub.tolist() == [10, np.inf, 1]
+        assert res.integers.tolist() == [True, False, True]
+        assert res.f.tolist() == [1, 1, -2]
+        assert res.obj_constant == 1 and res.maximize
+        assert res.ineq_rows.tolist() == [0, 2] and res.eq_rows.tolist() == [1]
+
+    def test_round_trip(self):
+        pytest.importorskip("scipy.sparse")
+        m = MIPModel("a")
+        m.build_with_matrices(F, A, B, Aeq=[[1, 0, 1]], beq=[2], lb=[0, 0, -1], ub=[4, 5, 6])
+        res = m.to_matrices()
+        m2 = MIPModel("a")
+        m2.build_with_matrices(res.f, res.A, res.b, Aeq=res.Aeq, beq=res.beq,
+                               lb=res.lb, ub=res.ub, int_list=res.integers.astype(int))
+        assert m2.build_str_model() == m.build_str_model()
+
+    def test_without_scipy(self, monkeypatch):
+        monkeypatch.setattr("pysolveengine.mipmodel._get_scipy_sparse", lambda: None)
+        res = self.small_model().to_matrices()
+        assert res.A.shape == (2, 3)
+        assert res.A.indptr.tolist() == [0, 2, 4]
+        # the cells of a row are in the order of the terms of the constraint
+        assert res.A.indices.tolist() == [0, 1, 2, 1]
+        assert res.A.data.tolist() == [-1, -2, 3, 1]
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Module for testing the MPS files written and read for the MIP models
+"""
+
+# pylint: disable=R0201, C0103, W0612, C0111, protected-access
+
+import pytest
+from pysolveengine.mipmodel import MIPModel, INF
+from pysolveengine.matrixmodel import MatrixMIPModel
+from pysolveengine.mpsformat import read_mps
+
+
+def small_model(model_name="model"):
+    m = MIPModel("a", model_name=model_name)
+    x = m.add_integer_var("x", lb=0, ub=10)
+    y = m.add_continuous_var("y", lb=-2)
+    z = m.add_continuous_var("z", ub=3.5)
+    t = m.add_binary_var("t")
+    m.add_constraint(x + 2 * y >= 2, name="c1")
+    m.add_constraint(x - y - z == 4, name="c2")
+    m.add_constraint(3 * t + z <= 0.25, name="c3")
+    m.set_obj(x + y - 2 * t + 1)
+    m.set_to_maximize()
+    return m
+
+
+MPS_RESULT = "\n".join(["NAME model",
+                        "OBJSENSE",
+                        "    MAX",
+                        "ROWS",
+                        " N obj",
+                        " G c1",
+                        " E c2",
+                        " L c3",
+                        "COLUMNS",
+                        " MARKER 'MARKER' 'INTORG'",
+                        " x obj 1",
+                        " x c1 1",
+                        " x c2 1",
+                        " MARKER 'MARKER' 'INTEND'",
+                        " y obj 1",
+                        " y c1 2",
+                        " y c2 -1",
+                        " z c2 -1",
+                        " z c3 1",
+                        " MARKER 'MARKER' 'INTORG'",
+                        " t obj -2",
+                        " t c3 3",
+                        " MARKER 'MARKER' 'INTEND'",
+                        "RHS",
+                        " RHS obj -1",
+                        " RHS c1 2",
+                        " RHS c2 4",
+                        " RHS c3 0.25",
+                        "BOUNDS",
+                        " UP BND x 10",
+                        " LO BND y -2",
+                        " MI BND z",
+                        " UP BND z 3.5",
+                        " UP BND t 1",
+                        "ENDATA"])
+
+
+class TestWriteMps:
+    def test_free(self, tmpdir):
+        path = str(tmpdir.join("model.mps"))
+        small_model().write_mps(path)
+        with open(path) as f:
+            assert f.read() == MPS_RESULT
+
+    def test_mps_model_name(self):
+        m = small_model("model.mps")
+        assert m.file_name == "model.mps"
+        assert m.build_str_model() == MPS_RESULT
+
+    def test_fixed(self, tmpdir):
+        path = str(tmpdir.join("model.mps"))
+        small_model().write_mps(path, fixed=True)
+        with open(path) as f:
+            lines = f.read().split("\n")
+        assert "    x         c1                   1" in lines
+        assert " UP BND       z                  3.5" in lines
+
+    def test_large_numbers(self):
+        m = MIPModel("a", model_name="m.mps")
+        x = m.add_continuous_var("x", ub=1e25)
+        m.add_constraint(1e20 * x <= 4, name="c")
+        lines = m.build_str_model().split("\n")
+        assert " x c 1e+20" in lines
+        assert " UP BND x 1e+25" in lines
+
+    def test_fixed_long_name(self, tmpdir):
+        m = MIPModel("a")
+        x = m.add_continuous_var("a_long_name")
+        m.add_constraint(x >= 1)
+        m.write_mps(str(tmpdir.join("free.mps")))
+        with pytest.raises(ValueError):
+            m.write_mps(str(tmpdir.join("fixed.mps")), fixed=True)
+
+    def test_matrix_model(self):
+        kwargs = dict(Aeq=[[1, 5, 0]], beq=[-2.5], lb=[0, 1, -INF], ub=[5, 10, 3],
+                      int_list=[0, 0, 1], bin_list=[1, 0, 0])
+        m = MIPModel("a", model_name="m.mps")
+        m.build_with_matrices([-2, 1, 3], [[2, 3, 1], [-1, 0, 4]], [1, 0], **kwargs)
+        mm = MatrixMIPModel("a", model_name="m.mps")
+        mm.build_with_matrices([-2, 1, 3], [[2, 3, 1], [-1, 0, 4]], [1, 0], **kwargs)
+        assert mm.build_str_model() == m.build_str_model()
+
+
+class TestReadMps:
+    @pytest.mark.parametrize("fixed", [False, True])
+    def test_round_trip(self, tmpdir, fixed):
+        path = str(tmpdir.join("model.mps"))
+        m = small_model()
+        m.write_mps(path, fixed=fixed)
+        m2 = MIPModel("a", model_name="model.mps")
+        m2.build_from_file(path)
+        assert m2.build_str_model() == MPS_RESULT
+
+    def test_row_named_obj(self, tmpdir):
+        path = str(tmpdir.join("model.mps"))
+        m = MIPModel("a")
+        x = m.add_continuous_var("x", lb=0)
+        y = m.add_continuous_var("y", lb=0)
+        m.add_constraint(x + y <= 3, name="obj")
+        m.add_constraint(x - y >= 1, name="_obj")
+        m.set_obj(x + 3)
+        m.write_mps(path)
+        pb = read_mps(path)
+        assert pb.row_names == ["__obj", "_obj"]
+        assert list(pb.obj) == [1, 0] and pb.obj_constant == 3
+        assert list(pb.rhs) == [3, 1]
+        m2 = MIPModel("a")
+        m2.build_from_file(path)
+        assert m2.build_str_model().split("\n")[1:5] == ["x + 3", "Subject To",
+                                                          "__obj: x + y <= 3",
+                                                          "_obj: x - y >= 1"]
+
+    def test_duplicate_row_names(self, tmpdir):
+        path = str(tmpdir.join("model.mps"))
+        m = MIPModel("a")
+        x = m.add_continuous_var("x", lb=0)
+        m.add_constraint(x <= 3, name="c")
+        m.add_constraint(x >= 1, name="c")
+        m.add_constraint(x <= 2, name="_c")
+        m.write_mps(path)
+        assert read_mps(path).row_names == ["c", "__c", "_c"]
+
+    def test_read(self, tmpdir):
+        path = str(tmpdir.join("other.mps"))
+        with open(path, "w") as f:
+            f.write("\n".join(["* a comment",
+                               "NAME          other",
+                               "ROWS",
+                               " N  cost",
+                               " N  free",
+                               " L  lim",
+                               "COLUMNS",
+                               "    a  cost  1.5  lim  2",
+                               "    a  free  3",
+                               "    b  lim  -1",
+                               "RHS",
+                               "    rhs  lim  4",
+                               "BOUNDS",
+                               " BV bnd b",
+                               " FR a",
+                               "ENDATA", ""]))
+        pb = read_mps(path)
+        assert pb.name == "other"
+        assert pb.col_names == ["a", "b"]
+        assert list(pb.obj) == [1.5, 0]
+        assert [(list(cols), list(coefs)) for cols, coefs in pb.rows] == [([0, 1], [2, -1])]
+        assert list(pb.integers) == [0, 1]
+        assert list(pb.lbs) == [-float("inf"), 0]
+        assert list(pb.ubs) == [float("inf"), 1]
+        m = MIPModel("a")
+        m.build_from_file(path)
+        assert "lim: 2 a - b <= 4" in m.build_str_model()
+
+    def test_not_indented(self, tmpdir):
+        path = str(tmpdir.join("free.mps"))
+        with open(path, "w") as f:
+            f.write("\n".join(["NAME free model", "OBJSENSE", "MAX", "ROWS", "N obj",
+                               "L c1", "G RHS", "COLUMNS", "x obj 1 c1 2", "x RHS 1",
+                               "RHS", "RHS c1 4 RHS 1", "BOUNDS", "UP BND x 3",
+                               "LO BND x -1", "ENDATA", ""]))
+        pb = read_mps(path)
+        assert pb.name == "free model" and pb.maximize
+        assert pb.row_names == ["c1", "RHS"] and list(pb.rhs) == [4, 1]
+        assert pb.col_names == ["x"] and list(pb.ubs) == [3] and list(pb.lbs) == [-1]
+        with open(path, "w") as f:
+            f.write("\n".join(["ROWS", " N obj", "SOS", " S1 SOS s1", "ENDATA"]))
+        with pytest.raises(ValueError, match="unknown section SOS"):
+            read_mps(path)
+
+    def test_errors(self, tmpdir):
+        path = str(tmpdir.join("wrong.mps"))
+        with open(path, "w") as f:
+            f.write("\n".join(["ROWS", " N obj", "COLUMNS", " x unknown 1", "ENDATA"]))
+        with pytest.raises(ValueError):
+            MIPModel("a").build_from_file(path)
+        with pytest.raises(ValueError):
+            MIPModel("a").build_from_file(str(tmpdir.join("model.lp")))
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Module for testing the presolve of the MIP models
+"""
+
+# pylint: disable=R0201, C0103, W0612, C0111, protected-access
+
+import pytest
+from pysolveengine.mipmodel import MIPModel, INF
+from pysolveengine.tests.fakes import Result
+
+
+def fake_solving(model, values):
+    """replace the requests to SE, the problem sent is kept in model.sent"""
+    def manage_solving():
+        model.sent = b"".join(model._iter_model_chunks()).decode()
+        return "id", "completed", Result(values)
+    model.client.manage_solving = manage_solving
+
+
+def small_model():
+    m = MIPModel("a")
+    x = m.add_integer_var("x", lb=0, ub=10)
+    y = m.add_continuous_var("y", lb=-INF)
+    z = m.add_continuous_var("z", lb=3, ub=3)
+    t = m.add_integer_var("t", lb=0, ub=10)
+    m.add_constraint(x + 2 * y + z >= 5, name="c1")
+    m.add_constraint(2 * t <= 7, name="single")
+    m.add_constraint(z - 0 * x <= 4, name="empty")
+    m.add_constraint(x + t <= 30, name="redundant")
+    m.add_constraint(2 * y + x + z >= 4, name="duplicate")
+    m.add_constraint(x - y + t == 1, name="c2")
+    m.set_obj(x + y + 2 * z)
+    return m
+
+
+class TestPresolve:
+    def test_reduced_problem(self):
+        m = small_model()
+        fake_solving(m, [("x", 1), ("y", 2), ("t", 2)])
+        m.solve(presolve=True)
+        assert m.sent == "\n".join(["Minimize",
+                                    "x + y + 6",
+                                    "Subject To",
+                                    "c1: x + 2 y >= 2",
+                                    "c2: x - y + t = 1",
+                                    "Bounds",
+                                    "0 <= x <= 10",
+                                    "-inf <= y <= inf",
+                                    "0 <= t <= 3",
+                                    "General",
+                                    "x",
+                                    "t",
+                                    "End"])
+        stats = m.presolve_stats
+        assert stats.removed_cols == 1 and stats.removed_rows == 4
+        assert stats.singleton_rows == 1 and stats.empty_rows == 1
+        assert stats.redundant_rows == 1 and stats.duplicate_rows == 1
+        assert stats.zero_coefs == 1
+        assert m.var_results == {"x": 1, "y": 2, "z": 3, "t": 2}
+        # the model itself is not modified
+        assert m.get_variable("t").ub == 10
+        assert "single: 2 t <= 7" in m.build_str_model()
+
+    def test_fixed_by_singleton(self):
+        m = MIPModel("a", model_name="m.mps")
+        x = m.add_continuous_var("x", lb=0)
+        y = m.add_continuous_var("y", lb=0, ub=5)
+        m.add_constraint(2 * x == 3)
+        m.add_constraint(x + y <= 4)
+        m.add_constraint(x + y + 0 * x >= 1)
+        m.set_obj(x - y)
+        fake_solving(m, [("y", 2.5)])
+        m.solve(presolve=True)
+        assert "x" not in m.sent.split("\n")[3:]
+        assert m.var_results == {"x": 1.5, "y": 2.5}
+        assert m.presolve_stats.singleton_rows == 3
+
+    def test_infeasible(self):
+        m = MIPModel("a")
+        x = m.add_integer_var("x", lb=0, ub=10)
+        y = m.add_continuous_var("y", lb=0, ub=1)
+        m.add_constraint(2 * x == 3, name="odd")
+        fake_solving(m, [])
+        with pytest.raises(ValueError, match="odd"):
+            m.solve(presolve=True)
+        m.remove_constraint_with_index(0)
+        m.add_constraint(x + y >= 12, name="too_big")
+        with pytest.raises(ValueError, match="too_big"):
+            m.solve(presolve=True)
+
+    def test_zero_coefficient_of_free_column(self):
+        m = MIPModel("a")
+        x = m.add_continuous_var("x", lb=-INF)
+        y = m.add_continuous_var("y", lb=0, ub=5)
+        z = m.add_continuous_var("z", lb=0, ub=5)
+        m.add_constraint(0 * x + y + z <= 10, name="redundant")
+        m.add_constraint(x + y + z >= 1, name="c")
+        fake_solving(m, [("x", 1), ("y", 0), ("z", 0)])
+        m.solve(presolve=True)
+        assert "redundant" not in m.sent
+        assert m.presolve_stats.redundant_rows == 1
+
+    def test_without_presolve(self):
+        m = small_model()
+        fake_solving(m, [("x", 1), ("y", 2), ("z", 3), ("t", 2)])
+        m.solve()
+        assert m.sent == m.build_str_model()
+        assert m.presolve_stats is None
+
+
+class TestPropagation:
+    def test_tighten_bounds(self):
+        m = MIPModel("a")
+        x = m.add_integer_var("x")
+        y = m.add_integer_var("y", lb=1)
+        z = m.add_continuous_var("z", lb=0)
+        t = m.add_continuous_var("t")
+        m.add_constraint(x >= 0)
+        m.add_constraint(x + y <= 4.5)
+        m.add_constraint(2 * z - x <= 1)
+        m.add_constraint(t + z == 2)
+        stats = m.tighten_bounds()
+        assert (x.lb, x.ub) == (0, 3) and (y.lb, y.ub) == (1, 4)
+        assert (z.lb, z.ub) == (0, 2)
+        assert (t.lb, t.ub) == (0, 2)
+        assert stats.fixed_cols == 0 and stats.tightened_bounds == 6
+        assert "0 <= x <= 3" in m.build_str_model()
+
+    def test_fixed(self):
+        m = MIPModel("a")
+        x = m.add_integer_var("x", lb=0)
+        y = m.add_integer_var("y", lb=0)
+        m.add_constraint(x + y <= 0.5, name="c")
+        stats = m.tighten_bounds(max_passes=1)
+        assert x.ub == 0 and y.ub == 0
+        assert stats.fixed_cols == 2 and stats.passes == 1
+
+    def test_zero_coefficient_of_free_column(self):
+        m = MIPModel("a")
+        x = m.add_continuous_var("x", lb=-INF)
+        y = m.add_continuous_var("y", lb=0)
+        z = m.add_continuous_var("z", lb=0)
+        m.add_constraint(0 * x + y + z <= 0.5)
+        m.tighten_bounds()
+        assert y.ub == 0.5 and z.ub == 0.5
+        assert x.lb == -INF and x.ub == INF
+
+    def test_infeasible(self):
+        m = MIPModel("a")
+        x = m.add_integer_var("x", lb=0, ub=3)
+        y = m.add_continuous_var("y", lb=0)
+        m.add_constraint(x + y <= 4)
+        m.add_constraint(2 * x - y >= 7, name="c")
+        with pytest.raises(ValueError, match="constraint c"):
+            m.tighten_bounds()
+        assert x.ub == 3 and y.ub == INF
@@ -57,6 +57,22 @@ class TestSATModel:
         result = model._get_file_str()
         assert result == "p cnf 3 4\n1 3 0\n2 3 0\n-1 0\n-2 0"
 
+    def test_remove_constraint(self):
+        model = SATModel(token="a")
+        first = model.add_constraint_vector([1, -2])
+        second = model.add_constraint_vector([2, 3])
+        third = model.add_constraint_vector([-3])
+        assert (first, second, third) == (0, 1, 2)
+        model.remove_constraint_with_index(0)
+        # the indices of the other constraints do not change
+        model.remove_constraint_with_index(2)
+        assert model.build_str_model() == "p cnf 3 1\n2 3 0"
+        with pytest.raises(ValueError, match="removed"):
+            model.remove_constraint_with_index(0)
+        assert model.add_constraint_vector([1]) == 3
+        model.remove_constraint_with_index(-1)
+        assert model.build_str_model() == "p cnf 3 1\n2 3 0"
+
 
 class TestVar:
     def test_init(self):
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Module for testing the batched solving of the scenarios of a MIP model
+"""
+
+# pylint: disable=R0201, C0103, W0612, C0111, protected-access
+
+import math
+import threading
+import time
+import grpc
+import pytest
+import requests
+from pysolveengine.mipmodel import MIPModel, INF
+from pysolveengine.tests.fakes import Result
+
+
+class FakeClient:
+    """solve a scenario by reading the rhs of the constraint c1 in the problem sent"""
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def __init__(self, job, sent):
+        self.job = job
+        self.sent = sent
+
+    def manage_solving(self):
+        problem = b"".join(self.job._iter_model_chunks()).decode()
+        with FakeClient.lock:
+            FakeClient.running += 1
+            FakeClient.max_running = max(FakeClient.max_running, FakeClient.running)
+            self.sent.append(problem)
+        rhs = float(problem.split("c1: x + y >= ")[1].split("\n")[0])
+        time.sleep(0.01)
+        with FakeClient.lock:
+            FakeClient.running -= 1
+        if rhs == -1:
+            raise ValueError("Error with Solve engine : problem solving failed")
+        if rhs == -2:
+            raise requests.RequestException("connection lost")
+        if rhs == -3:
+            raise grpc.RpcError("unavailable")
+        if rhs > 100:
+            return "job{}".format(rhs), "completed", Result([], "no objective value", "infeasible")
+        return "job{}".format(rhs), "completed", Result([("y", rhs)], rhs)
+
+
+def scenario_model():
+    m = MIPModel("a")
+    x = m.add_continuous_var("x", lb=0, ub=1)
+    y = m.add_continuous_var("y", lb=0)
+    m.add_constraint(x + y >= 2, name="c1")
+    m.add_constraint(x - y <= 4)
+    m.set_obj(x + y)
+    m.sent = list()
+    m._new_client = lambda job: FakeClient(job, m.sent)
+    return m
+
+
+class TestScenarios:
+    def test_results(self):
+        m = scenario_model()
+        base = m.build_str_model()
+        x, y = m.get_variable("x"), m.get_variable("y")
+        results = m.solve_scenarios([{"rhs": {"c1": 3}},
+                                     {"rhs": {0: 5, 1: 2}, "bounds": {x: (None, 2)}},
+                                     {"obj": {x: 2, y: 0}},
+                                     {}], max_concurrency=2)
+        assert [result.index for result in results] == [0, 1, 2, 3]
+        assert [result.objective for result in results] == [3, 5, 2, 2]
+        assert results[1].job_id == "job5.0" and results[1].status == "optimal"
+        assert results[0].values[1] == 3 and math.isnan(results[0].values[0])
+        assert len(m.sent) == 4 and m.sent.count(base) == 1
+        sent = [problem for problem in m.sent if "c1: x + y >= 5" in problem][0]
+        assert "\nx - y <= 2\n" in sent and "0 <= x <= 2" in sent
+        sent = [problem for problem in m.sent if problem.split("\n")[1] != "x + y"][0]
+        assert sent.split("\n")[1] == "2 x + 0 y" and "\nx - y <= 4\n" in sent
+        # the model is not modified
+        assert m.build_str_model() == base
+        assert m.solver_status == "notstarted"
+
+    def test_concurrency(self):
+        m = scenario_model()
+        FakeClient.max_running = 0
+        results = list(m.iter_scenarios([{"rhs": {"c1": rhs}} for rhs in range(10)],
+                                        max_concurrency=3))
+        assert sorted(result.objective for result in results) == list(range(10))
+        assert 1 < FakeClient.max_running <= 3
+
+    def test_failed(self):
+        m = scenario_model()
+        results = m.solve_scenarios([{"rhs": {"c1": -1}}, {"rhs": {"c1": 1}}])
+        assert results[0].status == "failed" and results[0].values is None
+        assert "failed" in results[0].error
+        assert results[1].objective == 1 and results[1].error is None
+
+    def test_infeasible_in_batch(self):
+        m = scenario_model()
+        results = m.solve_scenarios([{"rhs": {"c1": rhs}} for rhs in [1, 200, -2, 2, -3, 3]],
+                                    max_concurrency=2)
+        assert [result.status for result in results] == ["optimal", "infeasible", "failed",
+                                                         "optimal", "failed", "optimal"]
+        assert [result.objective for result in results] == [1, None, None, 2, None, 3]
+        assert results[1].error is None and results[1].job_id == "job200.0"
+        assert math.isnan(results[1].values[1])
+        assert "connection lost" in results[2].error and "unavailable" in results[4].error
+
+    def test_errors(self):
+        m = scenario_model()
+        base = m.build_str_model()
+        with pytest.raises(ValueError, match="unknown override"):
+            m.solve_scenarios([{"rhs": {}, "lb": {}}])
+        with pytest.raises(ValueError, match="no constraint named c3"):
+            m.solve_scenarios([{"bounds": {m.get_variable("x"): (0, 2)},
+                                "rhs": {"c1": 4, "c3": 1}}])
+        with pytest.raises(ValueError):
+            m.solve_scenarios([{}], max_concurrency=0)
+        assert m.build_str_model() == base
+        assert m.get_variable("x").ub == 1
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Module for testing the binary snapshots of the models
+"""
+
+# pylint: disable=R0201, C0103, W0612, C0111, protected-access
+
+import os
+
+import pytest
+from pysolveengine.mipmodel import MIPModel, VarType, INF
+from pysolveengine.satmodel import SATModel
+
+
+def mip_model():
+    m = MIPModel("a", model_name="snap")
+    x = m.add_vars("x", [2, ["a", "b"]], lb=0, ub=4, vtype=VarType.INTEGER)
+    y = m.add_continuous_var("y", lb=-1)
+    m.add_constraint(x[0, "a"] + 2 * y <= 3, name="c1")
+    m.add_constraint(x[1, "b"] - y >= 1)
+    m.add_constraint(x[1, "a"] == 2, name="c3")
+    m.set_obj(x[0, "b"] + 3 * y + 5)
+    m.set_to_maximize()
+    return m
+
+
+class TestMIPSnapshot:
+    def test_round_trip(self, tmpdir):
+        path = str(tmpdir.join("model.snap"))
+        m = mip_model()
+        m.save(path)
+        m2 = MIPModel.load(path, "token")
+        assert m2.build_str_model() == m.build_str_model()
+        assert m2.file_name == "snap.lp"
+        assert m2.get_variable("x_1_b").ub == 4 and m2.get_variable("y").ub == INF
+        assert m2.obj == "not computed"
+
+    def test_modify_loaded(self, tmpdir):
+        path = str(tmpdir.join("model.snap"))
+        mip_model().save(path)
+        m = MIPModel.load(path, "token", model_name="other.mps")
+        y = m.add_integer_var("z", lb=0, ub=1)
+        m.add_constraint(y + m.get_variable("y") <= 7, name="c4")
+        m.remove_constraint_with_index(0)
+        m.get_variable("x_0_a").lb = 1
+        assert m.file_name == "other.mps"
+        lines = m.build_str_model().split("\n")
+        assert " L c4" in lines and " L c1" not in lines
+        m.set_to_minimize()
+        m.save(path)
+        m2 = MIPModel.load(path, "token")
+        assert m2.build_str_model() == m.build_str_model()
+
+    def test_lazy_rows(self, tmpdir):
+        path = str(tmpdir.join("model.snap"))
+        m = mip_model()
+        m.save(path)
+        m2 = MIPModel.load(path, "token")
+        store = m2._MIPModel__constraints
+        table = m2._MIPModel__vars
+        # nothing is built nor copied while loading and writing
+        assert isinstance(table.lbs, memoryview) and table._names_blob is not None
+        assert m2.build_str_model() == m.build_str_model()
+        assert not store.built and isinstance(table.lbs, memoryview)
+        assert m2.get_constraint_index("c3") == 2 and not store.built
+        m2.set_rhs("c3", 5)
+        assert list(store.built) == [2]
+        m2.remove_constraint_with_index(-2)
+        m2.add_constraint(m2.get_variable("y") >= 0, name="c5")
+        assert list(store.built) == [2] and len(store) == 3
+        lines = m2.build_str_model().split("\n")
+        assert lines[3:6] == ["c1: x_0_a + 2 y <= 3", "c3: x_1_a = 5", "c5: y >= 0"]
+        m2.get_variable("y").ub = 2
+        assert not isinstance(table.lbs, memoryview) and table.ubs[4] == 2
+
+    def test_duplicate_names(self, tmpdir):
+        path = str(tmpdir.join("model.snap"))
+        m = mip_model()
+        m.add_constraint(m.get_variable("y") >= 0, name="c1")
+        m.save(path)
+        m2 = MIPModel.load(path, "token")
+        assert m2.get_constraint_index("c1") == 3
+        m2.add_constraint(m2.get_variable("y") <= 1, name="c1")
+        assert m2.get_constraint_index("c1") == 4
+        m2.remove_constraint("c1")
+        m2.remove_constraint("c1")
+        assert m2.get_constraint_index("c1") == 0
+
+    def test_values(self, tmpdir):
+        path = str(tmpdir.join("model.snap"))
+        m = mip_model()
+        m.get_variable("y").set_value(2.5)
+        m.save(path)
+        m2 = MIPModel.load(path, "token")
+        assert m2.var_results["y"] == 2.5
+        assert m2.var_results["x_0_a"] == "not computed"
+
+    def test_close(self, tmpdir):
+        path = str(tmpdir.join("model.snap"))
+        m = mip_model()
+        m.add_constraint(2 * m.get_variable("x_1_a") == 4)
+        m.save(path)
+        m2 = MIPModel.load(path, "token")
+        m2.enable_dedup()
+        m2.set_rhs("c1", 2)
+        m2.close()
+        store = m2._MIPModel__constraints
+        assert not isinstance(m2._MIPModel__vars.lbs, memoryview)
+        assert not isinstance(store.lazy.rhs, memoryview)
+        # the file can be replaced, the row merged into c3 is still readable
+        mip_model().save(path)
+        m2.remove_constraint("c3")
+        lines = m2.build_str_model().split("\n")
+        assert lines[3:6] == ["c1: x_0_a + 2 y <= 2", "x_1_b - y >= 1", "2 x_1_a = 4"]
+        assert MIPModel.load(path, "token").build_str_model() == mip_model().build_str_model()
+        m2.close()
+
+    def test_context_manager(self, tmpdir):
+        path = str(tmpdir.join("model.snap"))
+        mip_model().save(path)
+        with MIPModel.load(path, "token") as m:
+            lines = m.build_str_model()
+            mapping = m._BaseModel__mapping
+        assert mapping.closed and m._BaseModel__mapping is None
+        assert m.build_str_model() == lines
+        os.replace(path, str(tmpdir.join("other.snap")))
+
+    def test_errors(self, tmpdir):
+        path = str(tmpdir.join("model.snap"))
+        with pytest.raises(ValueError, match="does not exist"):
+            MIPModel.load(path, "token")
+        with open(path, "w") as f:
+            f.write("Minimize")
+        with pytest.raises(ValueError, match="not a model snapshot"):
+            MIPModel.load(path, "token")
+        SATModel("a").save(path)
+        with pytest.raises(ValueError, match="not of a mip model"):
+            MIPModel.load(path, "token")
+        m = MIPModel("a")
+        m.add_continuous_var("x")
+        m.add_constraint(m.get_variable("x") <= 1, name="a\nb")
+        with pytest.raises(ValueError, match="new line"):
+            m.save(path)
+
+
+class TestSATSnapshot:
+    def test_round_trip(self, tmpdir):
+        path = str(tmpdir.join("model.snap"))
+        m = SATModel("a", model_name="sat")
+        x = m.add_variable("x")
+        y = m.add_variable("y", 5)
+        z = m.add_variable("z")
+        m.add_constraint_expr((x & -y) | z)
+        m.add_constraint_vector([1, -2])
+        x.set_value(True)
+        m.save(path)
+        m2 = SATModel.load(path, "token")
+        assert m2.build_str_model() == m.build_str_model()
+        assert m2.file_name == "sat.cnf"
+        assert m2.var_name_results == {"x": True, "y": "not computed", "z": "not computed"}
+        assert m2.get_variable_with_id(5).name == "y"
+
+    def test_modify_loaded(self, tmpdir):
+        path = str(tmpdir.join("model.snap"))
+        m = SATModel("a")
+        m.add_list_constraints([[1, -2], [2, 3]])
+        m.save(path)
+        m2 = SATModel.load(path, "token")
+        m2.add_constraint_vector([-3])
+        assert m2.build_str_model() == "\n".join(["p cnf 3 3", "1 -2 0", "2 3 0", "-3 0"])
+        m2.remove_constraint_with_index(0)
+        assert m2.build_str_model() == "\n".join(["p cnf 3 2", "2 3 0", "-3 0"])
+
+    def test_close(self, tmpdir):
+        path = str(tmpdir.join("model.snap"))
+        m = SATModel("a")
+        m.add_list_constraints([[1, -2], [2, 3]])
+        m.save(path)
+        with SATModel.load(path, "token") as m2:
+            pass
+        assert m2.build_str_model() == m.build_str_model()
+        m2.add_constraint_vector([-3])
+        assert m2.build_str_model() == "\n".join(["p cnf 3 3", "1 -2 0", "2 3 0", "-3 0"])